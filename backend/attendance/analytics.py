@@ -0,0 +1,136 @@
+"""
+Hours-worked analytics computed in the database.
+
+Session durations are ``check_out - check_in`` duration expressions and
+every total/average is computed by the database or over a streamed
+duration column, so no Attendance rows are loaded into the web worker.
+Each breakdown (per employee, per department) is one query. On
+PostgreSQL it is a grouped aggregate with ``percentile_cont``. Other
+backends stream the durations sorted per group, with the group's session
+count as a window function, and take sums, averages and nearest-rank
+percentiles in the same pass.
+"""
+import math
+from collections import defaultdict
+from itertools import groupby
+
+from django.db import connection
+from django.db.models import Aggregate, Avg, Count, DurationField, ExpressionWrapper, F, Sum, Window
+
+from .models import Attendance
+
+WORKED = ExpressionWrapper(F("check_out") - F("check_in"), output_field=DurationField())
+
+PERCENTILES = (50, 90, 95)
+
+EMPLOYEE_GROUP = ("employee_id", "employee__emp_code", "employee__name", "employee__department")
+DEPARTMENT_GROUP = ("employee__department",)
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL ``percentile_cont(p) WITHIN GROUP (ORDER BY expr)``."""
+    function = "PERCENTILE_CONT"
+    name = "PercentileCont"
+    template = "%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = DurationField()
+
+
+def to_hours(duration):
+    return round(duration.total_seconds() / 3600, 2) if duration else 0
+
+
+def closed_sessions(start, end, department=None, employee_id=None):
+    """Attendance rows with both punches inside [start, end] (inclusive)."""
+    records = Attendance.objects.filter(
+        date__gte=start,
+        date__lte=end,
+        check_in__isnull=False,
+        check_out__isnull=False,
+    )
+    if department:
+        records = records.filter(employee__department=department)
+    if employee_id:
+        records = records.filter(employee_id=employee_id)
+    return records
+
+
+def total_hours(records):
+    """Sum of worked hours over a queryset, in one aggregate query."""
+    total = records.filter(check_out__isnull=False).aggregate(total=Sum(WORKED))["total"]
+    return to_hours(total)
+
+
+def _streamed_breakdown(records, group_fields):
+    """Grouped totals and nearest-rank percentiles from one sorted, streamed query."""
+    durations = (
+        records.annotate(
+            worked=WORKED,
+            sessions=Window(Count("id"), partition_by=[F(f) for f in group_fields]),
+        )
+        .values_list(*group_fields, "sessions", "worked")
+        .order_by(*group_fields, "worked")
+        .iterator(chunk_size=2000)
+    )
+    rows = []
+    for key, items in groupby(durations, key=lambda item: item[:-2]):
+        row = dict(zip(group_fields, key))
+        # Several percentiles share a rank when there are few sessions
+        ranks = defaultdict(list)
+        total = None
+        for position, (*_, sessions, worked) in enumerate(items, start=1):
+            if position == 1:
+                for p in PERCENTILES:
+                    ranks[max(math.ceil(p / 100 * sessions), 1)].append(p)
+            for p in ranks.get(position, ()):
+                row[f"p{p}"] = worked
+            total = worked if total is None else total + worked
+        row.update(sessions=sessions, total=total, average=total / sessions)
+        rows.append(row)
+    return rows
+
+
+def _breakdown(records, group_fields):
+    if connection.vendor == "postgresql":
+        aggregates = {
+            "sessions": Count("id"),
+            "total": Sum(WORKED),
+            "average": Avg(WORKED),
+            **{f"p{p}": PercentileCont(WORKED, percentile=p / 100) for p in PERCENTILES},
+        }
+        rows = list(records.values(*group_fields).annotate(**aggregates).order_by(*group_fields))
+    else:
+        rows = _streamed_breakdown(records, group_fields)
+
+    for row in rows:
+        for field in ("total", "average", *(f"p{p}" for p in PERCENTILES)):
+            row[field] = to_hours(row.get(field))
+    return rows
+
+
+def hours_by_employee(records):
+    return [
+        {
+            "employee_id": row["employee_id"],
+            "emp_code": row["employee__emp_code"],
+            "name": row["employee__name"],
+            "department": row["employee__department"],
+            "sessions": row["sessions"],
+            "total_hours": row["total"],
+            "avg_hours": row["average"],
+            **{f"p{p}_hours": row[f"p{p}"] for p in PERCENTILES},
+        }
+        for row in _breakdown(records, EMPLOYEE_GROUP)
+    ]
+
+
+def hours_by_department(records):
+    return [
+        {
+            "department": row["employee__department"],
+            "sessions": row["sessions"],
+            "total_hours": row["total"],
+            "avg_hours": row["average"],
+            **{f"p{p}_hours": row[f"p{p}"] for p in PERCENTILES},
+        }
+        for row in _breakdown(records, DEPARTMENT_GROUP)
+    ]
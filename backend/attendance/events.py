@@ -0,0 +1,197 @@
+"""
+Push feed of check-in/check-out events (Server-Sent Events).
+
+Writers publish events after their transaction commits, and every
+connected stream receives them. A reconnecting client sends
+``Last-Event-ID`` and is replayed what it missed from a bounded buffer,
+without touching the database.
+
+With REDIS_URL set, the hub is a Redis stream (RedisEventHub). Every web
+process and the Celery workers publish into the same stream with XADD,
+and every process's subscribers read it with a blocking XREAD, so a
+dashboard sees events whichever process wrote them. The stream is
+trimmed to about BUFFER_SIZE entries.
+
+Without Redis (development, tests), EventHub keeps the buffer in a ring
+buffer of the current process and fans events out itself.
+
+Event ids have the Redis form "<epoch ms>-<sequence>" in both hubs. They
+keep increasing across restarts, so a client that reconnects after a
+deploy is neither replayed old events nor has new ones suppressed.
+
+The stream view is async. It is served by its own uvicorn service on
+``hrms.asgi`` with hrms.events_urls, because a WSGI worker would be held
+for as long as a dashboard stays open. The REST API stays on gunicorn,
+where streaming responses are sent as they are produced.
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+
+CHECK_IN = "check_in"
+CHECK_OUT = "check_out"
+
+BUFFER_SIZE = getattr(settings, "ATTENDANCE_EVENT_BUFFER", 1000)
+STREAM_KEY = getattr(settings, "ATTENDANCE_EVENT_STREAM", "attendance:events")
+SUBSCRIBER_QUEUE_SIZE = 1000
+HEARTBEAT_SECONDS = 15
+
+_EVENT_ID = re.compile(r"^\d+-\d+$")
+
+
+def clean_id(value):
+    """A client-sent event id, or None if it is not one of ours."""
+    return value if value and _EVENT_ID.match(value) else None
+
+
+def _order(event_id):
+    ms, seq = event_id.split("-")
+    return int(ms), int(seq)
+
+
+class _Subscriber:
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = False
+
+
+class EventHub:
+    """In-process hub, for running without Redis."""
+
+    def __init__(self, buffer_size=BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._buffer = deque(maxlen=buffer_size)
+        self._last_id = (0, 0)
+        self._subscribers = set()
+
+    def _next_id(self):
+        ms = time.time_ns() // 1_000_000
+        last_ms, seq = self._last_id
+        self._last_id = (ms, 0) if ms > last_ms else (last_ms, seq + 1)
+        return "%d-%d" % self._last_id
+
+    def publish(self, kind, data):
+        with self._lock:
+            event = {"id": self._next_id(), "event": kind, "data": data}
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(self._deliver, subscriber, event)
+            except RuntimeError:
+                # Event loop already closed
+                self._unsubscribe(subscriber)
+        return event
+
+    def _unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _deliver(self, subscriber, event):
+        try:
+            subscriber.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow: end its stream, the client reconnects and replays
+            subscriber.dropped = True
+            self._unsubscribe(subscriber)
+
+    async def subscribe(self, last_id=None):
+        """Async iterator of events; replays the buffer after ``last_id``."""
+        subscriber = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscriber)
+            after = _order(last_id) if last_id else None
+            backlog = [e for e in self._buffer if after is not None and _order(e["id"]) > after]
+
+        try:
+            for event in backlog:
+                yield event
+            sent = _order(backlog[-1]["id"]) if backlog else (after or (0, 0))
+
+            while not (subscriber.dropped and subscriber.queue.empty()):
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if _order(event["id"]) > sent:
+                    sent = _order(event["id"])
+                    yield event
+        finally:
+            self._unsubscribe(subscriber)
+
+
+class RedisEventHub:
+    """Hub shared by every process through one Redis stream."""
+
+    def __init__(self, url, key=STREAM_KEY, buffer_size=BUFFER_SIZE):
+        import redis
+
+        self.url = url
+        self.key = key
+        self.buffer_size = buffer_size
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+
+    def publish(self, kind, data):
+        event_id = self._client.xadd(
+            self.key, {"event": kind, "data": json.dumps(data)},
+            maxlen=self.buffer_size, approximate=True,
+        )
+        return {"id": event_id, "event": kind, "data": data}
+
+    async def subscribe(self, last_id=None):
+        """Async iterator of events; replays the stream after ``last_id``."""
+        from redis import asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url, decode_responses=True)
+        try:
+            if last_id is None:
+                latest = await client.xrevrange(self.key, count=1)
+                last_id = latest[0][0] if latest else "0-0"
+
+            while True:
+                reply = await client.xread({self.key: last_id}, count=100, block=HEARTBEAT_SECONDS * 1000)
+                if not reply:
+                    yield None
+                    continue
+                for event_id, fields in reply[0][1]:
+                    last_id = event_id
+                    yield {"id": event_id, "event": fields["event"], "data": json.loads(fields["data"])}
+        finally:
+            await client.aclose()
+
+
+REDIS_URL = getattr(settings, "REDIS_URL", None)
+
+hub = RedisEventHub(REDIS_URL) if REDIS_URL else EventHub()
+
+
+def attendance_event(attendance, employee_name=None):
+    return {
+        "attendance_id": attendance.pk,
+        "employee_id": attendance.employee_id,
+        "employee": employee_name,
+        "date": str(attendance.date),
+        "check_in": attendance.check_in.isoformat() if attendance.check_in else None,
+        "check_out": attendance.check_out.isoformat() if attendance.check_out else None,
+    }
+
+
+def publish_on_commit(kind, data):
+    """Publish once the surrounding transaction (if any) has committed."""
+    # robust: the write has committed, a feed outage must not fail the request
+    transaction.on_commit(lambda: hub.publish(kind, data), robust=True)
+
+
+def format_sse(event):
+    if event is None:
+        return ": keep-alive\n\n"
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
@@ -0,0 +1,68 @@
+"""
+Streaming attendance export.
+
+Rows are read with ``.iterator(chunk_size=...)`` (a server-side cursor on
+PostgreSQL) and encoded one at a time into a StreamingHttpResponse, so
+memory stays constant and the first bytes go out before the query has
+been fully read.
+"""
+import csv
+import json
+
+from .models import Attendance
+
+EXPORT_CHUNK_SIZE = 2000
+
+COLUMNS = ["id", "employee_id", "emp_code", "employee", "department", "date", "check_in", "check_out", "hours"]
+
+
+class _Echo:
+    """File-like object whose write() just returns the encoded line."""
+
+    def write(self, value):
+        return value
+
+
+def export_queryset(start=None, end=None, department=None, employee_id=None):
+    records = Attendance.objects.select_related("employee").only(
+        "id", "date", "check_in", "check_out",
+        "employee__id", "employee__emp_code", "employee__name", "employee__department",
+    )
+    if start:
+        records = records.filter(date__gte=start)
+    if end:
+        records = records.filter(date__lte=end)
+    if department:
+        records = records.filter(employee__department=department)
+    if employee_id:
+        records = records.filter(employee_id=employee_id)
+    return records.order_by("date", "id")
+
+
+def _row(record):
+    hours = None
+    if record.check_in and record.check_out:
+        hours = round((record.check_out - record.check_in).total_seconds() / 3600, 2)
+    return [
+        record.id,
+        record.employee_id,
+        record.employee.emp_code,
+        record.employee.name,
+        record.employee.department,
+        record.date.isoformat(),
+        record.check_in.isoformat() if record.check_in else None,
+        record.check_out.isoformat() if record.check_out else None,
+        hours,
+    ]
+
+
+def stream_csv(records):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for record in records.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield writer.writerow(_row(record))
+
+
+def stream_ndjson(records):
+    for record in records.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield json.dumps(dict(zip(COLUMNS, _row(record)))) + "\n"
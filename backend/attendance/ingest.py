@@ -0,0 +1,265 @@
+"""
+Bulk punch ingestion for biometric devices.
+
+A batch of punches (NDJSON or CSV) is validated, de-duplicated on
+(device_id, punched_at), paired into attendance sessions per employee
+and written with chunked bulk_create/bulk_update inside one transaction.
+
+Pairing: punches of an employee are applied in time order. A punch
+closes the employee's open session when it falls within MAX_SHIFT of
+that session's check-in; otherwise it opens a new session. A missed
+check-out therefore leaves one session open instead of turning every
+later punch of the employee into the wrong half of a pair.
+
+The employees of a batch are locked before anything is read, so
+concurrent batches (or replays of the same batch) for an employee run
+one after the other: the duplicate check, the open-session lookup and
+the writes all see the previous batch committed, and only punches that
+are really new get paired and stored.
+"""
+import csv
+import json
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from employees.models import Employee
+from .models import Attendance, Punch
+from .matrix import invalidate_month
+from .signals import attendance_changed
+from . import events, rollup
+
+CHUNK_SIZE = 1000
+
+# Longest time a punch may close an open session after its check-in
+MAX_SHIFT = timedelta(hours=getattr(settings, "ATTENDANCE_MAX_SHIFT_HOURS", 16))
+
+CHECK_IN = "check_in"
+CHECK_OUT = "check_out"
+DUPLICATE = "duplicate"
+ERROR = "error"
+
+
+class IngestError(ValueError):
+    pass
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def parse_lines(lines, content_type):
+    """Yield raw punch dicts from NDJSON (default) or CSV text lines."""
+    if "csv" in content_type:
+        yield from csv.DictReader(lines)
+        return
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            yield {"_error": "Invalid JSON"}
+
+
+def _clean(raw):
+    """Validate one raw punch. Returns (device_id, employee ref, punched_at)."""
+    if "_error" in raw:
+        raise IngestError(raw["_error"])
+
+    device_id = str(raw.get("device_id") or "").strip()
+    if not device_id:
+        raise IngestError("device_id required")
+
+    punched_at = parse_datetime(str(raw.get("timestamp") or ""))
+    if punched_at is None:
+        raise IngestError("timestamp must be ISO 8601")
+    if timezone.is_naive(punched_at):
+        punched_at = timezone.make_aware(punched_at)
+
+    if raw.get("employee_id"):
+        try:
+            return device_id, ("id", int(raw["employee_id"])), punched_at
+        except (TypeError, ValueError):
+            raise IngestError("employee_id must be an integer")
+    if raw.get("emp_code"):
+        return device_id, ("code", str(raw["emp_code"])), punched_at
+    raise IngestError("employee_id or emp_code required")
+
+
+def _resolve_employees(refs):
+    ids = {value for kind, value in refs if kind == "id"}
+    codes = {value for kind, value in refs if kind == "code"}
+
+    resolved = {}
+    if ids:
+        for chunk in _chunks(ids):
+            resolved.update({("id", pk): pk for pk in Employee.objects.filter(id__in=chunk).values_list("id", flat=True)})
+    if codes:
+        for chunk in _chunks(codes):
+            resolved.update({
+                ("code", code): pk
+                for pk, code in Employee.objects.filter(emp_code__in=chunk).values_list("id", "emp_code")
+            })
+    return resolved
+
+
+def _lock_employees(employee_ids):
+    """Lock the employees' rows, in id order so concurrent batches cannot deadlock."""
+    for chunk in _chunks(sorted(employee_ids)):
+        list(Employee.objects.select_for_update().filter(id__in=chunk).order_by("id").values_list("id", flat=True))
+
+
+def _existing_punches(keys):
+    existing = set()
+    for chunk in _chunks(keys):
+        devices = {device for device, _ in chunk}
+        stamps = {stamp for _, stamp in chunk}
+        existing.update(
+            Punch.objects.filter(device_id__in=devices, punched_at__in=stamps)
+            .values_list("device_id", "punched_at")
+        )
+    return existing
+
+
+def _open_sessions(employee_ids):
+    sessions = {}
+    for chunk in _chunks(employee_ids):
+        # Ascending id: the last one seen per employee is the latest
+        for attendance in Attendance.objects.filter(employee_id__in=chunk, check_out__isnull=True).order_by("id"):
+            sessions[attendance.employee_id] = attendance
+    return sessions
+
+
+def ingest(raw_punches):
+    """
+    Ingest an iterable of raw punch dicts.
+
+    Returns (results, stats): one result dict per input record, in input
+    order, and throughput statistics for the batch.
+    """
+    started = time.perf_counter()
+    results = []
+    candidates = []
+
+    for index, raw in enumerate(raw_punches):
+        try:
+            device_id, ref, punched_at = _clean(raw)
+        except IngestError as exc:
+            results.append({"index": index, "status": ERROR, "error": str(exc)})
+            continue
+        result = {"index": index, "status": None}
+        results.append(result)
+        candidates.append((result, device_id, ref, punched_at))
+
+    employees = _resolve_employees({ref for _, _, ref, _ in candidates})
+
+    valid = []
+    for result, device_id, ref, punched_at in candidates:
+        if ref not in employees:
+            result.update(status=ERROR, error="Employee not found")
+        else:
+            valid.append((result, device_id, employees[ref], punched_at))
+
+    new_sessions = []
+    closed_sessions = []
+    punches = []
+    with transaction.atomic():
+        _lock_employees({employee_id for _, _, employee_id, _ in valid})
+        existing = _existing_punches([(device, stamp) for _, device, _, stamp in valid])
+
+        accepted = []
+        seen = set()
+        for result, device_id, employee_id, punched_at in valid:
+            key = (device_id, punched_at)
+            if key in existing or key in seen:
+                result["status"] = DUPLICATE
+            else:
+                seen.add(key)
+                accepted.append((result, device_id, employee_id, punched_at))
+
+        accepted.sort(key=lambda item: (item[2], item[3]))
+        open_sessions = _open_sessions({employee_id for _, _, employee_id, _ in accepted})
+
+        for result, device_id, employee_id, punched_at in accepted:
+            session = open_sessions.get(employee_id)
+            if (
+                session is not None and session.check_in
+                and session.check_in < punched_at <= session.check_in + MAX_SHIFT
+            ):
+                session.check_out = punched_at
+                if session.pk:
+                    closed_sessions.append(session)
+                open_sessions.pop(employee_id)
+                result["status"] = CHECK_OUT
+            else:
+                session = Attendance(
+                    employee_id=employee_id,
+                    check_in=punched_at,
+                    date=timezone.localtime(punched_at).date(),
+                )
+                new_sessions.append(session)
+                open_sessions[employee_id] = session
+                result["status"] = CHECK_IN
+            punches.append((result, Punch(device_id=device_id, employee_id=employee_id, punched_at=punched_at), session))
+
+        for chunk in _chunks(new_sessions):
+            Attendance.objects.bulk_create(chunk)
+        for chunk in _chunks(closed_sessions):
+            Attendance.objects.bulk_update(chunk, ["check_out"])
+
+        for _, punch, session in punches:
+            punch.attendance_id = session.pk
+        # Deduplicated under the employee locks, so every punch here is new
+        for chunk in _chunks([punch for _, punch, _ in punches]):
+            Punch.objects.bulk_create(chunk)
+
+        # bulk writes skip model signals; let payroll flag its stale rows
+        attendance_changed.send(
+            sender=Attendance,
+            changes={(s.employee_id, s.date) for s in new_sessions + closed_sessions},
+        )
+
+    for result, _, session in punches:
+        result["attendance_id"] = session.pk
+        data = events.attendance_event(session)
+        if result["status"] == CHECK_IN:
+            data["check_out"] = None
+            events.publish_on_commit(events.CHECK_IN, data)
+        else:
+            events.publish_on_commit(events.CHECK_OUT, data)
+
+    days = {session.date for session in new_sessions + closed_sessions}
+    if days:
+        rollup.rebuild_days(days)
+        for day in {day.replace(day=1) for day in days}:
+            invalidate_month(day)
+
+    elapsed = time.perf_counter() - started
+    inserted = len(punches)
+    stats = {
+        "received": len(results),
+        "inserted": inserted,
+        "sessions_opened": len(new_sessions),
+        "sessions_closed": len(closed_sessions) + sum(1 for s in new_sessions if s.check_out),
+        "duplicates": sum(1 for r in results if r["status"] == DUPLICATE),
+        "errors": sum(1 for r in results if r["status"] == ERROR),
+        "seconds": round(elapsed, 4),
+        "inserts_per_sec": round(inserted / elapsed, 1) if elapsed else None,
+    }
+    return results, stats
+
+
+def ingest_stream(stream, content_type):
+    """Ingest punches from a binary request body stream."""
+    lines = (line.decode("utf-8") for line in stream)
+    return ingest(parse_lines(lines, content_type))
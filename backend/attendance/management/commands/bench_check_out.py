@@ -0,0 +1,120 @@
+"""
+Concurrent check-out benchmark.
+
+Runs against a throwaway copy of the schema (the test database of the
+configured backend, created and destroyed by the command), so nothing
+reaches the real attendance rows, rollup or event feed.
+
+Latency depends on the backend. SQLite takes one writer at a time, so
+under 200 concurrent taps the p99 is dominated by the queue on the write
+lock (seconds, not milliseconds). The check-out is two statements on
+PostgreSQL, where --target-p99-ms (default 250) is meant to be met.
+"""
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from employees.models import Employee
+from attendance import events
+from attendance.models import Attendance
+from attendance.views import AttendanceViewSet
+
+BENCH_PREFIX = "BENCH-CO-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent check-outs (plus a duplicate tap per employee) against a "
+        "throwaway database and report latency percentiles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=200)
+        parser.add_argument("--target-p99-ms", type=float, default=250)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as scratch:
+            if connection.vendor == "sqlite":
+                # A file, so every thread shares it; WAL as in production
+                connection.settings_dict["TEST"]["NAME"] = str(Path(scratch) / "bench.sqlite3")
+            real_name = connection.settings_dict["NAME"]
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                if connection.vendor == "sqlite":
+                    with connection.cursor() as cursor:
+                        cursor.execute("PRAGMA journal_mode=WAL")
+                # Feed events stay in this process
+                with patch.object(events, "hub", events.EventHub()):
+                    self.bench(options["concurrency"], options["target_p99_ms"])
+            finally:
+                connection.creation.destroy_test_db(real_name, verbosity=0)
+
+    def bench(self, concurrency, target_p99_ms):
+        employees = self.setup(concurrency)
+        view = AttendanceViewSet.as_view({"post": "check_out"})
+        factory = APIRequestFactory()
+
+        def tap(emp_id):
+            request = factory.post("/api/attendance/check_out/", {"employee_id": emp_id}, format="json")
+            started = time.perf_counter()
+            try:
+                status = view(request).status_code
+            finally:
+                connection.close()
+            return status, (time.perf_counter() - started) * 1000
+
+        # Every employee taps twice at the same time: exactly one must win
+        taps = [emp.id for emp in employees] * 2
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            started = time.perf_counter()
+            results = list(pool.map(tap, taps))
+            wall = time.perf_counter() - started
+
+        latencies = sorted(ms for _, ms in results)
+        ok = sum(1 for status, _ in results if status == 200)
+        still_open = Attendance.objects.filter(employee__in=employees, check_out__isnull=True).count()
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+
+        self.stdout.write(f"backend: {connection.vendor}")
+        self.stdout.write(f"requests: {len(results)} in {wall:.2f}s ({len(results) / wall:.0f} req/s)")
+        self.stdout.write(f"closed: {ok} / {len(employees)} sessions, still open: {still_open}")
+        self.stdout.write(
+            "latency ms: p50 {:.1f}  p95 {:.1f}  p99 {:.1f}  max {:.1f}".format(
+                statistics.median(latencies),
+                latencies[int(len(latencies) * 0.95) - 1],
+                p99,
+                latencies[-1],
+            )
+        )
+        if ok != len(employees) or still_open:
+            self.stderr.write(self.style.ERROR("Sessions were double-closed or left open"))
+        if p99 > target_p99_ms:
+            self.stderr.write(self.style.WARNING(f"p99 {p99:.0f} ms is over the {target_p99_ms:.0f} ms target"))
+
+    def setup(self, count):
+        employees = Employee.objects.bulk_create(
+            Employee(
+                emp_code=f"{BENCH_PREFIX}{n}",
+                name=f"Bench {n}",
+                email=f"bench-co-{n}@example.invalid",
+                department="Bench",
+                role="Bench",
+                salary=Decimal("1000.00"),
+                date_joined=date.today(),
+            )
+            for n in range(count)
+        )
+        Attendance.objects.bulk_create(
+            Attendance(employee=emp, check_in=timezone.now()) for emp in employees
+        )
+        return employees
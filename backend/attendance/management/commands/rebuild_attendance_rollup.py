@@ -0,0 +1,17 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from attendance.rollup import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily attendance rollup from raw Attendance rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="First day (YYYY-MM-DD)")
+        parser.add_argument("--end", type=date.fromisoformat, help="Last day (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        days = rebuild(options["start"], options["end"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt attendance rollup for {days} day(s)"))
@@ -0,0 +1,106 @@
+"""
+Employee x day attendance matrix.
+
+The whole month for a department (or the whole org) is resolved from a
+single Employee LEFT JOIN Attendance query and cached per month. Each
+employee row is encoded as one character per day of the month.
+"""
+from calendar import monthrange
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import FilteredRelation, Q
+
+from employees.models import Employee
+from .utils import month_bounds
+
+PRESENT = "PRESENT"
+LATE = "LATE"
+ABSENT = "ABSENT"
+
+STATUS_CODES = {PRESENT: "P", LATE: "L", ABSENT: "A"}
+
+MATRIX_CACHE_SECONDS = getattr(settings, "ATTENDANCE_MATRIX_CACHE_SECONDS", 300)
+
+
+def day_status(check_in, check_out):
+    """Heatmap status of the first attendance record of a day."""
+    if check_in and not check_out:
+        return LATE if check_in.hour > 10 else PRESENT
+    if check_in and check_out:
+        return PRESENT
+    return ABSENT
+
+
+def _version_key(year, month):
+    return f"attendance:matrix:version:{year}:{month}"
+
+
+def invalidate_month(day):
+    """Drop every cached matrix of the month containing ``day``."""
+    key = _version_key(day.year, day.month)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def build_month_matrix(year, month, department=None):
+    """Build the matrix from one query (no caching)."""
+    start, end = month_bounds(year, month)
+    days_in_month = monthrange(year, month)[1]
+
+    employees = Employee.objects.annotate(
+        month_attendance=FilteredRelation(
+            "attendance",
+            condition=Q(attendance__date__gte=start, attendance__date__lt=end),
+        )
+    )
+    if department:
+        employees = employees.filter(department=department)
+
+    rows = employees.values_list(
+        "id", "emp_code", "name",
+        "month_attendance__date",
+        "month_attendance__check_in",
+        "month_attendance__check_out",
+    ).order_by("id", "month_attendance__date", "month_attendance__id")
+
+    matrix = []
+    current = None
+    for emp_id, emp_code, name, day, check_in, check_out in rows:
+        if current is None or current["id"] != emp_id:
+            current = {"id": emp_id, "emp_code": emp_code, "name": name, "days": ["A"] * days_in_month}
+            seen = set()
+            matrix.append(current)
+
+        # Only the first record of a day decides its status
+        if day is None or day in seen:
+            continue
+        seen.add(day)
+        current["days"][day.day - 1] = STATUS_CODES[day_status(check_in, check_out)]
+
+    for row in matrix:
+        row["days"] = "".join(row["days"])
+
+    return {
+        "year": year,
+        "month": month,
+        "department": department,
+        "days_in_month": days_in_month,
+        "legend": {code: status for status, code in STATUS_CODES.items()},
+        "employees": matrix,
+    }
+
+
+def get_month_matrix(year, month, department=None):
+    """Cached wrapper around build_month_matrix."""
+    version = cache.get(_version_key(year, month), 0)
+    key = f"attendance:matrix:{year}:{month}:{quote(department or '*')}:{version}"
+
+    data = cache.get(key)
+    if data is None:
+        data = build_month_matrix(year, month, department)
+        cache.set(key, data, MATRIX_CACHE_SECONDS)
+    return data
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendancedailysummary'),
+        ('employees', '0002_employee_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['employee', 'date'], name='attendance_employee_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'check_in'], name='attendance_date_checkin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(condition=models.Q(('check_out__isnull', True)), fields=['employee', 'id'], name='attendance_open_session_idx'),
+        ),
+    ]
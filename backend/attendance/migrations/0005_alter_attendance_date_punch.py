@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:51
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_attendance_attendance_employee_date_idx_and_more'),
+        ('employees', '0002_employee_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendance',
+            name='date',
+            field=models.DateField(default=datetime.date.today, editable=False),
+        ),
+        migrations.CreateModel(
+            name='Punch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device_id', models.CharField(max_length=64)),
+                ('punched_at', models.DateTimeField()),
+                ('received_on', models.DateTimeField(auto_now_add=True)),
+                ('attendance', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='punches', to='attendance.attendance')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='punches', to='employees.employee')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('device_id', 'punched_at'), name='punch_unique_device_time')],
+            },
+        ),
+    ]
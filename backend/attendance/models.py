@@ -1,12 +1,25 @@
 from django.db import models
 from employees.models import Employee
-from datetime import timedelta
+from datetime import date, timedelta
 
 class Attendance(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
     check_in = models.DateTimeField(null=True, blank=True)
     check_out = models.DateTimeField(null=True, blank=True)
-    date = models.DateField(auto_now_add=True)
+    # Defaults to today but can be set explicitly (e.g. by punch ingestion)
+    date = models.DateField(default=date.today, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["employee", "date"], name="attendance_employee_date_idx"),
+            models.Index(fields=["date", "check_in"], name="attendance_date_checkin_idx"),
+            # Open sessions only: keeps the check-out lookup tiny
+            models.Index(
+                fields=["employee", "id"],
+                condition=models.Q(check_out__isnull=True),
+                name="attendance_open_session_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.employee.name} | {self.date}"
@@ -15,3 +28,33 @@ class Attendance(models.Model):
         if self.check_in and self.check_out:
             return self.check_out - self.check_in
         return timedelta(0)
+
+
+class AttendanceDailySummary(models.Model):
+    """Per-day counters kept up to date on every check-in/check-out."""
+    date = models.DateField(unique=True)
+    present = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    checked_out = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.date} | present {self.present}"
+
+
+class Punch(models.Model):
+    """Raw punch from a biometric device; idempotent on device + timestamp."""
+    device_id = models.CharField(max_length=64)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="punches")
+    punched_at = models.DateTimeField()
+    attendance = models.ForeignKey(
+        Attendance, null=True, blank=True, on_delete=models.SET_NULL, related_name="punches"
+    )
+    received_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["device_id", "punched_at"], name="punch_unique_device_time"),
+        ]
+
+    def __str__(self):
+        return f"{self.device_id} | {self.employee_id} | {self.punched_at}"
@@ -0,0 +1,107 @@
+"""
+Daily attendance rollup.
+
+AttendanceDailySummary holds, per day, the number of employees present,
+the number whose first check-in was late and the number of closed
+sessions. Check-in/check-out bump the counters with a single UPDATE, so
+the dashboard summaries read one row instead of scanning Attendance.
+"""
+from datetime import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .models import Attendance, AttendanceDailySummary
+
+LATE_AFTER = getattr(settings, "ATTENDANCE_LATE_AFTER", time(9, 30))
+
+COUNTERS = ("present", "late", "checked_out")
+
+
+def is_late(check_in):
+    return check_in is not None and timezone.localtime(check_in).time() > LATE_AFTER
+
+
+def _bump(day, **deltas):
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    if AttendanceDailySummary.objects.filter(date=day).update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            AttendanceDailySummary.objects.create(date=day, **deltas)
+    except IntegrityError:
+        # Another request created the row first
+        AttendanceDailySummary.objects.filter(date=day).update(**changes)
+
+
+def record_check_in(attendance, first_of_day):
+    """Count a new check-in; only the first one of the day adds a head."""
+    if first_of_day:
+        _bump(attendance.date, present=1, late=int(is_late(attendance.check_in)))
+
+
+def record_check_out(attendance):
+    _bump(attendance.date, checked_out=1)
+
+
+def _rebuild(records, summaries):
+    totals = {}
+    per_day = (
+        records.values("date")
+        .annotate(
+            present=Count("employee", distinct=True),
+            checked_out=Count("id", filter=Q(check_out__isnull=False)),
+        )
+        .order_by()
+    )
+    for row in per_day:
+        totals[row["date"]] = {"present": row["present"], "late": 0, "checked_out": row["checked_out"]}
+
+    first_check_ins = (
+        records.values("date", "employee")
+        .annotate(first_in=Min("check_in"))
+        .order_by()
+        .values_list("date", "first_in")
+    )
+    for day, first_in in first_check_ins:
+        if is_late(first_in):
+            totals[day]["late"] += 1
+
+    with transaction.atomic():
+        summaries.delete()
+        AttendanceDailySummary.objects.bulk_create(
+            AttendanceDailySummary(date=day, **counters) for day, counters in totals.items()
+        )
+
+    return len(totals)
+
+
+def rebuild(start=None, end=None):
+    """
+    Recompute the rollup from Attendance for [start, end] (inclusive).
+
+    Used for backfills and after writes that bypass check-in/check-out.
+    Returns the number of days written.
+    """
+    records = Attendance.objects.all()
+    summaries = AttendanceDailySummary.objects.all()
+    if start:
+        records = records.filter(date__gte=start)
+        summaries = summaries.filter(date__gte=start)
+    if end:
+        records = records.filter(date__lte=end)
+        summaries = summaries.filter(date__lte=end)
+    return _rebuild(records, summaries)
+
+
+def rebuild_days(days):
+    """Recompute the rollup for just the given days (e.g. those a batch touched)."""
+    days = list(days)
+    return _rebuild(Attendance.objects.filter(date__in=days), AttendanceDailySummary.objects.filter(date__in=days))
+
+
+def rebuild_day(day):
+    rebuild(day, day)
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent by writers that bypass model signals (bulk_create/bulk_update,
+# queryset updates) with ``changes``: a set of (employee_id, date) pairs
+# whose attendance was inserted, updated or deleted.
+attendance_changed = Signal()
@@ -1,3 +1,339 @@
+import asyncio
+import json
+import time
+from datetime import date
+from decimal import Decimal
+
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import Resolver404, resolve
+
+from employees.models import Employee
+from .models import Attendance, AttendanceDailySummary, Punch
+from .matrix import build_month_matrix
+from .utils import month_bounds
+from . import events, rollup, views
+
+
+def make_employee(n, department="Engineering"):
+    return Employee.objects.create(
+        emp_code=f"E{n:04d}",
+        name=f"Employee {n}",
+        email=f"employee{n}@example.com",
+        department=department,
+        role="Engineer",
+        salary=Decimal("30000.00"),
+        date_joined=date(2024, 1, 1),
+    )
+
+
+def make_attendance(employee, day, **fields):
+    record = Attendance.objects.create(employee=employee, **fields)
+    Attendance.objects.filter(pk=record.pk).update(date=day)
+    return record
+
+
+class AttendanceMatrixTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_matrix_encodes_each_day_in_one_query(self):
+        eng = make_employee(1)
+        make_employee(2)
+        make_employee(3, department="Sales")
+        make_attendance(eng, date(2025, 2, 3), check_in="2025-02-03T09:00:00Z", check_out="2025-02-03T18:00:00Z")
+
+        with self.assertNumQueries(1):
+            data = build_month_matrix(2025, 2, "Engineering")
+
+        self.assertEqual(len(data["employees"]), 2)
+        self.assertEqual(data["employees"][0]["days"], "AAP" + "A" * 25)
+        self.assertEqual(data["employees"][1]["days"], "A" * 28)
+
+    def test_heatmap_uses_single_range_query(self):
+        emp = make_employee(1)
+        make_attendance(emp, date(2025, 1, 2), check_in="2025-01-02T11:30:00Z")
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/attendance/heatmap/{emp.id}/2025/1/")
+
+        self.assertEqual(len(response.data), 31)
+        self.assertEqual(response.data[1]["status"], "LATE")
+
+
+class AttendanceRollupTests(TestCase):
+    def test_check_in_and_out_maintain_daily_counters(self):
+        emp = make_employee(1)
+        other = make_employee(2)
+
+        self.client.post("/api/attendance/check_in/", {"employee_id": emp.id})
+        self.client.post("/api/attendance/check_in/", {"employee_id": emp.id})
+        self.client.post("/api/attendance/check_in/", {"employee_id": other.id})
+        self.client.post("/api/attendance/check_out/", {"employee_id": emp.id})
+
+        summary = AttendanceDailySummary.objects.get(date=date.today())
+        self.assertEqual(summary.present, 2)
+        self.assertEqual(summary.checked_out, 1)
+
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/attendance/summary_today/")
+        self.assertEqual(response.data["present_today"], 2)
+
+    def test_check_out_locks_only_the_session(self):
+        emp = make_employee(1)
+        self.client.post("/api/attendance/check_in/", {"employee_id": emp.id})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post("/api/attendance/check_out/", {"employee_id": emp.id})
+
+        lookup = next(q["sql"] for q in queries if q["sql"].startswith('SELECT "attendance_attendance"'))
+        self.assertNotIn("JOIN", lookup)
+
+    def test_rebuild_matches_incremental_counters(self):
+        emp = make_employee(1)
+        self.client.post("/api/attendance/check_in/", {"employee_id": emp.id})
+        self.client.post("/api/attendance/check_out/", {"employee_id": emp.id})
+        before = AttendanceDailySummary.objects.values("present", "late", "checked_out").get()
+
+        rollup.rebuild()
+
+        self.assertEqual(AttendanceDailySummary.objects.values("present", "late", "checked_out").get(), before)
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are checked on Postgres")
+class AttendanceIndexPlanTests(TestCase):
+    def explain(self, queryset):
+        # Tiny test tables would otherwise always be seq-scanned
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_employee_month_range_uses_employee_date_index(self):
+        start, end = month_bounds(2025, 3)
+        plan = self.explain(Attendance.objects.filter(employee_id=1, date__gte=start, date__lt=end))
+        self.assertIn("attendance_employee_date_idx", plan)
+
+    def test_day_check_in_filter_uses_date_check_in_index(self):
+        plan = self.explain(Attendance.objects.filter(date=date(2025, 3, 3), check_in__gt="2025-03-03T09:30:00Z"))
+        self.assertIn("attendance_date_checkin_idx", plan)
+
+    def test_open_session_lookup_uses_partial_index(self):
+        plan = self.explain(Attendance.objects.filter(employee_id=1, check_out__isnull=True).order_by("-id")[:1])
+        self.assertIn("attendance_open_session_idx", plan)
+
+
+class HoursAnalyticsTests(TestCase):
+    def test_hours_grouped_per_employee_and_department(self):
+        dev = make_employee(1)
+        ops = make_employee(2, department="Ops")
+        make_attendance(dev, date(2025, 5, 5), check_in="2025-05-05T09:00:00Z", check_out="2025-05-05T17:00:00Z")
+        make_attendance(dev, date(2025, 5, 6), check_in="2025-05-06T09:00:00Z", check_out="2025-05-06T13:00:00Z")
+        make_attendance(ops, date(2025, 5, 5), check_in="2025-05-05T08:00:00Z", check_out="2025-05-05T14:00:00Z")
+        # Open session is ignored
+        make_attendance(ops, date(2025, 5, 6), check_in="2025-05-06T08:00:00Z")
+
+        response = self.client.get("/api/attendance/analytics/hours/", {"start": "2025-05-01", "end": "2025-05-31"})
+
+        employees = {row["employee_id"]: row for row in response.data["employees"]}
+        self.assertEqual(employees[dev.id]["sessions"], 2)
+        self.assertEqual(employees[dev.id]["total_hours"], 12)
+        self.assertEqual(employees[dev.id]["avg_hours"], 6)
+        self.assertEqual(employees[dev.id]["p50_hours"], 4)
+        self.assertEqual(employees[dev.id]["p95_hours"], 8)
+
+        departments = {row["department"]: row for row in response.data["departments"]}
+        self.assertEqual(departments["Ops"]["total_hours"], 6)
+        self.assertEqual(departments["Engineering"]["sessions"], 2)
+
+    def test_every_percentile_is_filled_for_one_or_two_sessions(self):
+        one, two = make_employee(1), make_employee(2)
+        make_attendance(one, date(2025, 5, 5), check_in="2025-05-05T09:00:00Z", check_out="2025-05-05T15:00:00Z")
+        make_attendance(two, date(2025, 5, 5), check_in="2025-05-05T09:00:00Z", check_out="2025-05-05T13:00:00Z")
+        make_attendance(two, date(2025, 5, 6), check_in="2025-05-06T09:00:00Z", check_out="2025-05-06T17:00:00Z")
+
+        response = self.client.get("/api/attendance/analytics/hours/", {"start": "2025-05-01", "end": "2025-05-31"})
+
+        employees = {row["employee_id"]: row for row in response.data["employees"]}
+        percentiles = ("p50_hours", "p90_hours", "p95_hours")
+        self.assertEqual([employees[one.id][p] for p in percentiles], [6, 6, 6])
+        self.assertEqual([employees[two.id][p] for p in percentiles], [4, 8, 8])
+
+    def test_one_query_per_breakdown_and_bad_employee_id_is_rejected(self):
+        emp = make_employee(1)
+        make_attendance(emp, date(2025, 5, 5), check_in="2025-05-05T09:00:00Z", check_out="2025-05-05T15:00:00Z")
+
+        with self.assertNumQueries(2):
+            self.client.get("/api/attendance/analytics/hours/", {"start": "2025-05-01", "end": "2025-05-31"})
+        response = self.client.get("/api/attendance/analytics/hours/", {"employee_id": "abc"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_month_summary_sums_hours_in_sql(self):
+        emp = make_employee(1)
+        make_attendance(emp, date(2025, 5, 5), check_in="2025-05-05T09:00:00Z", check_out="2025-05-05T10:30:00Z")
+
+        response = self.client.get("/api/attendance/summary_month/", {"year": 2025, "month": 5})
+
+        self.assertEqual(response.data["total_hours_worked"], 1.5)
+
+
+class PunchIngestionTests(TestCase):
+    def post(self, body, content_type="application/x-ndjson"):
+        return self.client.post("/api/attendance/punches/bulk/", body, content_type=content_type)
+
+    def test_pairs_punches_and_is_idempotent(self):
+        emp = make_employee(1)
+        body = "\n".join([
+            '{"device_id": "gate-1", "employee_id": %d, "timestamp": "2025-06-02T09:00:00Z"}' % emp.id,
+            '{"device_id": "gate-1", "emp_code": "E0001", "timestamp": "2025-06-02T17:00:00Z"}',
+            '{"device_id": "gate-1", "employee_id": 999, "timestamp": "2025-06-02T17:00:00Z"}',
+            'not json',
+        ])
+
+        response = self.post(body)
+
+        statuses = [r["status"] for r in response.data["results"]]
+        self.assertEqual(statuses, ["check_in", "check_out", "error", "error"])
+        session = Attendance.objects.get()
+        self.assertEqual(session.date, date(2025, 6, 2))
+        self.assertIsNotNone(session.check_out)
+        self.assertEqual(Punch.objects.count(), 2)
+
+        replay = self.post(body)
+        self.assertEqual(replay.data["stats"]["duplicates"], 2)
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_csv_closes_existing_open_session(self):
+        emp = make_employee(1)
+        make_attendance(emp, date(2025, 6, 2), check_in="2025-06-02T09:00:00Z")
+
+        response = self.post(
+            "device_id,emp_code,timestamp\ngate-2,E0001,2025-06-02T18:00:00Z\n",
+            content_type="text/csv",
+        )
+
+        self.assertEqual(response.data["results"][0]["status"], "check_out")
+        self.assertEqual(Attendance.objects.filter(check_out__isnull=True).count(), 0)
+        self.assertEqual(AttendanceDailySummary.objects.get(date=date(2025, 6, 2)).checked_out, 1)
+
+    def test_stale_open_session_is_not_closed_by_a_later_day(self):
+        emp = make_employee(1)
+        stale = make_attendance(emp, date(2025, 6, 1), check_in="2025-06-01T09:00:00Z")
+
+        response = self.post(
+            "device_id,emp_code,timestamp\ngate-2,E0001,2025-06-02T09:00:00Z\n",
+            content_type="text/csv",
+        )
+
+        self.assertEqual(response.data["results"][0]["status"], "check_in")
+        stale.refresh_from_db()
+        self.assertIsNone(stale.check_out)
+        self.assertEqual(Attendance.objects.get(date=date(2025, 6, 2)).check_out, None)
+
+
+class AttendanceEventTests(TestCase):
+    def test_check_in_is_pushed_and_replayed_after_reconnect(self):
+        emp = make_employee(1)
+        hub = events.EventHub(buffer_size=3)
+        with patch.object(events, "hub", hub), self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/attendance/check_in/", {"employee_id": emp.id})
+            self.client.post("/api/attendance/check_out/", {"employee_id": emp.id})
+
+        async def first(last_id):
+            stream = hub.subscribe(last_id)
+            try:
+                return await anext(stream)
+            finally:
+                await stream.aclose()
+
+        checked_in = asyncio.run(first("0-0"))
+        self.assertEqual(checked_in["event"], events.CHECK_IN)
+        replayed = asyncio.run(first(checked_in["id"]))
+        self.assertEqual(replayed["event"], events.CHECK_OUT)
+        self.assertEqual(replayed["data"]["employee"], "Employee 1")
+
+    def test_events_service_serves_only_the_stream(self):
+        self.assertIs(resolve("/api/attendance/events/stream/", "hrms.events_urls").func, views.attendance_event_stream)
+        with self.assertRaises(Resolver404):
+            resolve("/api/attendance/export/", "hrms.events_urls")
+
+    def test_event_ids_keep_increasing_across_restarts(self):
+        before = events.EventHub().publish(events.CHECK_IN, {})
+        time.sleep(0.002)  # a restart takes longer than a millisecond
+        after = events.EventHub().publish(events.CHECK_IN, {})
+
+        self.assertGreater(events._order(after["id"]), events._order(before["id"]))
+        self.assertIsNone(events.clean_id("42"))
+
+    def test_realtime_feed_loads_employees_in_one_query(self):
+        for n in range(3):
+            make_attendance(make_employee(n), date.today(), check_in="2025-06-02T09:00:00Z")
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/attendance/tools/realtime/")
+        self.assertEqual(len(response.data), 3)
+
+
+class CheckInTests(TestCase):
+    def test_only_the_first_check_in_of_the_day_counts_as_present(self):
+        emp = make_employee(1)
+        for _ in range(2):
+            response = self.client.post("/api/attendance/check_in/", {"employee_id": emp.id})
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(AttendanceDailySummary.objects.get(date=date.today()).present, 1)
+        self.assertEqual(self.client.post("/api/attendance/check_in/", {"employee_id": 999}).status_code, 404)
+
+
+class CheckOutTests(TestCase):
+    def test_second_tap_does_not_close_another_session(self):
+        emp = make_employee(1)
+        make_attendance(emp, date.today(), check_in="2025-06-02T08:00:00Z", check_out="2025-06-02T12:00:00Z")
+        self.client.post("/api/attendance/check_in/", {"employee_id": emp.id})
+
+        first = self.client.post("/api/attendance/check_out/", {"employee_id": emp.id})
+        second = self.client.post("/api/attendance/check_out/", {"employee_id": emp.id})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(set(first.data["data"]), {"id", "employee", "date", "check_in", "check_out"})
+        self.assertEqual(second.status_code, 400)
+        self.assertEqual(AttendanceDailySummary.objects.get(date=date.today()).checked_out, 1)
+
+    def test_unknown_employee(self):
+        response = self.client.post("/api/attendance/check_out/", {"employee_id": 999})
+        self.assertEqual(response.status_code, 404)
+
+
+class AttendanceExportTests(TestCase):
+    def test_streams_filtered_rows(self):
+        dev = make_employee(1)
+        ops = make_employee(2, department="Ops")
+        make_attendance(dev, date(2025, 7, 1), check_in="2025-07-01T09:00:00Z", check_out="2025-07-01T17:30:00Z")
+        make_attendance(ops, date(2025, 7, 1), check_in="2025-07-01T09:00:00Z")
+        make_attendance(dev, date(2025, 8, 1), check_in="2025-08-01T09:00:00Z")
+
+        response = self.client.get("/api/attendance/export/", {"start": "2025-07-01", "end": "2025-07-31", "department": "Engineering"})
+
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["id", "employee_id", "emp_code"])
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].endswith(",8.5"))
+
+    def test_ndjson(self):
+        make_attendance(make_employee(1), date(2025, 7, 1), check_in="2025-07-01T09:00:00Z")
+
+        response = self.client.get("/api/attendance/export/", {"output": "ndjson"})
+
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(rows[0]["emp_code"], "E0001")
+        self.assertIsNone(rows[0]["hours"])
+
+    def test_non_numeric_employee_id_is_rejected(self):
+        response = self.client.get("/api/attendance/export/", {"employee_id": "abc"})
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 400)
@@ -3,12 +3,20 @@ from .views import (
     attendance_summary_today,
     attendance_summary_month,
     attendance_heatmap,
-    realtime_checkins
+    attendance_matrix,
+    attendance_hours,
+    ingest_punches,
+    realtime_checkins,
+    attendance_event_stream,
 )
 
 urlpatterns = [
     path("summary_today/", attendance_summary_today),
     path("summary_month/", attendance_summary_month),
     path("heatmap/<int:emp_id>/<int:year>/<int:month>/", attendance_heatmap),
+    path("matrix/<int:year>/<int:month>/", attendance_matrix),
+    path("punches/bulk/", ingest_punches),
+    path("analytics/hours/", attendance_hours),
     path("tools/realtime/", realtime_checkins),
+    path("events/stream/", attendance_event_stream),
 ]
@@ -0,0 +1,13 @@
+from datetime import date
+
+
+def month_bounds(year, month):
+    """
+    Return the half-open date range [start, end) covering a month.
+
+    Filtering with ``date__gte=start, date__lt=end`` keeps the lookup
+    sargable, unlike ``date__year``/``date__month`` which compile to EXTRACT.
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
@@ -1,13 +1,21 @@
 from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
 from rest_framework import viewsets
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.db import transaction
+from django.db.models import Sum
 from datetime import date, timedelta
-from calendar import monthrange
 
-from .models import Attendance
+from .models import Attendance, AttendanceDailySummary
 from .serializers import AttendanceSerializer
+from .matrix import ABSENT, day_status, get_month_matrix, invalidate_month
+from .signals import attendance_changed
+from .utils import month_bounds
+from . import analytics, events, ingest, rollup
+from .export import export_queryset, stream_csv, stream_ndjson
 from employees.models import Employee
+from hrms.pagination import IdCursorPagination
 
 
 # -----------------------------
@@ -16,21 +24,54 @@ from employees.models import Employee
 class AttendanceViewSet(viewsets.ModelViewSet):
     queryset = Attendance.objects.all().order_by("-id")
     serializer_class = AttendanceSerializer
+    pagination_class = IdCursorPagination
+
+    # Generic CRUD writes bypass the incremental counters, so the
+    # affected day is recomputed from raw rows instead.
+    def perform_create(self, serializer):
+        attendance = serializer.save()
+        rollup.rebuild_day(attendance.date)
+        invalidate_month(attendance.date)
+
+    def perform_update(self, serializer):
+        old_employee_id, old_date = serializer.instance.employee_id, serializer.instance.date
+        attendance = serializer.save()
+        if attendance.employee_id != old_employee_id:
+            attendance_changed.send(sender=Attendance, changes={(old_employee_id, old_date)})
+        for day in {old_date, attendance.date}:
+            rollup.rebuild_day(day)
+            invalidate_month(day)
+
+    def perform_destroy(self, instance):
+        day = instance.date
+        instance.delete()
+        rollup.rebuild_day(day)
+        invalidate_month(day)
 
     # ---------- CHECK-IN ----------
     @action(methods=["post"], detail=False)
     def check_in(self, request):
         emp_id = request.data.get("employee_id")
 
-        try:
-            employee = Employee.objects.get(id=emp_id)
-        except Employee.DoesNotExist:
-            return Response({"error": "Employee not found"}, status=404)
-
-        attendance = Attendance.objects.create(
-            employee=employee,
-            check_in=timezone.now(),
-        )
+        with transaction.atomic():
+            # Locking the employee serialises their check-ins, so exactly
+            # one of two concurrent first taps of the day counts as present
+            try:
+                employee = Employee.objects.select_for_update().get(id=emp_id)
+            except (Employee.DoesNotExist, ValueError):
+                return Response({"error": "Employee not found"}, status=404)
+
+            today = date.today()
+            first_of_day = not Attendance.objects.filter(employee=employee, date=today).exists()
+            attendance = Attendance.objects.create(
+                employee=employee,
+                check_in=timezone.now(),
+                date=today,
+            )
+            rollup.record_check_in(attendance, first_of_day)
+
+        invalidate_month(attendance.date)
+        events.publish_on_commit(events.CHECK_IN, events.attendance_event(attendance, employee.name))
 
         return Response({
             "message": "Check-in successful",
@@ -40,42 +81,98 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     # ---------- CHECK-OUT ----------
     @action(methods=["post"], detail=False)
     def check_out(self, request):
-        emp_id = request.data.get("employee_id")
-
         try:
-            employee = Employee.objects.get(id=emp_id)
-        except Employee.DoesNotExist:
+            emp_id = int(request.data.get("employee_id"))
+        except (TypeError, ValueError):
             return Response({"error": "Employee not found"}, status=404)
 
-        attendance = Attendance.objects.filter(
-            employee=employee,
-            check_out__isnull=True
-        ).last()
-
-        if not attendance:
-            return Response({"error": "No active check-in found"}, status=400)
-
-        attendance.check_out = timezone.now()
-        attendance.save()
+        now = timezone.now()
+        with transaction.atomic():
+            # Lock the latest open session (partial index lookup), then
+            # close it with a conditional UPDATE so a concurrent tap that
+            # got here first makes this one a no-op. No join: the
+            # employee row stays unlocked.
+            session = (
+                Attendance.objects.select_for_update()
+                .filter(employee_id=emp_id, check_out__isnull=True)
+                .order_by("-id")
+                .values("id", "date", "check_in")
+                .first()
+            )
+            closed = session is not None and Attendance.objects.filter(
+                pk=session["id"], check_out__isnull=True
+            ).update(check_out=now)
+
+            if not closed:
+                if not Employee.objects.filter(id=emp_id).exists():
+                    return Response({"error": "Employee not found"}, status=404)
+                return Response({"error": "No active check-in found"}, status=400)
+
+            attendance = Attendance(
+                id=session["id"],
+                employee_id=emp_id,
+                date=session["date"],
+                check_in=session["check_in"],
+                check_out=now,
+            )
+            rollup.record_check_out(attendance)
+
+        invalidate_month(attendance.date)
+        name = Employee.objects.filter(id=emp_id).values_list("name", flat=True).first()
+        events.publish_on_commit(events.CHECK_OUT, events.attendance_event(attendance, name))
 
         return Response({
             "message": "Check-out successful",
-            "data": AttendanceSerializer(attendance).data
+            "data": {
+                "id": attendance.id,
+                "employee": emp_id,
+                "date": attendance.date,
+                "check_in": attendance.check_in,
+                "check_out": attendance.check_out,
+            }
         })
 
+    # ---------- STREAMING EXPORT ----------
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        # "format" is taken by DRF's renderer negotiation
+        output = request.GET.get("output", "csv")
+        if output not in ("csv", "ndjson"):
+            return Response({"error": "output must be csv or ndjson"}, status=400)
+
+        try:
+            start = date.fromisoformat(request.GET["start"]) if request.GET.get("start") else None
+            end = date.fromisoformat(request.GET["end"]) if request.GET.get("end") else None
+        except ValueError:
+            return Response({"error": "start/end must be YYYY-MM-DD"}, status=400)
+        try:
+            employee_id = int(request.GET["employee_id"]) if request.GET.get("employee_id") else None
+        except ValueError:
+            return Response({"error": "employee_id must be a number"}, status=400)
+
+        records = export_queryset(
+            start, end,
+            department=request.GET.get("department") or None,
+            employee_id=employee_id,
+        )
+
+        if output == "csv":
+            response = StreamingHttpResponse(stream_csv(records), content_type="text/csv")
+        else:
+            response = StreamingHttpResponse(stream_ndjson(records), content_type="application/x-ndjson")
+        response["Content-Disposition"] = f'attachment; filename="attendance.{output}"'
+        return response
+
     # ---------- TODAY SUMMARY ----------
     @action(detail=False, methods=["get"])
     def summary_today(self, request):
         today = date.today()
         total_employees = Employee.objects.count()
 
-        present = Attendance.objects.filter(date=today).values("employee").distinct().count()
+        summary = AttendanceDailySummary.objects.filter(date=today).first()
+        present = summary.present if summary else 0
         absent = total_employees - present
-
-        late = Attendance.objects.filter(
-            date=today,
-            check_in__gt=timezone.datetime(today.year, today.month, today.day, 9, 30)
-        ).count()
+        late = summary.late if summary else 0
 
         return Response({
             "date": str(today),
@@ -96,15 +193,11 @@ class AttendanceViewSet(viewsets.ModelViewSet):
 
         records = Attendance.objects.filter(date__gte=start, date__lt=end)
 
-        present_days = records.values("date").distinct().count()
+        present_days = AttendanceDailySummary.objects.filter(
+            date__gte=start, date__lt=end, present__gt=0
+        ).count()
 
-        total_hours = sum(
-            [
-                (rec.check_out - rec.check_in).total_seconds() / 3600
-                for rec in records if rec.check_out
-            ],
-            0
-        )
+        total_hours = analytics.total_hours(records)
 
         return Response({
             "year": year,
@@ -122,7 +215,11 @@ def attendance_summary_today(request):
     today = timezone.localdate()
     total_employees = Employee.objects.count()
 
-    present = Attendance.objects.filter(date=today).count()
+    present = (
+        AttendanceDailySummary.objects.filter(date=today)
+        .values_list("present", flat=True)
+        .first()
+    ) or 0
     absent = total_employees - present
 
     return Response({
@@ -142,10 +239,10 @@ def attendance_summary_month(request):
     year = today.year
     month = today.month
 
-    present_days = Attendance.objects.filter(
-        date__year=year,
-        date__month=month
-    ).count()
+    start, end = month_bounds(year, month)
+    present_days = AttendanceDailySummary.objects.filter(
+        date__gte=start, date__lt=end
+    ).aggregate(total=Sum("present"))["total"] or 0
 
     working_days = 22   # optional, can compute dynamically later
 
@@ -167,30 +264,80 @@ def attendance_heatmap(request, emp_id, year, month):
     except Employee.DoesNotExist:
         return Response({"error": "Employee not found"}, status=404)
 
-    days_in_month = monthrange(year, month)[1]
-    heatmap = []
+    start, end = month_bounds(year, month)
+    records = (
+        Attendance.objects.filter(employee=employee, date__gte=start, date__lt=end)
+        .order_by("date", "id")
+        .values_list("date", "check_in", "check_out")
+    )
+
+    # First record of each day wins
+    by_day = {}
+    for day, check_in, check_out in records:
+        by_day.setdefault(day, day_status(check_in, check_out))
+
+    heatmap = [
+        {"date": current_date, "status": by_day.get(current_date, ABSENT)}
+        for current_date in (start + timedelta(days=n) for n in range((end - start).days))
+    ]
 
-    for day in range(1, days_in_month + 1):
-        current_date = date(year, month, day)
+    return Response(heatmap)
 
-        record = Attendance.objects.filter(employee=employee, date=current_date).first()
 
-        if record:
-            if record.check_in and not record.check_out:
-                status_code = "LATE" if record.check_in.hour > 10 else "PRESENT"
-            elif record.check_in and record.check_out:
-                status_code = "PRESENT"
-            else:
-                status_code = "ABSENT"
-        else:
-            status_code = "ABSENT"
+# -----------------------------
+#   BULK PUNCH INGESTION (biometric devices)
+# -----------------------------
+@api_view(["POST"])
+def ingest_punches(request):
+    """Accepts NDJSON (one punch per line) or CSV with a header row."""
+    if request.stream is None:
+        return Response({"error": "Empty body"}, status=400)
 
-        heatmap.append({
-            "date": current_date,
-            "status": status_code
-        })
+    results, stats = ingest.ingest_stream(request.stream, request.content_type or "")
 
-    return Response(heatmap)
+    return Response({"stats": stats, "results": results})
+
+
+# -----------------------------
+#   HOURS WORKED ANALYTICS
+# -----------------------------
+@api_view(["GET"])
+def attendance_hours(request):
+    today = timezone.localdate()
+    try:
+        start = date.fromisoformat(request.GET.get("start", str(today.replace(day=1))))
+        end = date.fromisoformat(request.GET.get("end", str(today)))
+    except ValueError:
+        return Response({"error": "start/end must be YYYY-MM-DD"}, status=400)
+    try:
+        employee_id = int(request.GET["employee_id"]) if request.GET.get("employee_id") else None
+    except ValueError:
+        return Response({"error": "employee_id must be a number"}, status=400)
+
+    records = analytics.closed_sessions(
+        start, end,
+        department=request.GET.get("department") or None,
+        employee_id=employee_id,
+    )
+
+    return Response({
+        "start": start,
+        "end": end,
+        "employees": analytics.hours_by_employee(records),
+        "departments": analytics.hours_by_department(records),
+    })
+
+
+# -----------------------------
+#   ORG / DEPARTMENT MONTH MATRIX
+# -----------------------------
+@api_view(["GET"])
+def attendance_matrix(request, year, month):
+    if not 1 <= month <= 12:
+        return Response({"error": "Invalid month"}, status=400)
+
+    department = request.GET.get("department") or None
+    return Response(get_month_matrix(year, month, department))
 
 
 # -----------------------------
@@ -198,7 +345,7 @@ def attendance_heatmap(request, emp_id, year, month):
 # -----------------------------
 @api_view(["GET"])
 def realtime_checkins(request):
-    latest = Attendance.objects.order_by("-check_in")[:10]
+    latest = Attendance.objects.select_related("employee").order_by("-check_in")[:10]
 
     data = [
         {
@@ -210,3 +357,20 @@ def realtime_checkins(request):
     ]
 
     return Response(data)
+
+
+# -----------------------------
+#   REAL-TIME PUSH FEED (SSE, served by the uvicorn events service)
+# -----------------------------
+async def attendance_event_stream(request):
+    last_id = events.clean_id(request.headers.get("Last-Event-ID") or request.GET.get("last_event_id"))
+
+    async def stream():
+        yield "retry: 3000\n\n"
+        async for event in events.hub.subscribe(last_id):
+            yield events.format_sse(event)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,96 @@
+import random
+import statistics
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from employees.models import Employee
+from employees.search import get_index, invalidate
+from employees.views import EmployeeViewSet
+
+BENCH_PREFIX = "BENCH-SR-"
+
+FIRST_NAMES = ["Aarav", "Priya", "Arun", "Deepa", "Karthik", "Lakshmi", "Rahul", "Sneha", "Vijay", "Anitha",
+               "Suresh", "Kavya", "Manoj", "Divya", "Ganesh", "Meena", "Ravi", "Pooja", "Sanjay", "Nisha"]
+LAST_NAMES = ["Raman", "Prakash", "Kumar", "Iyer", "Saravanan", "Nair", "Reddy", "Sharma", "Pillai", "Menon",
+              "Krishnan", "Rao", "Gupta", "Subramanian", "Joseph", "Das", "Bose", "Varma", "Shetty", "Naidu"]
+DEPARTMENTS = ["Engineering", "Finance", "Human Resources", "Sales", "Marketing", "Operations", "Support", "Legal"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Search a synthetic employee directory through the search endpoint and "
+        "report latency percentiles. Creates and removes its own employees."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        self.setup(options["employees"], rng)
+        view = EmployeeViewSet.as_view({"get": "search"})
+        factory = APIRequestFactory()
+
+        try:
+            started = time.perf_counter()
+            get_index()
+            self.stdout.write(f"index build: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+            latencies = []
+            for query in self.queries(options["queries"], rng):
+                request = factory.get("/api/employees/search/", {"q": query})
+                started = time.perf_counter()
+                response = view(request)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200
+
+            latencies.sort()
+            self.stdout.write(
+                "{} queries, latency ms: p50 {:.2f}  p95 {:.2f}  p99 {:.2f}  max {:.2f}".format(
+                    len(latencies),
+                    statistics.median(latencies),
+                    latencies[int(len(latencies) * 0.95) - 1],
+                    latencies[int(len(latencies) * 0.99) - 1],
+                    latencies[-1],
+                )
+            )
+        finally:
+            Employee.objects.filter(emp_code__startswith=BENCH_PREFIX).delete()
+
+    def queries(self, count, rng):
+        """Autocomplete-style prefixes of names, codes and departments, plus substrings and misses."""
+        kinds = [
+            lambda: rng.choice(FIRST_NAMES)[:rng.randint(1, 6)],
+            lambda: rng.choice(LAST_NAMES)[:rng.randint(2, 6)],
+            lambda: f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)[:2]}",
+            lambda: f"{BENCH_PREFIX}{rng.randrange(100_000)}"[:rng.randint(10, 14)],
+            lambda: rng.choice(DEPARTMENTS)[:rng.randint(2, 5)],
+            lambda: rng.choice(LAST_NAMES)[2:5],
+            lambda: "zzqx",
+        ]
+        return [rng.choice(kinds)() for _ in range(count)]
+
+    def setup(self, count, rng):
+        Employee.objects.filter(emp_code__startswith=BENCH_PREFIX).delete()
+        Employee.objects.bulk_create(
+            (
+                Employee(
+                    emp_code=f"{BENCH_PREFIX}{n}",
+                    name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    email=f"bench-sr-{n}@example.invalid",
+                    department=rng.choice(DEPARTMENTS),
+                    role="Bench",
+                    salary=Decimal("1000.00"),
+                    date_joined=date.today(),
+                )
+                for n in range(count)
+            ),
+            batch_size=5000,
+        )
+        # bulk_create sends no signals
+        invalidate()
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Column -> index; the expression matches what Django emits for
+# icontains/istartswith on Postgres: UPPER("column"::text) LIKE UPPER(%s)
+TRIGRAM_INDEXES = {
+    "name": "employee_name_trgm_idx",
+    "emp_code": "employee_code_trgm_idx",
+    "email": "employee_email_trgm_idx",
+    "department": "employee_department_trgm_idx",
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Other backends search through the in-process index (employees.search)
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column, name in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON employees_employee '
+            f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in TRIGRAM_INDEXES.values():
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_employee_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,204 @@
+"""
+Employee directory search.
+
+A query matches name, emp_code, email and department. Results are ranked:
+
+    0  emp_code equals the query
+    1  emp_code starts with it
+    2  name starts with it, or has it right after a space
+    3  email starts with it
+    4  department starts with it, or has it right after a space
+    5  the query occurs anywhere in one of the four fields
+
+Both backends apply ranks 2 and 4 the same way, so "ann smith" ranks
+"Mary Ann Smith" as a name match on either. Ties are broken by name on
+Postgres and by the matching key on other backends; the best `limit`
+rows are returned.
+
+On Postgres the search is one query. It ORs icontains over the four
+fields, which Postgres answers from the pg_trgm GIN indexes created by
+migration 0003. Ranking is a CASE over the matching rows only. Queries
+of fewer than three characters have no trigram to look up and fall back
+to a scan.
+
+Other backends, such as the SQLite used here, cannot index substring
+matches, so the search runs in process against a SearchIndex:
+- One sorted key list per rank is searched with bisect. A prefix lookup
+  costs O(log n + limit). Names and departments are keyed from their
+  start and from after every space, the keys Postgres's istartswith and
+  icontains(" " + query) match.
+- If the prefix ranks leave room, the substring rank is filled with
+  str.find over one lowercased haystack of every employee.
+
+The index is built on first use, per process. Saving or deleting an
+Employee bumps a version token in the cache, and an index whose version
+differs is rebuilt. With REDIS_URL set the cache is shared, so the bump
+reaches every process. Without it, each process has its own LocMem
+cache: only the process that made the change sees the bump, and the
+others catch up when their index expires after EMPLOYEE_SEARCH_INDEX_TTL
+seconds. Either way only ids come from the index: the rows themselves
+are read fresh with one pk lookup, so a stale index can miss or misrank
+an employee but never returns outdated fields.
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import Employee
+
+SEARCH_INDEX_TTL = getattr(settings, "EMPLOYEE_SEARCH_INDEX_TTL", 300)
+
+RESULT_FIELDS = ("id", "emp_code", "name", "email", "department", "role", "status")
+MATCHES = ("emp_code", "emp_code", "name", "email", "department", "substring")
+
+_VERSION_KEY = "employees:search:version"
+
+
+def invalidate():
+    """Have search indexes rebuilt on next use; other processes only see it through a shared cache."""
+    cache.set(_VERSION_KEY, time.time_ns(), None)
+
+
+def _word_suffixes(text):
+    """The text from its start and from after every space, lowercased."""
+    text = text.lower()
+    return [text, *(text[i + 1:] for i, char in enumerate(text) if char == " ")]
+
+
+class SearchIndex:
+    """Sorted prefix keys per rank plus a substring haystack, for one snapshot of Employee."""
+
+    def __init__(self, rows):
+        self.codes = {}
+        entries = {1: [], 2: [], 3: [], 4: []}
+        lines = []
+        self.ids = []
+        for emp_id, emp_code, name, email, department in rows:
+            self.codes.setdefault(emp_code.lower(), emp_id)
+            entries[1].append((emp_code.lower(), emp_id))
+            entries[2].extend((word, emp_id) for word in _word_suffixes(name))
+            entries[3].append((email.lower(), emp_id))
+            entries[4].extend((word, emp_id) for word in _word_suffixes(department))
+            lines.append(f"{emp_code}\t{name}\t{email}\t{department}".lower())
+            self.ids.append(emp_id)
+
+        self.keys = {}
+        self.key_ids = {}
+        for rank, pairs in entries.items():
+            pairs.sort()
+            self.keys[rank] = [key for key, _ in pairs]
+            self.key_ids[rank] = [emp_id for _, emp_id in pairs]
+
+        self.haystack = "\n".join(lines)
+        self.starts = []
+        offset = 0
+        for line in lines:
+            self.starts.append(offset)
+            offset += len(line) + 1
+
+    def _prefixed(self, rank, query):
+        keys = self.keys[rank]
+        i = bisect_left(keys, query)
+        while i < len(keys) and keys[i].startswith(query):
+            yield self.key_ids[rank][i]
+            i += 1
+
+    def _containing(self, query):
+        position = self.haystack.find(query)
+        while position != -1:
+            row = bisect_right(self.starts, position) - 1
+            yield self.ids[row]
+            following = row + 1
+            if following == len(self.starts):
+                return
+            position = self.haystack.find(query, self.starts[following])
+
+    def search(self, query, limit):
+        """[(employee_id, rank)] best first."""
+        query = query.lower()
+        found = {}
+        if query in self.codes:
+            found[self.codes[query]] = 0
+
+        candidates = [(rank, self._prefixed(rank, query)) for rank in (1, 2, 3, 4)]
+        candidates.append((5, self._containing(query)))
+        for rank, ids in candidates:
+            for emp_id in ids:
+                if len(found) >= limit:
+                    return list(found.items())
+                found.setdefault(emp_id, rank)
+        return list(found.items())
+
+
+_index = None
+_index_version = None
+_index_built_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """The process-wide SearchIndex, rebuilt when stale."""
+    global _index, _index_version, _index_built_at
+
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        invalidate()
+        version = cache.get(_VERSION_KEY)
+
+    with _index_lock:
+        fresh = time.monotonic() - _index_built_at < SEARCH_INDEX_TTL
+        if _index is None or _index_version != version or not fresh:
+            rows = Employee.objects.order_by("id").values_list("id", "emp_code", "name", "email", "department")
+            _index = SearchIndex(rows.iterator(chunk_size=5000))
+            _index_version = version
+            _index_built_at = time.monotonic()
+        return _index
+
+
+def _search_postgres(query, limit):
+    rank = Case(
+        When(emp_code__iexact=query, then=Value(0)),
+        When(emp_code__istartswith=query, then=Value(1)),
+        When(Q(name__istartswith=query) | Q(name__icontains=f" {query}"), then=Value(2)),
+        When(email__istartswith=query, then=Value(3)),
+        When(Q(department__istartswith=query) | Q(department__icontains=f" {query}"), then=Value(4)),
+        default=Value(5),
+        output_field=IntegerField(),
+    )
+    rows = (
+        Employee.objects.filter(
+            Q(name__icontains=query) | Q(emp_code__icontains=query)
+            | Q(email__icontains=query) | Q(department__icontains=query)
+        )
+        .annotate(rank=rank)
+        .order_by("rank", "name", "id")
+        .values(*RESULT_FIELDS, "rank")[:limit]
+    )
+    return list(rows)
+
+
+def search(query, limit=10):
+    """Ranked matches for ``query`` as dicts of RESULT_FIELDS plus rank and match."""
+    query = " ".join(query.split())
+    if not query:
+        return []
+
+    if connection.vendor == "postgresql":
+        results = _search_postgres(query, limit)
+    else:
+        ranked = get_index().search(query, limit)
+        rows = Employee.objects.only(*RESULT_FIELDS).in_bulk([emp_id for emp_id, _ in ranked])
+        results = [
+            {**{field: getattr(rows[emp_id], field) for field in RESULT_FIELDS}, "rank": rank}
+            for emp_id, rank in ranked
+            if emp_id in rows
+        ]
+
+    for result in results:
+        result["match"] = MATCHES[result["rank"]]
+    return results
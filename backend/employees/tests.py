@@ -1,3 +1,87 @@
+from datetime import date
+from decimal import Decimal
+
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Employee
+
+
+def make_employee(n, name=None, department="Engineering"):
+    return Employee.objects.create(
+        emp_code=f"E{n:04d}",
+        name=name or f"Employee {n}",
+        email=f"employee{n}@example.com",
+        department=department,
+        role="Engineer",
+        salary=Decimal("30000.00"),
+        date_joined=date(2024, 1, 1),
+    )
+
+
+class EmployeeListTests(TestCase):
+    def test_list_pages_by_descending_id(self):
+        for n in range(3):
+            make_employee(n)
+
+        response = self.client.get("/api/employees/", {"page_size": 2})
+
+        self.assertEqual([e["emp_code"] for e in response.data["results"]], ["E0002", "E0001"])
+        self.assertIsNotNone(response.data["next"])
+
+
+class EmployeeSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_employee(1, name="Priya Raman", department="Finance")
+        make_employee(2, name="Arun Prakash")
+        make_employee(3, name="Ramesh Kumar", department="Human Resources")
+        make_employee(12, name="Deepa Iyer")
+
+    def search(self, q, **params):
+        response = self.client.get("/api/employees/search/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(r["emp_code"], r["match"]) for r in response.json()["results"]]
+
+    def test_results_are_ranked_prefix_before_substring(self):
+        self.assertEqual(self.search("E0001"), [("E0001", "emp_code")])
+        self.assertEqual([code for code, _ in self.search("e000")], ["E0001", "E0002", "E0003"])
+        # A prefix of any word of the name beats a substring ("Arun Prakash")
+        self.assertEqual(self.search("ra"), [("E0001", "name"), ("E0003", "name"), ("E0002", "substring")])
+        self.assertEqual(self.search("resources"), [("E0003", "department")])
+        self.assertEqual(self.search("employee2@"), [("E0002", "email")])
+        self.assertEqual(self.search("eng", limit=1), [("E0002", "department")])
+        self.assertEqual(self.search("  "), [])
+
+    def test_multi_word_query_matches_from_any_word_of_the_name(self):
+        make_employee(20, name="Ann Smith")
+        make_employee(21, name="Mary Ann Smith")
+        make_employee(22, name="Joann Smith")
+
+        self.assertEqual(
+            self.search("ann smith"),
+            [("E0020", "name"), ("E0021", "name"), ("E0022", "substring")],
+        )
+        self.assertEqual(self.search("human res"), [("E0003", "department")])
+
+    def test_index_follows_employee_changes(self):
+        self.assertEqual(self.search("deepa"), [("E0012", "name")])
+
+        Employee.objects.filter(emp_code="E0012").get().delete()
+        renamed = Employee.objects.get(emp_code="E0002")
+        renamed.name = "Deepak Nair"
+        renamed.save()
+
+        self.assertEqual(self.search("deepa"), [("E0002", "name")])
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are checked on Postgres")
+class EmployeeSearchPlanTests(TestCase):
+    def test_substring_search_uses_trigram_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = Employee.objects.filter(name__icontains="raman").explain()
+        self.assertIn("employee_name_trgm_idx", plan)
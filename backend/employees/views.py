@@ -1,11 +1,32 @@
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from .models import Employee
 from .serializers import EmployeeSerializer
+from .search import search
+from hrms.pagination import IdCursorPagination
+
+SEARCH_MAX_LIMIT = 50
+
 
 class EmployeeViewSet(viewsets.ModelViewSet):
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
+    pagination_class = IdCursorPagination
 
     def update(self, request, *args, **kwargs):
         kwargs['partial'] = True   # allow updating only changed fields
         return super().update(request, *args, **kwargs)
+
+    # DIRECTORY SEARCH / AUTOCOMPLETE
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """Ranked matches over name, emp_code, email and department: ?q=&limit= (default 10)."""
+        query = request.GET.get("q", "")
+        try:
+            limit = min(max(int(request.GET.get("limit", 10)), 1), SEARCH_MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "limit must be a number"}, status=400)
+
+        results = search(query, limit)
+        return Response({"query": query, "count": len(results), "results": results})
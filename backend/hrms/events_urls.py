@@ -0,0 +1,15 @@
+"""
+URLconf of the event-feed service.
+
+The REST API runs under gunicorn (hrms.wsgi). The SSE stream holds its
+connection open, so it runs in a separate uvicorn service (hrms.asgi)
+with DJANGO_ROOT_URLCONF=hrms.events_urls, which serves only the stream.
+The path is the same as in hrms.urls, so a proxy can route it by path.
+"""
+from django.urls import path
+
+from attendance.views import attendance_event_stream
+
+urlpatterns = [
+    path("api/attendance/events/stream/", attendance_event_stream),
+]
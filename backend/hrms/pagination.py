@@ -0,0 +1,18 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key: each page is a
+    ``WHERE id < last_seen ORDER BY id DESC LIMIT n`` on the pk index,
+    so latency does not grow with the table or the page number.
+    """
+    ordering = "-id"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class AppliedOnCursorPagination(IdCursorPagination):
+    # id breaks ties between leaves applied in the same instant
+    ordering = ("-applied_on", "-id")
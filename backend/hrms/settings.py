@@ -47,7 +47,8 @@ MIDDLEWARE = [
 ]
 
 # Root URL Configuration
-ROOT_URLCONF = "hrms.urls"
+# The event-feed service sets hrms.events_urls (see that module)
+ROOT_URLCONF = os.environ.get("DJANGO_ROOT_URLCONF", "hrms.urls")
 
 # Templates
 TEMPLATES = [
@@ -66,7 +67,7 @@ TEMPLATES = [
     },
 ]
 
-# WSGI (required)
+# WSGI (required); only the event-feed service runs hrms.asgi
 WSGI_APPLICATION = "hrms.wsgi.application"
 
 # REST Framework
@@ -91,6 +92,16 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # Take the write lock at BEGIN so concurrent check-outs queue on
+            # the busy timeout instead of failing with "database is locked".
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+            # WAL lets readers run beside the writer. It is persistent and
+            # rewrites the database header, so it is opt-in for the
+            # committed db.sqlite3.
+            **({"init_command": "PRAGMA journal_mode=WAL;"} if os.environ.get("SQLITE_WAL") else {}),
+        },
     }
 }
 # ----------------------------------------------------
@@ -114,10 +125,31 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(day_of_month=1, hour=1, minute=0),
         "args": (),
     },
+    "recompute-stale-payroll": {
+        "task": "payroll.tasks.recompute_stale_payroll",
+        "schedule": crontab(minute="*/10"),
+    },
+    "accrue-leave-on-jan-1": {
+        "task": "leave.tasks.accrue_yearly_leave",
+        "schedule": crontab(month_of_year=1, day_of_month=1, hour=0, minute=30),
+    },
 }
 
-CELERY_BROKER_URL = "redis://localhost:6379/0"
-CELERY_RESULT_BACKEND = "redis://localhost:6379/0"
+# Shared by Celery, the cache and the attendance event feed; unset means in-process only
+REDIS_URL = os.environ.get("REDIS_URL")
+
+# Workers write cached figures the web processes serve, so with Redis
+# the cache is shared; without it each process has its own
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+
+CELERY_BROKER_URL = REDIS_URL or "redis://localhost:6379/0"
+CELERY_RESULT_BACKEND = REDIS_URL or "redis://localhost:6379/0"
 
 # Windows fix — use solo worker instead of prefork
 CELERYD_FORCE_EXECV = True
@@ -1,6 +1,67 @@
 from django.contrib import admin
-from .models import Leave
+from django.db import transaction
+
+from .balances import rebook, release, set_status
+from .models import Leave, LeaveBalance, LeaveLedgerEntry
+
+# Fields an approved leave's ledger debit is booked against
+BOOKED_FIELDS = ("employee_id", "leave_type", "start_date", "end_date")
+
 
 @admin.register(Leave)
 class LeaveAdmin(admin.ModelAdmin):
     list_display = ("employee", "leave_type", "start_date", "end_date", "status", "applied_on")
+    list_filter = ("status", "leave_type")
+    # Status moves only through the approve/reject actions, which post to the ledger
+    readonly_fields = ("status",)
+    actions = ["approve", "reject"]
+
+    @admin.action(description="Approve selected leaves")
+    def approve(self, request, queryset):
+        self.change_status(request, queryset, "APPROVED")
+
+    @admin.action(description="Reject selected leaves")
+    def reject(self, request, queryset):
+        self.change_status(request, queryset, "REJECTED")
+
+    def change_status(self, request, queryset, status):
+        leave_ids = list(queryset.values_list("pk", flat=True))
+        for leave_id in leave_ids:
+            set_status(leave_id, status)
+        self.message_user(request, f"{len(leave_ids)} leave(s) {status.lower()}.")
+
+    # An approved leave's debit follows its edits and its deletion, as in LeaveViewSet
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+
+        with transaction.atomic():
+            # Locked, so an approve/reject cannot interleave with the edit
+            before = Leave.objects.select_for_update().get(pk=obj.pk)
+            obj.status = before.status
+            super().save_model(request, obj, form, change)
+            if obj.status == "APPROVED" and any(getattr(before, f) != getattr(obj, f) for f in BOOKED_FIELDS):
+                rebook(before, obj)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            release(Leave.objects.select_for_update().get(pk=obj.pk))
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            for leave in queryset.select_for_update():
+                release(leave)
+            super().delete_queryset(request, queryset)
+
+
+@admin.register(LeaveBalance)
+class LeaveBalanceAdmin(admin.ModelAdmin):
+    list_display = ("employee", "leave_type", "year", "accrued", "used", "balance", "updated_on")
+    list_filter = ("year", "leave_type")
+
+
+@admin.register(LeaveLedgerEntry)
+class LeaveLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ("employee", "leave_type", "year", "kind", "days", "leave", "created_on")
+    list_filter = ("year", "kind", "leave_type")
@@ -0,0 +1,153 @@
+"""
+Leave analytics, served from a monthly rollup.
+
+LeaveMonthlySummary counts leave requests per year, month of start_date,
+department, leave type and status. One aggregate fills it: a portable
+TruncMonth over Leave, grouped by the employee's department, the type
+and the status. refresh_month runs it for a single month and upserts
+that month's rows, dropping groups that no longer have leaves. The Leave
+post_save/post_delete signals call it after commit for the leave's month
+and, when an edit moved start_date, for the month it left. A department
+change of an employee refreshes every month they have leave in. rebuild
+runs the same aggregate over the whole table.
+
+Concurrent refreshes of one month cannot collide on the unique key: the
+month's rows are locked first, and new groups are inserted with an
+upsert.
+
+The type distribution and the monthly trend are read per year, and
+optionally per department, from a few hundred rollup rows at most. They
+are cached. Each refresh bumps a cache version for its year and for
+all-time once it commits, so a cached answer never outlives the rollup
+it was read from.
+"""
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+from attendance.utils import month_bounds
+from .models import Leave, LeaveMonthlySummary
+
+ANALYTICS_CACHE_SECONDS = getattr(settings, "LEAVE_ANALYTICS_CACHE_SECONDS", 60 * 60)
+
+STATUSES = [status for status, _ in Leave.STATUS_CHOICES]
+
+
+def _version_key(year):
+    return f"leave:analytics:version:{year or 'all'}"
+
+
+def _invalidate(year):
+    for key in (_version_key(year), _version_key(None)):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def _cached(name, year, department, build):
+    version = cache.get(_version_key(year), 0)
+    key = f"leave:analytics:{name}:{year or 'all'}:{quote(department or '*')}:{version}"
+
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, ANALYTICS_CACHE_SECONDS)
+    return data
+
+
+def _monthly_rows(leaves):
+    """Rollup rows for a Leave queryset, from one TruncMonth aggregate."""
+    counts = (
+        leaves.annotate(period=TruncMonth("start_date"))
+        .values("period", "employee__department", "leave_type", "status")
+        .annotate(leaves=Count("id"))
+        .order_by()
+    )
+    return [
+        LeaveMonthlySummary(
+            year=row["period"].year,
+            month=row["period"].month,
+            department=row["employee__department"],
+            leave_type=row["leave_type"],
+            status=row["status"],
+            leaves=row["leaves"],
+        )
+        for row in counts
+    ]
+
+
+def refresh_month(year, month):
+    """Recompute one month of the rollup from Leave and drop cached analytics."""
+    start, end = month_bounds(year, month)
+    # Every status, so the range is served by the (status, start_date) index
+    leaves = Leave.objects.filter(status__in=STATUSES, start_date__gte=start, start_date__lt=end)
+
+    with transaction.atomic():
+        summary = LeaveMonthlySummary.objects.filter(year=year, month=month)
+        # Zeroing locks the month's rows, so concurrent refreshes apply in turn
+        summary.update(leaves=0)
+        LeaveMonthlySummary.objects.bulk_create(
+            _monthly_rows(leaves),
+            update_conflicts=True,
+            unique_fields=["year", "month", "department", "leave_type", "status"],
+            update_fields=["leaves", "updated_on"],
+        )
+        summary.filter(leaves=0).delete()
+    transaction.on_commit(lambda: _invalidate(year))
+
+
+def rebuild():
+    """Recompute the whole rollup. Returns the number of rollup rows."""
+    rows = _monthly_rows(Leave.objects.all())
+    with transaction.atomic():
+        LeaveMonthlySummary.objects.all().delete()
+        LeaveMonthlySummary.objects.bulk_create(rows, batch_size=1000)
+    for year in {row.year for row in rows}:
+        _invalidate(year)
+    _invalidate(None)
+    return len(rows)
+
+
+def _rollup(year, department):
+    rows = LeaveMonthlySummary.objects.all()
+    if year:
+        rows = rows.filter(year=year)
+    if department:
+        rows = rows.filter(department=department)
+    return rows
+
+
+def type_distribution(year=None, department=None):
+    """{leave_type: requests} for a year (or all time)."""
+    def build():
+        rows = _rollup(year, department).values("leave_type").annotate(total=Sum("leaves")).order_by()
+        return {row["leave_type"]: row["total"] for row in rows}
+
+    return _cached("type", year, department, build)
+
+
+def monthly_trend(year, department=None):
+    """Requests per start month of a year, in total and per status."""
+    def build():
+        rows = (
+            _rollup(year, department)
+            .values("month", "status")
+            .annotate(total=Sum("leaves"))
+            .order_by("month")
+        )
+        months = {}
+        for row in rows:
+            entry = months.setdefault(
+                row["month"],
+                {"month": row["month"], "total": 0, **{status.lower(): 0 for status in STATUSES}},
+            )
+            entry["total"] += row["total"]
+            entry[row["status"].lower()] += row["total"]
+        return list(months.values())
+
+    return _cached("monthly", year, department, build)
@@ -0,0 +1,153 @@
+"""
+Leave balance ledger.
+
+Every change to a balance is a signed LeaveLedgerEntry. There are three
+kinds: the yearly ACCRUAL (+), an approved leave's DEBIT (-), and the
+REVERSAL (+) when an approved leave is rejected. LeaveBalance holds the
+running totals per (employee, leave type, year), so reading a balance
+is one row and never a sum over leaves.
+
+set_status applies an approve/reject inside one transaction. It locks
+the leave, posts the entries that the transition implies and adjusts
+the balance rows with F() increments. Approving twice does not debit
+twice. A leave that crosses New Year is split between the two years.
+Status is read-only through the API, so approve/reject is the only way
+in. Editing the dates, type or employee of an approved leave reverses
+its debit and debits it again as edited (rebook); deleting one reverses
+the debit (release). The entries keep the ledger and balances in step.
+
+accrue_year posts the yearly allowance for every active employee in
+bulk. The accrual is unique per (employee, type, year), so running it
+again posts nothing new. The balances are then recomputed from the
+ledger with one grouped aggregate and upserted in batches.
+refresh_year is that recompute, and can rebuild the balances at any
+time.
+
+UNPAID leave has no allowance and is not tracked.
+"""
+from collections import Counter
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Sum
+
+from employees.models import Employee
+from .models import Leave, LeaveBalance, LeaveLedgerEntry
+
+ANNUAL_ALLOWANCE = getattr(settings, "LEAVE_ANNUAL_ALLOWANCE", {"CASUAL": 12, "SICK": 12, "EARNED": 15})
+BATCH_SIZE = 1000
+
+
+def days_by_year(start, end):
+    """Calendar days of [start, end], counted per year."""
+    days = Counter()
+    day = start
+    while day <= end:
+        next_year = day.replace(year=day.year + 1, month=1, day=1)
+        last = min(end, next_year - timedelta(days=1))
+        days[day.year] += (last - day).days + 1
+        day = next_year
+    return days
+
+
+def _post(leave, kind, sign):
+    """Post one entry per year the leave covers and move the balances."""
+    for year, days in days_by_year(leave.start_date, leave.end_date).items():
+        LeaveLedgerEntry.objects.create(
+            employee_id=leave.employee_id, leave=leave, leave_type=leave.leave_type,
+            year=year, kind=kind, days=sign * days,
+        )
+        balance, _ = LeaveBalance.objects.get_or_create(
+            employee_id=leave.employee_id, leave_type=leave.leave_type, year=year
+        )
+        LeaveBalance.objects.filter(pk=balance.pk).update(used=F("used") - sign * days)
+
+
+def set_status(leave_id, status):
+    """Approve or reject a leave and update the ledger in the same transaction."""
+    with transaction.atomic():
+        leave = Leave.objects.select_for_update().get(pk=leave_id)
+        previous = leave.status
+        if previous == status:
+            return leave
+
+        if leave.leave_type in ANNUAL_ALLOWANCE:
+            if status == "APPROVED":
+                _post(leave, "DEBIT", -1)
+            elif previous == "APPROVED":
+                _post(leave, "REVERSAL", 1)
+
+        leave.status = status
+        leave.save(update_fields=["status"])
+    return leave
+
+
+def rebook(before, after):
+    """Move an approved leave's debit from its previous state ``before`` to ``after``."""
+    with transaction.atomic():
+        if before.leave_type in ANNUAL_ALLOWANCE:
+            _post(before, "REVERSAL", 1)
+        if after.leave_type in ANNUAL_ALLOWANCE:
+            _post(after, "DEBIT", -1)
+
+
+def release(leave):
+    """Reverse an approved leave's debit; call it before deleting the leave."""
+    if leave.status == "APPROVED" and leave.leave_type in ANNUAL_ALLOWANCE:
+        _post(leave, "REVERSAL", 1)
+
+
+def balances_for(employee_id, year):
+    """{leave_type: {accrued, used, balance}} of one employee for a year."""
+    rows = LeaveBalance.objects.filter(employee_id=employee_id, year=year).values_list(
+        "leave_type", "accrued", "used"
+    )
+    result = {
+        leave_type: {"accrued": 0, "used": 0, "balance": 0}
+        for leave_type in ANNUAL_ALLOWANCE
+    }
+    for leave_type, accrued, used in rows:
+        result[leave_type] = {"accrued": accrued, "used": used, "balance": accrued - used}
+    return result
+
+
+def refresh_year(year):
+    """Recompute every balance of a year from the ledger; returns the row count."""
+    totals = (
+        LeaveLedgerEntry.objects.filter(year=year)
+        .values("employee_id", "leave_type")
+        .annotate(
+            accrued=Sum("days", filter=Q(kind="ACCRUAL"), default=0),
+            used=-Sum("days", filter=~Q(kind="ACCRUAL"), default=0),
+        )
+        .order_by()
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    count = 0
+    while batch := list(islice(totals, BATCH_SIZE)):
+        LeaveBalance.objects.bulk_create(
+            [LeaveBalance(year=year, **row) for row in batch],
+            update_conflicts=True,
+            unique_fields=["employee", "leave_type", "year"],
+            update_fields=["accrued", "used", "updated_on"],
+        )
+        count += len(batch)
+    return count
+
+
+def accrue_year(year, allowances=None):
+    """Post the yearly allowance for all active employees; returns the balance row count."""
+    allowances = ANNUAL_ALLOWANCE if allowances is None else allowances
+    employee_ids = Employee.objects.filter(status="Active").values_list("id", flat=True).iterator()
+    entries = (
+        LeaveLedgerEntry(employee_id=employee_id, leave_type=leave_type, year=year, kind="ACCRUAL", days=days)
+        for employee_id in employee_ids
+        for leave_type, days in allowances.items()
+    )
+
+    with transaction.atomic():
+        while batch := list(islice(entries, BATCH_SIZE)):
+            LeaveLedgerEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        return refresh_year(year)
@@ -0,0 +1,76 @@
+"""
+Interval lookups over leave requests.
+
+A leave [start_date, end_date] overlaps a range [start, end] when
+start_date <= end and end_date >= start. On its own, the first condition
+is only bounded above, so an index scan would walk every older leave.
+Leaves may not be longer than MAX_SPAN_DAYS, which bounds start_date
+from below as well: start - MAX_SPAN_DAYS <= start_date <= end. Both
+lookups below are therefore closed range scans, on
+(employee, start_date, end_date) for the overlap check and on
+(status, start_date) for the team calendar.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+
+from .models import Leave
+
+MAX_SPAN_DAYS = getattr(settings, "LEAVE_MAX_SPAN_DAYS", 366)
+
+# Requests that block the dates they cover
+ACTIVE_STATUSES = ("PENDING", "APPROVED")
+
+
+def overlapping(queryset, start, end):
+    return queryset.filter(
+        start_date__gte=start - timedelta(days=MAX_SPAN_DAYS),
+        start_date__lte=end,
+        end_date__gte=start,
+    )
+
+
+def find_conflict(employee_id, start, end, exclude_id=None):
+    """The first active leave of the employee overlapping [start, end], or None."""
+    leaves = Leave.objects.filter(employee_id=employee_id, status__in=ACTIVE_STATUSES)
+    if exclude_id is not None:
+        leaves = leaves.exclude(pk=exclude_id)
+    return (
+        overlapping(leaves, start, end)
+        .order_by("start_date")
+        .values("id", "leave_type", "start_date", "end_date", "status")
+        .first()
+    )
+
+
+def on_leave_by_day(start, end, statuses=("APPROVED",), department=None):
+    """
+    {day: [leave dicts]} for every day in [start, end] someone is on leave,
+    resolved with a single range query.
+    """
+    leaves = overlapping(Leave.objects.filter(status__in=statuses), start, end)
+    if department:
+        leaves = leaves.filter(employee__department=department)
+
+    days = defaultdict(list)
+    rows = leaves.order_by("start_date", "employee__emp_code").values(
+        "id", "employee_id", "employee__emp_code", "employee__name", "employee__department",
+        "leave_type", "status", "start_date", "end_date",
+    )
+    for row in rows:
+        entry = {
+            "leave_id": row["id"],
+            "employee_id": row["employee_id"],
+            "emp_code": row["employee__emp_code"],
+            "name": row["employee__name"],
+            "department": row["employee__department"],
+            "leave_type": row["leave_type"],
+            "status": row["status"],
+        }
+        day = max(row["start_date"], start)
+        last = min(row["end_date"], end)
+        while day <= last:
+            days[day].append(entry)
+            day += timedelta(days=1)
+    return dict(sorted(days.items()))
@@ -0,0 +1,18 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from leave.balances import accrue_year, refresh_year
+
+
+class Command(BaseCommand):
+    help = "Post the yearly leave allowance for all active employees, or rebuild balances from the ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, default=date.today().year)
+        parser.add_argument("--rebuild", action="store_true", help="Only recompute balances from the ledger")
+
+    def handle(self, *args, **options):
+        year = options["year"]
+        rows = refresh_year(year) if options["rebuild"] else accrue_year(year)
+        self.stdout.write(self.style.SUCCESS(f"{rows} leave balance(s) up to date for {year}"))
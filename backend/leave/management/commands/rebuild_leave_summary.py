@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from leave.analytics import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly leave rollup from raw Leave rows."
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt leave rollup ({rows} row(s))"))
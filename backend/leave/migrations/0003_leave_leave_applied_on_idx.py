@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_employee_status'),
+        ('leave', '0002_leave_applied_on_alter_leave_leave_type_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['-applied_on', '-id'], name='leave_applied_on_idx'),
+        ),
+    ]
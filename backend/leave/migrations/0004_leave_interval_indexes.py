@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_employee_status'),
+        ('leave', '0003_leave_leave_applied_on_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['employee', 'start_date', 'end_date'], name='leave_employee_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['status', 'start_date'], name='leave_status_start_idx'),
+        ),
+    ]
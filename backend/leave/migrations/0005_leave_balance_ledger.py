@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_employee_status'),
+        ('leave', '0004_leave_interval_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('leave_type', models.CharField(choices=[('CASUAL', 'Casual Leave'), ('SICK', 'Sick Leave'), ('EARNED', 'Earned Leave'), ('UNPAID', 'Unpaid Leave')], max_length=20)),
+                ('year', models.IntegerField()),
+                ('accrued', models.IntegerField(default=0)),
+                ('used', models.IntegerField(default=0)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_balances', to='employees.employee')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('employee', 'leave_type', 'year'), name='leave_balance_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaveLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('leave_type', models.CharField(choices=[('CASUAL', 'Casual Leave'), ('SICK', 'Sick Leave'), ('EARNED', 'Earned Leave'), ('UNPAID', 'Unpaid Leave')], max_length=20)),
+                ('year', models.IntegerField()),
+                ('kind', models.CharField(choices=[('ACCRUAL', 'Accrual'), ('DEBIT', 'Debit'), ('REVERSAL', 'Reversal')], max_length=20)),
+                ('days', models.IntegerField()),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_ledger', to='employees.employee')),
+                ('leave', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='leave.leave')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['employee', 'year', 'leave_type'], name='leave_ledger_employee_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('kind', 'ACCRUAL')), fields=('employee', 'leave_type', 'year'), name='leave_ledger_one_accrual')],
+            },
+        ),
+    ]
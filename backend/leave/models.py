@@ -24,5 +24,106 @@ class Leave(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
     applied_on = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order of the leave list
+            models.Index(fields=["-applied_on", "-id"], name="leave_applied_on_idx"),
+            # Interval lookups: overlap check per employee, who-is-on-leave by status
+            models.Index(fields=["employee", "start_date", "end_date"], name="leave_employee_dates_idx"),
+            models.Index(fields=["status", "start_date"], name="leave_status_start_idx"),
+        ]
+
     def __str__(self):
         return f"{self.employee.name} - {self.leave_type} ({self.status})"
+
+    # The row as last loaded or saved, so signal handlers can tell which
+    # months and dates an edit moved the leave away from
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        leave = super().from_db(db, field_names, values)
+        leave.saved_values = dict(zip(field_names, values))
+        return leave
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.saved_values = {field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields}
+
+    def previous(self, field):
+        """``field`` as last loaded or saved; the current value for a leave not read from the database."""
+        return getattr(self, "saved_values", {}).get(field, getattr(self, field))
+
+
+class LeaveBalance(models.Model):
+    """Running leave balance of one employee, per leave type and year, kept in step with the ledger."""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="leave_balances")
+    leave_type = models.CharField(max_length=20, choices=Leave.LEAVE_TYPES)
+    year = models.IntegerField()
+    accrued = models.IntegerField(default=0)
+    used = models.IntegerField(default=0)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["employee", "leave_type", "year"], name="leave_balance_unique"),
+        ]
+
+    @property
+    def balance(self):
+        return self.accrued - self.used
+
+    def __str__(self):
+        return f"{self.employee.name} - {self.leave_type} {self.year}: {self.balance}"
+
+
+class LeaveLedgerEntry(models.Model):
+    """One signed movement of a leave balance: accrual (+), approved leave (-) or its reversal (+)."""
+    KIND_CHOICES = [
+        ("ACCRUAL", "Accrual"),
+        ("DEBIT", "Debit"),
+        ("REVERSAL", "Reversal"),
+    ]
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="leave_ledger")
+    leave = models.ForeignKey(Leave, on_delete=models.SET_NULL, null=True, blank=True, related_name="ledger_entries")
+    leave_type = models.CharField(max_length=20, choices=Leave.LEAVE_TYPES)
+    year = models.IntegerField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    days = models.IntegerField()
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["employee", "year", "leave_type"], name="leave_ledger_employee_idx"),
+        ]
+        constraints = [
+            # The yearly accrual is posted at most once, so it is safe to run again
+            models.UniqueConstraint(
+                fields=["employee", "leave_type", "year"],
+                condition=models.Q(kind="ACCRUAL"),
+                name="leave_ledger_one_accrual",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.employee.name} - {self.kind} {self.days:+d} {self.leave_type} {self.year}"
+
+
+class LeaveMonthlySummary(models.Model):
+    """Leave requests per start month, department, type and status, refreshed whenever a leave changes."""
+    year = models.IntegerField()
+    month = models.IntegerField()
+    department = models.CharField(max_length=100)
+    leave_type = models.CharField(max_length=20, choices=Leave.LEAVE_TYPES)
+    status = models.CharField(max_length=20, choices=Leave.STATUS_CHOICES)
+    leaves = models.IntegerField(default=0)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["year", "month", "department", "leave_type", "status"], name="leave_summary_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month}/{self.year} {self.department} {self.leave_type} {self.status}: {self.leaves}"
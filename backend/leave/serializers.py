@@ -1,9 +1,48 @@
-from rest_framework import serializers
+from rest_framework import exceptions, serializers, status
+
+from employees.models import Employee
+from .intervals import ACTIVE_STATUSES, MAX_SPAN_DAYS, find_conflict
 from .models import Leave
 
+
+class LeaveConflict(exceptions.APIException):
+    """409 carrying the overlapping request, so the client can show it."""
+    status_code = status.HTTP_409_CONFLICT
+    default_code = "conflict"
+
+    def __init__(self, conflict):
+        super().__init__()
+        self.detail = {"error": "Leave overlaps an existing request", "conflict": conflict}
+
+
 class LeaveSerializer(serializers.ModelSerializer):
     employee_name = serializers.CharField(source="employee.name", read_only=True)
 
     class Meta:
         model = Leave
         fields = "__all__"
+        # Changed only through approve/reject, which post the ledger entries
+        read_only_fields = ["status"]
+
+    def validate(self, attrs):
+        """
+        Date order, MAX_SPAN_DAYS and overlap rules, for apply and for
+        plain create/update alike. Call it inside a transaction: the
+        employee is locked so concurrent writes for them cannot overlap.
+        """
+        def current(field, default=None):
+            return attrs.get(field, getattr(self.instance, field, default))
+
+        start, end = current("start_date"), current("end_date")
+        if end < start:
+            raise serializers.ValidationError({"end_date": "end_date must not be before start_date"})
+        if (end - start).days >= MAX_SPAN_DAYS:
+            raise serializers.ValidationError({"end_date": f"Leave cannot exceed {MAX_SPAN_DAYS} days"})
+
+        if current("status", "PENDING") in ACTIVE_STATUSES:
+            employee = current("employee")
+            Employee.objects.select_for_update().filter(pk=employee.pk).exists()
+            conflict = find_conflict(employee.pk, start, end, exclude_id=getattr(self.instance, "pk", None))
+            if conflict:
+                raise LeaveConflict(conflict)
+        return attrs
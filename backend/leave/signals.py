@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from employees.models import Employee
+from .models import Leave
+from .analytics import refresh_month
+
+
+def _refresh_on_commit(months):
+    for year, month in months:
+        transaction.on_commit(lambda year=year, month=month: refresh_month(year, month))
+
+
+@receiver(post_save, sender=Leave)
+@receiver(post_delete, sender=Leave)
+def refresh_leave_summary(sender, instance, **kwargs):
+    # The month it was moved out of, too
+    _refresh_on_commit({
+        (day.year, day.month) for day in (instance.start_date, instance.previous("start_date"))
+    })
+
+
+@receiver(pre_save, sender=Employee)
+def remember_department(sender, instance, **kwargs):
+    if instance.pk:
+        instance.saved_department = (
+            Employee.objects.filter(pk=instance.pk).values_list("department", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Employee)
+def move_leave_summary(sender, instance, created, **kwargs):
+    """The rollup is per department: moving an employee moves their leaves' rows."""
+    if created or getattr(instance, "saved_department", instance.department) == instance.department:
+        return
+    periods = (
+        Leave.objects.filter(employee=instance)
+        .annotate(period=TruncMonth("start_date"))
+        .values_list("period", flat=True)
+        .distinct()
+    )
+    _refresh_on_commit({(period.year, period.month) for period in periods})
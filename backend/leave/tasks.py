@@ -0,0 +1,10 @@
+from celery import shared_task
+from datetime import date
+
+from leave.balances import accrue_year
+
+
+@shared_task
+def accrue_yearly_leave(year=None):
+    """Post the yearly leave allowance for all active employees (default: this year)."""
+    return accrue_year(year or date.today().year)
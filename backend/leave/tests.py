@@ -1,3 +1,276 @@
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from employees.models import Employee
+from .models import Leave, LeaveBalance, LeaveLedgerEntry, LeaveMonthlySummary
+from .analytics import rebuild
+from .intervals import overlapping
+from .balances import accrue_year, days_by_year, refresh_year
+
+
+def make_employee(n, department="Engineering"):
+    return Employee.objects.create(
+        emp_code=f"E{n:04d}",
+        name=f"Employee {n}",
+        email=f"employee{n}@example.com",
+        department=department,
+        role="Engineer",
+        salary=Decimal("30000.00"),
+        date_joined=date(2024, 1, 1),
+    )
+
+
+def make_leave(employee, start, end, status="APPROVED", leave_type="CASUAL"):
+    return Leave.objects.create(
+        employee=employee, leave_type=leave_type, start_date=start, end_date=end, reason="-", status=status
+    )
+
+
+class LeaveOverlapTests(TestCase):
+    def setUp(self):
+        self.employee = make_employee(1)
+        make_leave(self.employee, date(2025, 4, 10), date(2025, 4, 12), status="PENDING")
+        make_leave(self.employee, date(2025, 4, 20), date(2025, 4, 20), status="REJECTED")
+
+    def apply(self, start, end):
+        return self.client.post("/api/leaves/apply/", {
+            "employee": self.employee.emp_code,
+            "leave_type": "SICK",
+            "start_date": start,
+            "end_date": end,
+            "reason": "Unwell",
+        })
+
+    def test_overlapping_request_is_rejected_with_conflict(self):
+        response = self.apply("2025-04-12", "2025-04-14")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["conflict"]["start_date"], "2025-04-10")
+
+    def test_adjacent_and_rejected_dates_are_free(self):
+        self.assertEqual(self.apply("2025-04-13", "2025-04-14").status_code, 201)
+        self.assertEqual(self.apply("2025-04-20", "2025-04-20").status_code, 201)
+        self.assertEqual(self.apply("2025-04-09", "2025-04-08").status_code, 400)
+
+    def test_plain_create_and_update_are_validated_too(self):
+        created = self.client.post("/api/leaves/", {
+            "employee": self.employee.id, "leave_type": "SICK", "reason": "-",
+            "start_date": "2025-04-11", "end_date": "2025-04-11",
+        }, content_type="application/json")
+        self.assertEqual(created.status_code, 409)
+
+        leave = make_leave(self.employee, date(2025, 5, 1), date(2025, 5, 2), status="PENDING")
+        url = f"/api/leaves/{leave.pk}/"
+        # Its own dates are no conflict
+        self.assertEqual(self.client.patch(url, {"end_date": "2025-05-03"}, content_type="application/json").status_code, 200)
+        self.assertEqual(self.client.patch(url, {"start_date": "2025-04-12"}, content_type="application/json").status_code, 409)
+        self.assertEqual(self.client.patch(url, {"end_date": "2026-06-01"}, content_type="application/json").status_code, 400)
+
+
+class TeamCalendarTests(TestCase):
+    def test_month_is_resolved_per_day_in_one_query(self):
+        alice, bob = make_employee(1), make_employee(2)
+        make_leave(alice, date(2025, 3, 30), date(2025, 4, 2))
+        make_leave(bob, date(2025, 4, 2), date(2025, 4, 2))
+        make_leave(make_employee(3, department="Finance"), date(2025, 4, 2), date(2025, 4, 3))
+        make_leave(bob, date(2025, 4, 10), date(2025, 4, 11), status="PENDING")
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/leaves/calendar/", {"year": 2025, "month": 4, "department": "Engineering"})
+
+        days = {d["date"]: [e["emp_code"] for e in d["on_leave"]] for d in response.json()["days"]}
+        self.assertEqual(days, {"2025-04-01": ["E0001"], "2025-04-02": ["E0001", "E0002"]})
+
+        pending = self.client.get("/api/leaves/calendar/", {"date": "2025-04-10", "include_pending": 1}).json()
+        self.assertEqual([e["emp_code"] for e in pending["days"][0]["on_leave"]], ["E0002"])
+
+
+class LeaveBalanceLedgerTests(TestCase):
+    def setUp(self):
+        self.employee = make_employee(1)
+        make_employee(2)
+        Employee.objects.filter(pk=make_employee(3).pk).update(status="Inactive")
+
+    def balances(self, year=2025):
+        response = self.client.get("/api/leaves/balances/", {"employee": "E0001", "year": year})
+        return response.json()["balances"]
+
+    def test_yearly_accrual_is_bulk_and_posted_once(self):
+        allowances = {"CASUAL": 12, "SICK": 10}
+        self.assertEqual(accrue_year(2025, allowances), 4)
+        self.assertEqual(accrue_year(2025, allowances), 4)
+
+        self.assertEqual(LeaveLedgerEntry.objects.filter(kind="ACCRUAL").count(), 4)
+        self.assertFalse(LeaveBalance.objects.filter(employee__status="Inactive").exists())
+        self.assertEqual(self.balances()["CASUAL"], {"accrued": 12, "used": 0, "balance": 12})
+
+    def test_approve_debits_once_and_reject_reverses(self):
+        accrue_year(2025, {"CASUAL": 12})
+        leave = make_leave(self.employee, date(2025, 4, 7), date(2025, 4, 9), status="PENDING")
+
+        self.client.post(f"/api/leaves/{leave.pk}/approve/")
+        response = self.client.post(f"/api/leaves/{leave.pk}/approve/")
+        self.assertEqual(response.json()["balances"]["CASUAL"]["balance"], 9)
+
+        self.client.post(f"/api/leaves/{leave.pk}/reject/")
+        self.assertEqual(self.balances()["CASUAL"], {"accrued": 12, "used": 0, "balance": 12})
+        self.assertEqual(
+            list(leave.ledger_entries.order_by("id").values_list("kind", "days")),
+            [("DEBIT", -3), ("REVERSAL", 3)],
+        )
+
+        # The incremental balances agree with a rebuild from the ledger
+        before = list(LeaveBalance.objects.order_by("id").values_list("accrued", "used"))
+        refresh_year(2025)
+        self.assertEqual(list(LeaveBalance.objects.order_by("id").values_list("accrued", "used")), before)
+
+    def test_edits_and_deletes_keep_the_ledger_in_step(self):
+        accrue_year(2025, {"CASUAL": 12})
+        leave = make_leave(self.employee, date(2025, 4, 7), date(2025, 4, 9), status="PENDING")
+        url = f"/api/leaves/{leave.pk}/"
+
+        # Status only changes through approve/reject
+        self.client.patch(url, {"status": "APPROVED"}, content_type="application/json")
+        self.assertEqual(Leave.objects.get().status, "PENDING")
+
+        self.client.post(f"/api/leaves/{leave.pk}/approve/")
+        self.client.patch(url, {"end_date": "2025-04-11"}, content_type="application/json")
+        self.assertEqual(self.balances()["CASUAL"]["used"], 5)
+
+        self.client.delete(url)
+        self.assertEqual(self.balances()["CASUAL"]["used"], 0)
+        self.assertEqual(
+            list(LeaveLedgerEntry.objects.exclude(kind="ACCRUAL").order_by("id").values_list("kind", "days")),
+            [("DEBIT", -3), ("REVERSAL", 3), ("DEBIT", -5), ("REVERSAL", 5)],
+        )
+
+    def test_leave_across_new_year_is_split(self):
+        self.assertEqual(days_by_year(date(2024, 12, 30), date(2025, 1, 2)), {2024: 2, 2025: 2})
+
+        leave = make_leave(self.employee, date(2024, 12, 30), date(2025, 1, 2), status="PENDING")
+        self.client.post(f"/api/leaves/{leave.pk}/approve/")
+        self.assertEqual(self.balances(2024)["CASUAL"]["used"], 2)
+        self.assertEqual(self.balances(2025)["CASUAL"]["used"], 2)
+
+
+class LeaveAdminTests(TestCase):
+    def setUp(self):
+        self.employee = make_employee(1)
+        accrue_year(2025, {"CASUAL": 12})
+        self.leave = make_leave(self.employee, date(2025, 4, 7), date(2025, 4, 9), status="PENDING")
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "password")
+        )
+
+    def used(self):
+        return LeaveBalance.objects.get(employee=self.employee, leave_type="CASUAL", year=2025).used
+
+    def act(self, action, *leaves):
+        return self.client.post("/admin/leave/leave/", {
+            "action": action, "_selected_action": [leave.pk for leave in leaves], "post": "yes",
+        })
+
+    def test_status_changes_only_through_actions_that_post_to_the_ledger(self):
+        change_url = f"/admin/leave/leave/{self.leave.pk}/change/"
+        form = {
+            "employee": self.employee.pk, "leave_type": "CASUAL", "reason": "-",
+            "start_date": "2025-04-07", "end_date": "2025-04-09", "status": "APPROVED",
+        }
+        self.client.post(change_url, form)
+        self.assertEqual(Leave.objects.get().status, "PENDING")
+
+        self.act("approve", self.leave)
+        self.assertEqual((Leave.objects.get().status, self.used()), ("APPROVED", 3))
+
+        self.client.post(change_url, {**form, "end_date": "2025-04-11"})
+        self.assertEqual((Leave.objects.get().status, self.used()), ("APPROVED", 5))
+
+        self.act("reject", self.leave)
+        self.assertEqual((Leave.objects.get().status, self.used()), ("REJECTED", 0))
+
+    def test_deleting_approved_leaves_releases_their_debit(self):
+        other = make_leave(self.employee, date(2025, 5, 5), date(2025, 5, 6), status="PENDING")
+        self.act("approve", self.leave, other)
+        self.assertEqual(self.used(), 5)
+
+        self.client.post(f"/admin/leave/leave/{other.pk}/delete/", {"post": "yes"})
+        self.assertEqual(self.used(), 3)
+
+        self.act("delete_selected", self.leave)
+        self.assertEqual((Leave.objects.count(), self.used()), (0, 0))
+
+
+class LeaveAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = make_employee(1)
+        self.bob = make_employee(2, department="Finance")
+        with self.captureOnCommitCallbacks(execute=True):
+            make_leave(self.alice, date(2024, 3, 4), date(2024, 3, 5), status="PENDING")
+            make_leave(self.bob, date(2025, 3, 31), date(2025, 4, 2), status="PENDING", leave_type="SICK")
+
+    def test_rollup_follows_apply_approve_and_reject(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/leaves/apply/", {
+                "employee": "E0001", "leave_type": "CASUAL",
+                "start_date": "2025-03-10", "end_date": "2025-03-11", "reason": "Family",
+            })
+            applied = Leave.objects.get(start_date=date(2025, 3, 10))
+            self.client.post(f"/api/leaves/{applied.pk}/approve/")
+            sick = Leave.objects.get(leave_type="SICK")
+            self.client.post(f"/api/leaves/{sick.pk}/reject/")
+
+        # The previous year's March is not merged into this one
+        trend = self.client.get("/api/leaves/analytics/monthly/", {"year": 2025}).json()
+        self.assertEqual(trend, [{"month": 3, "total": 2, "pending": 0, "approved": 1, "rejected": 1}])
+
+        finance = self.client.get("/api/leaves/analytics/type/", {"year": 2025, "department": "Finance"}).json()
+        self.assertEqual(finance, {"SICK": 1})
+        self.assertEqual(self.client.get("/api/leaves/analytics/type/").json(), {"CASUAL": 2, "SICK": 1})
+
+        # Incremental refreshes agree with a full rebuild
+        fields = ("year", "month", "department", "leave_type", "status", "leaves")
+        before = sorted(LeaveMonthlySummary.objects.values_list(*fields))
+        rebuild()
+        self.assertEqual(sorted(LeaveMonthlySummary.objects.values_list(*fields)), before)
+
+    def test_reads_come_from_the_cached_rollup(self):
+        with self.assertNumQueries(1):
+            self.client.get("/api/leaves/analytics/monthly/", {"year": 2024})
+        with self.assertNumQueries(0):
+            trend = self.client.get("/api/leaves/analytics/monthly/", {"year": 2024}).json()
+        self.assertEqual(trend[0]["pending"], 1)
+
+        # A change to the year's leaves drops the cached answer
+        with self.captureOnCommitCallbacks(execute=True):
+            make_leave(self.alice, date(2024, 7, 1), date(2024, 7, 1))
+        trend = self.client.get("/api/leaves/analytics/monthly/", {"year": 2024}).json()
+        self.assertEqual([month["month"] for month in trend], [3, 7])
+
+    def test_moved_leaves_and_employees_leave_no_stale_rows(self):
+        leave = Leave.objects.get(employee=self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/leaves/{leave.pk}/", {"start_date": "2024-02-28"}, content_type="application/json")
+            self.client.patch(f"/api/employees/{self.bob.pk}/", {"department": "Sales"}, content_type="application/json")
+
+        rows = sorted(LeaveMonthlySummary.objects.values_list("year", "month", "department", "leaves"))
+        self.assertEqual(rows, [(2024, 2, "Engineering", 1), (2025, 3, "Sales", 1)])
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are checked on Postgres")
+class LeaveIndexPlanTests(TestCase):
+    def test_interval_lookups_use_their_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        start, end = date(2025, 4, 1), date(2025, 4, 30)
+
+        plan = overlapping(Leave.objects.filter(employee_id=1), start, end).explain()
+        self.assertIn("leave_employee_dates_idx", plan)
+        plan = overlapping(Leave.objects.filter(status="APPROVED"), start, end).explain()
+        self.assertIn("leave_status_start_idx", plan)
@@ -1,16 +1,57 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
-from django.db.models import Count
+from django.db import transaction
+from django.utils import timezone
+from copy import copy
+from datetime import date, timedelta
 
 from .models import Leave
 from .serializers import LeaveSerializer
+from .intervals import ACTIVE_STATUSES, on_leave_by_day
+from .balances import balances_for, rebook, release, set_status
+from . import analytics
+from attendance.utils import month_bounds
 from employees.models import Employee
+from hrms.pagination import AppliedOnCursorPagination
 
 
 class LeaveViewSet(viewsets.ModelViewSet):
-    queryset = Leave.objects.all().order_by("-applied_on")
+    queryset = Leave.objects.select_related("employee").order_by("-applied_on", "-id")
     serializer_class = LeaveSerializer
+    pagination_class = AppliedOnCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ("update", "partial_update", "destroy"):
+            # Locked, so an approve/reject cannot interleave with the edit
+            queryset = queryset.select_for_update(of=("self",))
+        return queryset
+
+    # LeaveSerializer.validate locks the employee; hold it until the save
+    def create(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().create(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
+
+    # An approved leave's debit follows its edits and its deletion
+    def perform_update(self, serializer):
+        before = copy(serializer.instance)
+        leave = serializer.save()
+        booked = ("employee_id", "leave_type", "start_date", "end_date")
+        if leave.status == "APPROVED" and any(getattr(before, f) != getattr(leave, f) for f in booked):
+            rebook(before, leave)
+
+    def perform_destroy(self, instance):
+        release(instance)
+        instance.delete()
 
     # APPLY LEAVE
     @action(detail=False, methods=["post"])
@@ -18,13 +59,7 @@ class LeaveViewSet(viewsets.ModelViewSet):
 
         emp_code = request.data.get("employee")
 
-        try:
-            employee = Employee.objects.get(emp_code=emp_code)
-        except Employee.DoesNotExist:
-            return Response({"error": "Employee not found"}, status=404)
-
         data = {
-            "employee": employee.id,
             "leave_type": request.data.get("leave_type"),
             "start_date": request.data.get("start_date"),
             "end_date": request.data.get("end_date"),
@@ -32,48 +67,116 @@ class LeaveViewSet(viewsets.ModelViewSet):
             "status": "PENDING",
         }
 
-        serializer = LeaveSerializer(data=data)
-        if serializer.is_valid():
+        with transaction.atomic():
+            try:
+                employee = Employee.objects.get(emp_code=emp_code)
+            except Employee.DoesNotExist:
+                return Response({"error": "Employee not found"}, status=404)
+
+            # Validation locks the employee and answers an overlap with 409
+            serializer = LeaveSerializer(data={**data, "employee": employee.id})
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             serializer.save()
-            return Response(
-                {"message": "Leave applied successfully"},
-                status=status.HTTP_201_CREATED
-            )
 
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"message": "Leave applied successfully"},
+            status=status.HTTP_201_CREATED
+        )
+
+    # TEAM LEAVE CALENDAR
+    @action(detail=False, methods=["get"])
+    def calendar(self, request):
+        """
+        Who is on leave, per day. ?year=&month= (default: this month), or
+        ?start=&end= (e.g. a week) / ?date= for one day; ?department= and
+        ?include_pending=1 narrow or widen the result.
+        """
+        try:
+            if request.GET.get("date"):
+                start = end = date.fromisoformat(request.GET["date"])
+            elif request.GET.get("start"):
+                start = date.fromisoformat(request.GET["start"])
+                end = date.fromisoformat(request.GET.get("end", request.GET["start"]))
+            else:
+                today = timezone.localdate()
+                year = int(request.GET.get("year", today.year))
+                month = int(request.GET.get("month", today.month))
+                start, month_end = month_bounds(year, month)
+                end = month_end - timedelta(days=1)
+        except ValueError:
+            return Response({"error": "Invalid date range"}, status=400)
+
+        if end < start or (end - start).days > 92:
+            return Response({"error": "Range must be between 1 and 93 days"}, status=400)
+
+        statuses = ACTIVE_STATUSES if request.GET.get("include_pending") else ("APPROVED",)
+        department = request.GET.get("department")
+        days = on_leave_by_day(start, end, statuses, department)
+
+        return Response({
+            "start": start,
+            "end": end,
+            "department": department,
+            "days": [{"date": day, "on_leave": entries} for day, entries in days.items()],
+        })
+
+    # LEAVE BALANCES
+    @action(detail=False, methods=["get"])
+    def balances(self, request):
+        """Balance per leave type: ?employee=<emp_code>&year= (default: this year)."""
+        try:
+            employee = Employee.objects.get(emp_code=request.GET.get("employee"))
+        except Employee.DoesNotExist:
+            return Response({"error": "Employee not found"}, status=404)
+        try:
+            year = int(request.GET.get("year", timezone.localdate().year))
+        except ValueError:
+            return Response({"error": "Invalid year"}, status=400)
+
+        return Response({
+            "employee": employee.emp_code,
+            "year": year,
+            "balances": balances_for(employee.id, year),
+        })
 
     # APPROVE LEAVE
     @action(detail=True, methods=["post"])
     def approve(self, request, pk=None):
-        leave = self.get_object()
-        leave.status = "APPROVED"
-        leave.save()
-        return Response({"message": "Leave Approved ✔"}, status=200)
+        leave = set_status(self.get_object().pk, "APPROVED")
+        return Response({
+            "message": "Leave Approved ✔",
+            "balances": balances_for(leave.employee_id, leave.start_date.year),
+        }, status=200)
 
     # REJECT LEAVE
     @action(detail=True, methods=["post"])
     def reject(self, request, pk=None):
-        leave = self.get_object()
-        leave.status = "REJECTED"
-        leave.save()
-        return Response({"message": "Leave Rejected ✖"}, status=200)
+        leave = set_status(self.get_object().pk, "REJECTED")
+        return Response({
+            "message": "Leave Rejected ✖",
+            "balances": balances_for(leave.employee_id, leave.start_date.year),
+        }, status=200)
 
 
-# ANALYTICS
+# ANALYTICS (monthly leave rollup)
 @api_view(["GET"])
 def leave_type_distribution(request):
-    data = Leave.objects.values("leave_type").annotate(total=Count("leave_type"))
-    return Response({item["leave_type"]: item["total"] for item in data})
+    """Requests per leave type; ?year= (default: all time) and ?department= narrow it."""
+    try:
+        year = int(request.GET["year"]) if request.GET.get("year") else None
+    except ValueError:
+        return Response({"error": "Invalid year"}, status=400)
+
+    return Response(analytics.type_distribution(year, request.GET.get("department")))
 
 
 @api_view(["GET"])
 def leave_monthly_trend(request):
-    data = (
-        Leave.objects.extra(select={'month': "EXTRACT(MONTH FROM start_date)"})
-        .values("month")
-        .annotate(total=Count("id"))
-        .order_by("month")
-    )
-    return Response([
-        {"month": int(item["month"]), "total": item["total"]} for item in data
-    ])
+    """Requests per start month of ?year= (default: this year), optionally for one ?department=."""
+    try:
+        year = int(request.GET.get("year", timezone.localdate().year))
+    except ValueError:
+        return Response({"error": "Invalid year"}, status=400)
+
+    return Response(analytics.monthly_trend(year, request.GET.get("department")))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Payroll
+from .models import Payroll, PayrollRun, PayrollRunShard, PayslipMailing
 
 @admin.register(Payroll)
 class PayrollAdmin(admin.ModelAdmin):
@@ -11,3 +11,22 @@ class PayrollAdmin(admin.ModelAdmin):
     )
     list_filter = ("year", "month", "employee")
     search_fields = ("employee__name",)
+
+
+@admin.register(PayslipMailing)
+class PayslipMailingAdmin(admin.ModelAdmin):
+    list_display = ("month", "year", "status", "total", "sent", "failed", "created_on", "finished_on")
+    list_filter = ("status", "year", "month")
+
+
+class PayrollRunShardInline(admin.TabularInline):
+    model = PayrollRunShard
+    extra = 0
+    readonly_fields = ("number", "first_employee_id", "last_employee_id", "status", "rows", "attempts", "error", "finished_on")
+
+
+@admin.register(PayrollRun)
+class PayrollRunAdmin(admin.ModelAdmin):
+    list_display = ("month", "year", "status", "shard_size", "created_on", "finished_on")
+    list_filter = ("status", "year", "month")
+    inlines = [PayrollRunShardInline]
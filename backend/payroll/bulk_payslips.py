@@ -0,0 +1,142 @@
+"""
+Parallel bulk payslip rendering.
+
+Payroll rows are turned into plain picklable payloads in the web/worker
+process and rendered by a process pool (one worker per core by
+default); ReportLab work is CPU-bound, so processes rather than threads.
+Finished PDFs are written into a ZIP as they complete and the archive is
+yielded chunk by chunk, ending with a manifest.json holding per-worker
+throughput.
+"""
+import json
+import multiprocessing
+import os
+import time
+import zipfile
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from io import BytesIO
+from itertools import islice
+from types import SimpleNamespace
+
+from .models import Payroll
+from .render_worker import render_batch
+
+SLIPS_PER_TASK = 25
+
+
+def payslip_payload(payroll):
+    """Everything the renderer reads, as a picklable namespace."""
+    employee = payroll.employee
+    return SimpleNamespace(
+        id=payroll.id,
+        month=payroll.month,
+        year=payroll.year,
+        basic_salary=payroll.basic_salary,
+        working_days=payroll.working_days,
+        present_days=payroll.present_days,
+        paid_leave_days=payroll.paid_leave_days,
+        absent_days=payroll.absent_days,
+        lop_days=payroll.lop_days,
+        gross_salary=payroll.gross_salary,
+        net_salary=payroll.net_salary,
+        generated_on=payroll.generated_on,
+        employee=SimpleNamespace(
+            id=employee.id,
+            emp_code=employee.emp_code,
+            name=employee.name,
+            department=employee.department,
+        ),
+    )
+
+
+class _ChunkWriter:
+    """Write-only sink for ZipFile; the bytes are drained after each entry."""
+
+    def __init__(self):
+        self._buffer = BytesIO()
+
+    def write(self, data):
+        return self._buffer.write(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+def _batches(payrolls, size):
+    iterator = payrolls.iterator(chunk_size=size * 4)
+    while batch := [payslip_payload(p) for p in islice(iterator, size)]:
+        yield batch
+
+
+def stream_payslip_zip(year, month, workers=None, stats=None):
+    """
+    Yield a ZIP archive of every payslip of the month.
+
+    At most two batches per worker are in flight, so memory is bounded by
+    the pool size rather than the headcount. ``stats`` (a dict), if
+    given, is filled with the run statistics.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = stats if stats is not None else {}
+    payrolls = (
+        Payroll.objects.filter(year=year, month=month)
+        .select_related("employee")
+        .order_by("employee__emp_code")
+    )
+
+    sink = _ChunkWriter()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED)
+    per_worker = defaultdict(lambda: {"slips": 0, "seconds": 0.0})
+    started = time.perf_counter()
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        batches = _batches(payrolls, SLIPS_PER_TASK)
+        pending = set()
+        try:
+            while True:
+                while len(pending) < workers * 2 and (batch := next(batches, None)):
+                    pending.add(pool.submit(render_batch, batch))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pid, seconds, files = future.result()
+                    per_worker[pid]["slips"] += len(files)
+                    per_worker[pid]["seconds"] += seconds
+                    for name, data in files:
+                        archive.writestr(name, data)
+                    yield sink.drain()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    elapsed = time.perf_counter() - started
+    total = sum(w["slips"] for w in per_worker.values())
+    stats.update({
+        "slips": total,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "slips_per_sec": round(total / elapsed, 1) if elapsed else None,
+        "per_worker": [
+            {
+                "pid": pid,
+                "slips": w["slips"],
+                "busy_seconds": round(w["seconds"], 3),
+                "slips_per_sec": round(w["slips"] / w["seconds"], 1) if w["seconds"] else None,
+            }
+            for pid, w in sorted(per_worker.items())
+        ],
+    })
+
+    archive.writestr("manifest.json", json.dumps(stats, indent=2))
+    archive.close()
+    yield sink.drain()
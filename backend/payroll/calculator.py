@@ -0,0 +1,90 @@
+"""
+The payroll formula, shared by every generation path.
+
+    net = basic * (present_days + paid_leave_days) / working_days
+    lop_days = working_days - present_days - paid_leave_days
+
+Money is computed in integer paise. Salaries are converted exactly from
+Decimal at the boundary. A whole batch of employees is then computed at
+once with NumPy int64 arrays, so no float touches a salary. The net is
+rounded half-up to the paisa with integer arithmetic, then converted back
+to Decimal. The engine calls calculate_batch for a month of employees;
+calculate is the one-row form used by Payroll.save.
+
+Working days are the calendar days of the month (working_days). Present
+and paid-leave days come from payroll.working_status.
+"""
+from calendar import monthrange
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+FIELDS = (
+    "basic_salary",
+    "working_days",
+    "present_days",
+    "paid_leave_days",
+    "absent_days",
+    "lop_days",
+    "gross_salary",
+    "net_salary_value",
+)
+
+
+def working_days(year, month):
+    return monthrange(year, month)[1]
+
+
+def to_paise(amounts):
+    """Exact Decimal/str/int rupee amounts -> int64 array of paise."""
+    return np.array(
+        [int(Decimal(amount).scaleb(2).to_integral_value(ROUND_HALF_UP)) for amount in amounts],
+        dtype=np.int64,
+    )
+
+
+def from_paise(values):
+    """int64 paise -> Decimals with two places."""
+    return [Decimal(value).scaleb(-2) for value in values.tolist()]
+
+
+def calculate_batch(salaries, present_days, working_days, paid_leave_days=0):
+    """
+    Compute payroll figures for many employees at once.
+
+    ``salaries`` and ``present_days`` are equal-length sequences;
+    ``working_days`` and ``paid_leave_days`` are sequences or one value
+    for the whole batch.
+    Returns one dict per employee keyed by Payroll field name (FIELDS).
+    """
+    basic = to_paise(salaries)
+    working = np.broadcast_to(np.asarray(working_days, dtype=np.int64), basic.shape)
+    if (working < 1).any():
+        raise ValueError("working_days must be at least 1")
+
+    present = np.clip(np.asarray(present_days, dtype=np.int64), 0, working)
+    paid_leave = np.broadcast_to(np.asarray(paid_leave_days, dtype=np.int64), basic.shape)
+    paid_leave = np.clip(paid_leave, 0, working - present)
+    absent = working - present
+    lop = absent - paid_leave
+    payable = present + paid_leave
+    # round_half_up(basic * payable / working) without leaving integers
+    net = (2 * basic * payable + working) // (2 * working)
+
+    basic_salary = from_paise(basic)
+    columns = (
+        basic_salary,
+        working.tolist(),
+        present.tolist(),
+        paid_leave.tolist(),
+        absent.tolist(),
+        lop.tolist(),
+        basic_salary,
+        from_paise(net),
+    )
+    return [dict(zip(FIELDS, values)) for values in zip(*columns)]
+
+
+def calculate(salary, present_days, working_days, paid_leave_days=0):
+    """Payroll figures for a single employee (see calculate_batch)."""
+    return calculate_batch([salary], [present_days], working_days, [paid_leave_days])[0]
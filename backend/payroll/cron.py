@@ -1,7 +1,11 @@
 from datetime import date
-from employees.models import Employee
-from attendance.models import Attendance
-from .models import Payroll
+from .engine import run_payroll
+
+
+def _previous_month(today):
+    month = today.month - 1 if today.month > 1 else 12
+    year = today.year if today.month > 1 else today.year - 1
+    return year, month
 
 
 def generate_monthly_payroll():
@@ -10,47 +14,11 @@ def generate_monthly_payroll():
     # Only run on 1st day of each month
     if today.day != 1:
         return
-    
-    month = today.month - 1 if today.month > 1 else 12
-    year = today.year if today.month > 1 else today.year - 1
-
-    employees = Employee.objects.all()
-
-    for emp in employees:
-
-        # Count present days
-        present_days = Attendance.objects.filter(
-            employee=emp,
-            date__month=month,
-            date__year=year,
-        ).count()
 
-        working_days = 30
-        absent_days = working_days - present_days
-        lop_days = absent_days
+    # Upsert on (employee, month, year): re-running never duplicates rows
+    stats = run_payroll(*_previous_month(today))
 
-        daily_salary = emp.salary / working_days
-        lop_amount = daily_salary * lop_days
-
-        gross_salary = emp.salary
-        net_salary = emp.salary - lop_amount
-
-        Payroll.objects.create(
-            employee=emp,
-            month=month,
-            year=year,
-            basic_salary=emp.salary,
-            working_days=working_days,
-            present_days=present_days,
-            absent_days=absent_days,
-            lop_days=lop_days,
-            overtime_hours=0,
-            overtime_pay=0,
-            gross_salary=gross_salary,
-            net_salary=net_salary,
-        )
-
-    print("Payroll generated successfully for previous month.")
+    print(f"Payroll generated successfully for previous month ({stats['rows']} employees).")
 
 def auto_generate_payroll():
     today = date.today()
@@ -58,39 +26,7 @@ def auto_generate_payroll():
     # Only run on 1st day of month
     if today.day != 1:
         return
-    
-    month = today.month - 1 if today.month > 1 else 12
-    year = today.year if today.month > 1 else today.year - 1
-
-    employees = Employee.objects.all()
-
-    for emp in employees:
-        present_days = Attendance.objects.filter(
-            employee=emp,
-            date__month=month,
-            date__year=year
-        ).count()
-
-        working_days = 30
-        absent_days = working_days - present_days
-        lop_days = absent_days
-
-        daily_salary = emp.salary / working_days
-        lop_amount = daily_salary * lop_days
 
-        Payroll.objects.create(
-            employee=emp,
-            month=month,
-            year=year,
-            basic_salary=emp.salary,
-            working_days=working_days,
-            present_days=present_days,
-            absent_days=absent_days,
-            lop_days=lop_days,
-            overtime_hours=0,
-            overtime_pay=0,
-            gross_salary=emp.salary,
-            net_salary=emp.salary - lop_amount
-        )
+    run_payroll(*_previous_month(today))
 
-    print("Payroll auto generated!")
\ No newline at end of file
+    print("Payroll auto generated!")
@@ -0,0 +1,126 @@
+"""
+Bulk payslip e-mail.
+
+A PayslipMailing covers every payroll row of one month. It is split into
+batches that payroll.tasks.send_payslip_batch sends as separate Celery
+tasks. Each batch renders its PDFs in memory (through the payslip cache),
+opens a single mail connection and sends every message over it.
+
+A refused recipient or sender, a rejected message body (e.g. 552, too
+large), or any other error while rendering or sending one payslip, fails
+only that message. So does a payroll row deleted after
+the mailing was started, so sent + failed still reaches the total and
+the mailing finishes. A connection-level error stops the batch, and the
+caller retries just the messages not yet sent, so nobody gets the same
+payslip twice. Progress lives on the
+PayslipMailing row and is updated with F() increments, because batches
+finish concurrently.
+"""
+import smtplib
+
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Payroll, PayslipMailing
+from .pdf_cache import get_payslip_pdf
+
+# SMTP errors about one message; the server has reset the transaction and
+# the connection can carry the next payslip
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+# ...unless the reply is 421: the server is closing the connection
+SERVICE_CLOSING = 421
+
+
+def payslip_message(payroll, connection=None):
+    email = EmailMessage(
+        subject=f"Salary Slip {payroll.month}/{payroll.year}",
+        body=f"Dear {payroll.employee.name}, your payslip is attached.",
+        to=[payroll.employee.email],
+        connection=connection,
+    )
+    email.attach(f"salary_slip_{payroll.id}.pdf", get_payslip_pdf(payroll, "salary_slip"), "application/pdf")
+    return email
+
+
+def record_progress(mailing_id, sent=0, failed=0, error=""):
+    """Add a batch's counts to the mailing and close it once all are done."""
+    updates = {"sent": F("sent") + sent, "failed": F("failed") + failed}
+    if error:
+        updates["last_error"] = error
+    PayslipMailing.objects.filter(pk=mailing_id).update(**updates)
+
+    PayslipMailing.objects.filter(
+        pk=mailing_id, status="RUNNING", total__lte=F("sent") + F("failed")
+    ).update(status="DONE", finished_on=timezone.now())
+
+
+def send_batch(mailing_id, payroll_ids):
+    """
+    Mail one batch over a single connection.
+
+    Returns (unsent ids, error): the ids left unsent by a connection
+    failure, to be retried, and the error text ("" when none).
+    """
+    payrolls = list(
+        Payroll.objects.filter(id__in=payroll_ids).select_related("employee").order_by("id")
+    )
+    sent = failed = 0
+    error = ""
+
+    missing = set(payroll_ids) - {payroll.id for payroll in payrolls}
+    if missing:
+        failed += len(missing)
+        error = f"{len(missing)} payroll row(s) no longer exist"
+
+    connection = get_connection()
+    try:
+        connection.open()
+        while payrolls:
+            payroll = payrolls[0]
+            if not payroll.employee.email:
+                failed += 1
+                error = f"{payroll.employee.emp_code}: no e-mail address"
+            else:
+                try:
+                    sent += connection.send_messages([payslip_message(payroll, connection)])
+                except MESSAGE_ERRORS as exc:
+                    if getattr(exc, "smtp_code", None) == SERVICE_CLOSING:
+                        raise
+                    failed += 1
+                    error = f"{payroll.employee.emp_code}: {type(exc).__name__}: {exc}"
+                except (smtplib.SMTPException, OSError):
+                    raise
+                except Exception as exc:
+                    # A payslip that cannot be rendered fails alone
+                    failed += 1
+                    error = f"{payroll.employee.emp_code}: {type(exc).__name__}: {exc}"
+            payrolls.pop(0)
+    except (smtplib.SMTPException, OSError) as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    finally:
+        try:
+            connection.close()
+        except (smtplib.SMTPException, OSError):
+            pass
+        record_progress(mailing_id, sent=sent, failed=failed, error=error)
+
+    return [payroll.id for payroll in payrolls], error
+
+
+def mailing_progress(mailing):
+    done = mailing.sent + mailing.failed
+    return {
+        "id": mailing.id,
+        "month": mailing.month,
+        "year": mailing.year,
+        "status": mailing.status,
+        "total": mailing.total,
+        "sent": mailing.sent,
+        "failed": mailing.failed,
+        "percent": round(done * 100 / mailing.total, 1) if mailing.total else 100.0,
+        "last_error": mailing.last_error,
+        "created_on": mailing.created_on,
+        "finished_on": mailing.finished_on,
+    }
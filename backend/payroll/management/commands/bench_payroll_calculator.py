@@ -0,0 +1,34 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from payroll.calculator import calculate_batch
+
+
+class Command(BaseCommand):
+    help = "Benchmark the vectorised payroll calculator on synthetic employees (no database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        count = options["employees"]
+        rng = random.Random(42)
+        salaries = [Decimal(rng.randrange(1_500_000, 25_000_000)).scaleb(-2) for _ in range(count)]
+        present = [rng.randrange(0, 32) for _ in range(count)]
+
+        timings = []
+        for _ in range(options["repeat"]):
+            started = time.perf_counter()
+            figures = calculate_batch(salaries, present, 30)
+            timings.append(time.perf_counter() - started)
+
+        best = min(timings)
+        total = sum(row["net_salary_value"] for row in figures)
+        self.stdout.write(
+            f"{count} employees: best {best:.3f}s of {len(timings)} "
+            f"({count / best:,.0f} employees/s), net total {total}"
+        )
@@ -0,0 +1,265 @@
+"""
+Payslip rendering micro-benchmark, before and after the page templates.
+
+The "before" column replays the per-slip renderers as they were prior to
+payroll.slip_templates (every slip rebuilds its header, tables, styles
+and footer from scratch). They are kept here, drawing the same fields as
+the current slips, so the speedup can be reproduced with one command.
+"""
+import datetime
+import time
+from decimal import Decimal
+from io import BytesIO
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
+
+from payroll.bulk_payslips import SLIPS_PER_TASK
+from payroll.payslip import generate_payslip_pdf
+from payroll.render_worker import payslip_filename, render_batch
+from payroll.utils import render_payroll_pdf
+
+
+def sample_payroll(n):
+    return SimpleNamespace(
+        id=n,
+        month=4,
+        year=2025,
+        basic_salary=Decimal("52000.00") + n,
+        paid_leave_days=0,
+        working_days=30,
+        present_days=28,
+        absent_days=2,
+        lop_days=2,
+        overtime_hours=Decimal("1.50"),
+        overtime_pay=Decimal("0.00"),
+        gross_salary=Decimal("52000.00") + n,
+        net_salary=48533.33 + n,
+        generated_on=datetime.datetime(2025, 5, 1),
+        employee=SimpleNamespace(
+            id=n,
+            emp_code=f"EMP{n:05d}",
+            name=f"Employee {n}",
+            department="Engineering",
+            role="Developer",
+            date_joined=datetime.date(2024, 1, 1),
+        ),
+    )
+
+
+# ===============================
+# BASELINE: PER-SLIP RENDERERS
+# ===============================
+def baseline_payroll_pdf(payroll):
+    """Salary slip drawn from scratch, as generate_payroll_pdf used to."""
+    output = BytesIO()
+    c = canvas.Canvas(output, pagesize=A4)
+
+    width, height = A4
+    margin = 20 * mm
+    cursor_y = height - margin
+
+    c.setFont("Helvetica-Bold", 18)
+    c.setFillColor(colors.HexColor("#0052cc"))
+    c.drawString(margin, cursor_y, "CLOUD HRMS PAYROLL SYSTEM")
+
+    c.setFont("Helvetica", 10)
+    c.setFillColor(colors.black)
+    c.drawString(margin, cursor_y - 15, "Professional Salary Slip (Auto-Generated)")
+
+    cursor_y -= 40
+
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(margin, cursor_y, "Employee Information")
+
+    cursor_y -= 10
+    c.setFont("Helvetica", 10)
+    c.drawString(margin, cursor_y, f"Name: {payroll.employee.name}")
+    c.drawString(margin + 200, cursor_y, f"Employee ID: {payroll.employee.id}")
+
+    cursor_y -= 12
+    dept = getattr(payroll.employee, "department", "N/A")
+    c.drawString(margin, cursor_y, f"Department: {dept}")
+    c.drawString(margin + 200, cursor_y, f"Month-Year: {payroll.month}/{payroll.year}")
+
+    cursor_y -= 20
+
+    table_data = [
+        ["Description", "Value (₹)"],
+        ["Basic Salary", f"{payroll.basic_salary:.2f}"],
+        ["Working Days", f"{payroll.working_days}"],
+        ["Present Days", f"{payroll.present_days}"],
+        ["Paid Leave Days", f"{payroll.paid_leave_days}"],
+        ["Absent Days", f"{payroll.absent_days}"],
+        ["Loss of Pay Days", f"{payroll.lop_days}"],
+        ["Gross Salary", f"{payroll.gross_salary:.2f}"],
+        ["Net Salary", f"{payroll.net_salary:.2f}"],
+    ]
+
+    table = Table(table_data, colWidths=[100 * mm, 60 * mm])
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0052cc")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+        ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+        ("FONTSIZE", (0, 0), (-1, -1), 10),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+    ]))
+
+    cursor_y -= 20
+    table.wrapOn(c, margin, cursor_y)
+    table.drawOn(c, margin, cursor_y - 180)
+
+    c.setFont("Helvetica-Oblique", 9)
+    c.drawString(margin, 30, "This is a computer-generated salary slip. No signature required.")
+    c.drawRightString(width - margin, 30, f"Generated on: {payroll.generated_on:%Y-%m-%d}")
+
+    c.save()
+    return output.getvalue()
+
+
+def baseline_payslip_pdf(payroll):
+    """Company payslip drawn from scratch, as generate_payslip_pdf used to."""
+    output = BytesIO()
+    pdf = canvas.Canvas(output, pagesize=A4)
+    width, height = A4
+
+    pdf.setFont("Helvetica-Bold", 20)
+    pdf.drawString(40, height - 50, "XYZ Technologies Pvt. Ltd.")
+
+    pdf.setFont("Helvetica", 11)
+    pdf.drawString(40, height - 70, "Chennai, Tamil Nadu, India")
+    pdf.drawString(40, height - 85, "Email: hr@xyztech.com | Phone: +91-9876543210")
+
+    pdf.line(30, height - 95, width - 30, height - 95)
+
+    pdf.setFont("Helvetica-Bold", 15)
+    pdf.drawString(210, height - 120, "PAYSLIP")
+
+    pdf.setFont("Helvetica", 12)
+    pdf.drawString(210, height - 140, f"{payroll.month} / {payroll.year}")
+
+    employee_data = [
+        ["Employee Name", payroll.employee.name],
+        ["Employee Code", payroll.employee.emp_code],
+        ["Department", payroll.employee.department],
+        ["Role", payroll.employee.role],
+        ["Date Joined", str(payroll.employee.date_joined)],
+    ]
+
+    table = Table(employee_data, colWidths=[120, 300])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('BOX', (0, 0), (-1, -1), 1, colors.black),
+        ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONT', (0, 0), (-1, -1), 'Helvetica', 11),
+    ]))
+
+    table.wrapOn(pdf, 30, height - 350)
+    table.drawOn(pdf, 30, height - 330)
+
+    salary_data = [
+        ["Basic Salary", f"₹ {payroll.basic_salary}"],
+        ["Working Days", payroll.working_days],
+        ["Present Days", payroll.present_days],
+        ["Absent Days", payroll.absent_days],
+        ["Loss of Pay (LOP)", payroll.lop_days],
+        ["Overtime Hours", payroll.overtime_hours],
+        ["Overtime Pay", f"₹ {payroll.overtime_pay}"],
+        ["Gross Salary", f"₹ {payroll.gross_salary}"],
+        ["NET SALARY (Take Home)", f"₹ {payroll.net_salary}"],
+    ]
+
+    salary_table = Table(salary_data, colWidths=[200, 150])
+    salary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('BACKGROUND', (0, 8), (-1, 8), colors.lightgreen),
+        ('TEXTCOLOR', (0, 8), (-1, 8), colors.darkgreen),
+        ('BOX', (0, 0), (-1, -1), 1, colors.black),
+        ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONT', (0, 0), (-1, -1), 'Helvetica', 11),
+    ]))
+
+    salary_table.wrapOn(pdf, 30, height - 600)
+    salary_table.drawOn(pdf, 30, height - 610)
+
+    pdf.rect(400, 80, 150, 60)
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(410, 110, "Authorized Signature")
+    pdf.drawString(410, 90, "_____________________")
+
+    pdf.setFont("Helvetica-Oblique", 9)
+    pdf.drawString(30, 50, "This is a computer-generated payslip and does not require a signature.")
+
+    pdf.showPage()
+    pdf.save()
+    return output.getvalue()
+
+
+def baseline_batch(payloads):
+    """render_batch's loop over the per-slip baseline renderer."""
+    return [(payslip_filename(p), baseline_payroll_pdf(p)) for p in payloads]
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark payslip rendering: slips/sec for single slips "
+        "(salary slip and payslip) and for in-process bulk batches, before "
+        "and after the pre-built page templates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        payrolls = [sample_payroll(n) for n in range(count)]
+
+        batches = [payrolls[i:i + SLIPS_PER_TASK] for i in range(0, count, SLIPS_PER_TASK)]
+
+        # Warm the page templates so "after" measures steady state, as in
+        # a long-lived worker
+        render_payroll_pdf(payrolls[0])
+        generate_payslip_pdf(payrolls[0])
+
+        self.stdout.write(f"{count} slips, slips/s (ms/slip)")
+        self.stdout.write(f"{'':<20} {'before':>18} {'after':>18} {'speedup':>8}")
+        self.compare(
+            "single salary_slip",
+            lambda: [baseline_payroll_pdf(p) for p in payrolls],
+            lambda: [render_payroll_pdf(p) for p in payrolls],
+            count,
+        )
+        self.compare(
+            "single payslip",
+            lambda: [baseline_payslip_pdf(p) for p in payrolls],
+            lambda: [generate_payslip_pdf(p) for p in payrolls],
+            count,
+        )
+        self.compare(
+            "bulk salary_slip",
+            lambda: [baseline_batch(batch) for batch in batches],
+            lambda: [render_batch(batch) for batch in batches],
+            count,
+        )
+
+    def compare(self, label, before, after, count):
+        before, after = self.time(before), self.time(after)
+        self.stdout.write(
+            f"{label:<20} {self.rate(before, count):>18} {self.rate(after, count):>18} "
+            f"{before / after:>7.2f}x"
+        )
+
+    def time(self, run):
+        started = time.perf_counter()
+        run()
+        return time.perf_counter() - started
+
+    def rate(self, elapsed, count):
+        return f"{count / elapsed:.0f} ({elapsed / count * 1000:.2f})"
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from payroll.summary import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly payroll rollup from raw Payroll rows."
+
+    def handle(self, *args, **options):
+        months = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt payroll rollup for {months} month(s)"))
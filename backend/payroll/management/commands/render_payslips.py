@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from payroll.bulk_payslips import stream_payslip_zip
+
+
+class Command(BaseCommand):
+    help = "Render every payslip of a month into a ZIP with a process pool and report throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, required=True)
+        parser.add_argument("--month", type=int, required=True)
+        parser.add_argument("--workers", type=int, help="Pool size (default: one per core)")
+        parser.add_argument("--out", default=None, help="ZIP path (default: payslips_<year>_<month>.zip)")
+
+    def handle(self, *args, **options):
+        path = options["out"] or f"payslips_{options['year']}_{options['month']:02d}.zip"
+        stats = {}
+        with open(path, "wb") as out:
+            for chunk in stream_payslip_zip(options["year"], options["month"], options["workers"], stats):
+                out.write(chunk)
+
+        self.stdout.write(
+            f"{stats['slips']} payslips in {stats['seconds']}s with {stats['workers']} workers "
+            f"({stats['slips_per_sec']} slips/s) -> {path}"
+        )
+        for worker in stats["per_worker"]:
+            self.stdout.write(f"  pid {worker['pid']}: {worker['slips']} slips, {worker['slips_per_sec']} slips/s")
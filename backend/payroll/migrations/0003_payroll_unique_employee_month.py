@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:48
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def remove_duplicate_payrolls(apps, schema_editor):
+    # Older generators could create several rows for the same month;
+    # keep the most recent one so the unique constraint can be added.
+    Payroll = apps.get_model("payroll", "Payroll")
+    latest = (
+        Payroll.objects.values("employee", "month", "year")
+        .annotate(keep_id=Max("id"))
+        .values_list("keep_id", flat=True)
+    )
+    Payroll.objects.exclude(id__in=list(latest)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_employee_status'),
+        ('payroll', '0002_rename_net_salary_payroll_net_salary_value'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payroll',
+            name='working_days',
+            field=models.IntegerField(default=30),
+        ),
+        migrations.RunPython(remove_duplicate_payrolls, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='payroll',
+            constraint=models.UniqueConstraint(fields=('employee', 'month', 'year'), name='payroll_unique_employee_month'),
+        ),
+    ]
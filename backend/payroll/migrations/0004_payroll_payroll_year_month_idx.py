@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_employee_status'),
+        ('payroll', '0003_payroll_unique_employee_month'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payroll',
+            index=models.Index(fields=['year', 'month'], name='payroll_year_month_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_employee_status'),
+        ('payroll', '0005_payslipmailing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payroll',
+            name='is_stale',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='payroll',
+            index=models.Index(condition=models.Q(('is_stale', True)), fields=['year', 'month'], name='payroll_stale_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0008_payrollmonthlysummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payroll',
+            name='paid_leave_days',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='payroll',
+            name='unpaid_leave_days',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0009_payroll_leave_days'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payrollrunshard',
+            name='updated_on',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,8 +1,10 @@
 from django.db import models
+from django.utils import timezone
 from employees.models import Employee
+from .calculator import calculate
 
 class Payroll(models.Model):
-    employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="payrolls")
 
     month = models.IntegerField()
     year = models.IntegerField()
@@ -10,24 +12,47 @@ class Payroll(models.Model):
     basic_salary = models.DecimalField(max_digits=10, decimal_places=2)
     working_days = models.IntegerField(default=30)
     present_days = models.IntegerField(default=0)
+    # Approved leave on days not present (see payroll.working_status)
+    paid_leave_days = models.IntegerField(default=0)
+    unpaid_leave_days = models.IntegerField(default=0)
+    absent_days = models.IntegerField(default=0)
+    lop_days = models.IntegerField(default=0)
+
+    overtime_hours = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    overtime_pay = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
     gross_salary = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     net_salary_value = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
-    def save(self, *args, **kwargs):
-        # Calculate gross salary
-        self.gross_salary = float(self.basic_salary)
-
-        # Salary per day
-        per_day = float(self.basic_salary) / self.working_days
+    generated_on = models.DateTimeField(auto_now_add=True)
 
-        # Loss of pay
-        lop = self.working_days - int(self.present_days)
+    # Set when attendance of this employee/month changes after generation;
+    # cleared when the engine recomputes the row (see engine.recompute_stale)
+    is_stale = models.BooleanField(default=False)
 
-        # Net salary calculation
-        net = float(self.basic_salary) - (per_day * lop)
+    class Meta:
+        indexes = [
+            models.Index(fields=["year", "month"], name="payroll_year_month_idx"),
+            # Stale rows only: the recompute pass scans a tiny index
+            models.Index(
+                fields=["year", "month"],
+                condition=models.Q(is_stale=True),
+                name="payroll_stale_idx",
+            ),
+        ]
+        constraints = [
+            # One payroll row per employee per month (bulk upsert key)
+            models.UniqueConstraint(
+                fields=["employee", "month", "year"],
+                name="payroll_unique_employee_month",
+            ),
+        ]
 
-        self.net_salary_value = round(net, 2)
+    def save(self, *args, **kwargs):
+        # Derived figures always come from the shared calculator
+        figures = calculate(self.basic_salary, self.present_days, self.working_days, self.paid_leave_days)
+        for field, value in figures.items():
+            setattr(self, field, value)
 
         super().save(*args, **kwargs)
 
@@ -38,3 +63,90 @@ class Payroll(models.Model):
 
     def __str__(self):
         return f"{self.employee.name} - {self.month}/{self.year}"
+
+
+class PayslipMailing(models.Model):
+    """A bulk payslip e-mail job for one month, with its progress counters."""
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+    ]
+
+    month = models.IntegerField()
+    year = models.IntegerField()
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    total = models.IntegerField(default=0)
+    sent = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    created_on = models.DateTimeField(auto_now_add=True)
+    finished_on = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Payslip mailing {self.month}/{self.year} ({self.status})"
+
+
+class PayrollRun(models.Model):
+    """A month of payroll generated as employee-id shards across Celery workers."""
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    ]
+
+    month = models.IntegerField()
+    year = models.IntegerField()
+    shard_size = models.IntegerField(default=500)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    created_on = models.DateTimeField(auto_now_add=True)
+    finished_on = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Payroll run {self.month}/{self.year} ({self.status})"
+
+
+class PayrollRunShard(models.Model):
+    """One contiguous employee-id range of a PayrollRun."""
+    run = models.ForeignKey(PayrollRun, on_delete=models.CASCADE, related_name="shards")
+    number = models.IntegerField()
+    first_employee_id = models.BigIntegerField()
+    last_employee_id = models.BigIntegerField()
+
+    status = models.CharField(max_length=20, choices=PayrollRun.STATUS_CHOICES, default="PENDING")
+    rows = models.IntegerField(default=0)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    finished_on = models.DateTimeField(null=True, blank=True)
+    # Last status change or heartbeat; a run whose shards all sat still is resumable
+    updated_on = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["run", "number"], name="payroll_run_shard_number"),
+        ]
+
+    def __str__(self):
+        return f"Shard {self.number} of run {self.run_id} ({self.status})"
+
+
+class PayrollMonthlySummary(models.Model):
+    """Per-month payroll totals, refreshed whenever that month's payroll changes."""
+    month = models.IntegerField()
+    year = models.IntegerField()
+    employees = models.IntegerField(default=0)
+    total_gross = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_net = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["year", "month"], name="payroll_summary_year_month"),
+        ]
+
+    def __str__(self):
+        return f"{self.month}/{self.year} | {self.employees} employees"
@@ -0,0 +1,99 @@
+"""
+Content-addressed cache for rendered payslip PDFs.
+
+A payslip is keyed by a SHA-256 of the payroll row, the employee fields
+printed on it and the template used, so a changed row can never be
+served a stale PDF. Rendering is deterministic: the canvases are
+invariant (no timestamp or random document id) and the slip prints the
+row's generated_on, not today's date. Equal digests therefore mean equal
+bytes in every process, and the digest doubles as a strong ETag: a
+client that already holds the current PDF gets ``304 Not Modified``
+after a single indexed lookup, without rendering.
+
+Entries are also dropped eagerly from the Payroll/Employee post_save
+signals (see payroll.signals) so stale PDFs do not linger in the cache.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .utils import render_payroll_pdf
+from .payslip import generate_payslip_pdf
+
+CACHE_TIMEOUT = getattr(settings, "PAYSLIP_CACHE_TIMEOUT", 60 * 60 * 24 * 30)
+
+# Bump when a template changes so old renders are not served
+TEMPLATE_VERSION = "3"
+
+PAYROLL_FIELDS = (
+    "id", "month", "year", "basic_salary", "working_days", "present_days",
+    "paid_leave_days", "absent_days", "lop_days", "overtime_hours", "overtime_pay",
+    "gross_salary", "net_salary_value", "generated_on",
+)
+EMPLOYEE_FIELDS = ("id", "emp_code", "name", "department", "role", "date_joined")
+
+
+def _render_payslip(payroll):
+    return generate_payslip_pdf(payroll).content
+
+
+RENDERERS = {
+    "salary_slip": render_payroll_pdf,
+    "payslip": _render_payslip,
+}
+
+
+def payslip_digest(payroll, template):
+    digest = hashlib.sha256(f"{template}:{TEMPLATE_VERSION}".encode())
+    for field in PAYROLL_FIELDS:
+        digest.update(f"|{getattr(payroll, field)}".encode())
+    for field in EMPLOYEE_FIELDS:
+        digest.update(f"|{getattr(payroll.employee, field)}".encode())
+    return digest.hexdigest()
+
+
+def _index_key(payroll_id):
+    return f"payslip:index:{payroll_id}"
+
+
+def get_payslip_pdf(payroll, template, digest=None):
+    """Return the PDF bytes for a payroll row, rendering on a cache miss."""
+    digest = digest or payslip_digest(payroll, template)
+    key = f"payslip:pdf:{digest}"
+
+    data = cache.get(key)
+    if data is None:
+        data = RENDERERS[template](payroll)
+        cache.set(key, data, CACHE_TIMEOUT)
+        keys = cache.get(_index_key(payroll.id), set())
+        keys.add(key)
+        cache.set(_index_key(payroll.id), keys, CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_payslips(payroll_ids):
+    """Drop every cached render of the given payroll rows."""
+    index_keys = [_index_key(pk) for pk in payroll_ids]
+    stale = set()
+    for keys in cache.get_many(index_keys).values():
+        stale.update(keys)
+    cache.delete_many([*stale, *index_keys])
+
+
+def payslip_response(request, payroll, template, filename):
+    """Serve a payslip PDF with a strong ETag, answering 304 when current."""
+    digest = payslip_digest(payroll, template)
+    etag = f'"{digest}"'
+
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(get_payslip_pdf(payroll, template, digest), content_type="application/pdf")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
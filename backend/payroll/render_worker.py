@@ -0,0 +1,24 @@
+"""
+Process-pool side of bulk payslip rendering.
+
+Pool workers are spawned fresh and never call django.setup(), so this
+module must only import the ReportLab renderers in payroll.utils, never
+models or settings.
+"""
+import os
+import time
+
+from .utils import render_payroll_pdf
+
+
+def payslip_filename(payload):
+    return f"payslip_{payload.employee.emp_code}_{payload.year}_{payload.month:02d}.pdf"
+
+
+def render_batch(payloads):
+    """Render a batch of payslip payloads; returns (pid, seconds, files)."""
+    started = time.perf_counter()
+    files = []
+    for payload in payloads:
+        files.append((payslip_filename(payload), render_payroll_pdf(payload)))
+    return os.getpid(), time.perf_counter() - started, files
@@ -0,0 +1,162 @@
+"""
+Sharded payroll runs.
+
+A PayrollRun splits a month into contiguous employee-id ranges
+(PayrollRunShard). payroll.tasks fans the shards out as a Celery chord,
+so any number of workers can share one run. Each shard is an engine run
+over its employees, and the engine's upsert makes a shard safe to run
+again. The dashboard rollup is refreshed once, by finish_run, rather
+than after every shard. Every shard records its own status, so a
+crashed or failed run can be resumed: only the shards that are not DONE
+are reset and queued again.
+
+A running shard works through its range in slices of HEARTBEAT_EVERY
+employees and bumps its updated_on after each one, so a long shard
+keeps showing signs of life. A run can be resumed when it is FAILED, or
+when it is RUNNING but none of its unfinished shards has been updated
+for RUN_STALLED_AFTER (its workers are gone). claim_resume checks that
+and resets the shards in one transaction under a lock on the run, so
+two concurrent resumes cannot both queue the same shards. A chord left
+over from before the resume may still call finish_run; it only closes
+the run once no shard is pending or running.
+"""
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.utils import timezone
+
+from employees.models import Employee
+from .engine import run_payroll
+from .models import PayrollRun, PayrollRunShard
+from .summary import refresh_month
+
+RUN_STALLED_AFTER = timedelta(seconds=getattr(settings, "PAYROLL_RUN_STALLED_SECONDS", 30 * 60))
+# Employees per engine call within a shard, i.e. between two heartbeats
+HEARTBEAT_EVERY = getattr(settings, "PAYROLL_SHARD_HEARTBEAT_EVERY", 100)
+
+
+def plan_shards(run_id):
+    """Create the shards of a new run; returns their ids."""
+    run = PayrollRun.objects.get(pk=run_id)
+    employee_ids = Employee.objects.order_by("id").values_list("id", flat=True).iterator()
+
+    shards = []
+    while chunk := list(islice(employee_ids, run.shard_size)):
+        shards.append(PayrollRunShard(
+            run=run,
+            number=len(shards) + 1,
+            first_employee_id=chunk[0],
+            last_employee_id=chunk[-1],
+        ))
+
+    with transaction.atomic():
+        PayrollRunShard.objects.bulk_create(shards)
+        PayrollRun.objects.filter(pk=run_id).update(status="RUNNING")
+    return list(run.shards.order_by("number").values_list("id", flat=True))
+
+
+def claim_resume(run_id):
+    """Reset a resumable run's unfinished shards; returns their ids, or None if it is not resumable."""
+    now = timezone.now()
+    with transaction.atomic():
+        PayrollRun.objects.select_for_update().filter(pk=run_id).exists()
+
+        busy = PayrollRunShard.objects.filter(
+            run=OuterRef("pk"), updated_on__gt=now - RUN_STALLED_AFTER
+        ).exclude(status="DONE")
+        claimed = PayrollRun.objects.filter(
+            Q(status="FAILED") | Q(~Exists(busy), status="RUNNING"), pk=run_id
+        ).update(status="RUNNING", finished_on=None)
+        if not claimed:
+            return None
+
+        shards = PayrollRunShard.objects.filter(run_id=run_id).exclude(status="DONE")
+        shard_ids = list(shards.order_by("number").values_list("id", flat=True))
+        shards.update(status="PENDING", error="", updated_on=now)
+    return shard_ids
+
+
+def run_shard(shard_id):
+    """Generate payroll for one shard's employee-id range."""
+    shard = PayrollRunShard.objects.select_related("run").get(pk=shard_id)
+    PayrollRunShard.objects.filter(pk=shard_id).update(
+        status="RUNNING", attempts=F("attempts") + 1, updated_on=timezone.now()
+    )
+
+    employee_ids = list(
+        Employee.objects.filter(id__gte=shard.first_employee_id, id__lte=shard.last_employee_id)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    rows = 0
+    for start in range(0, len(employee_ids), HEARTBEAT_EVERY):
+        # One shard's rows are only part of the month: finish_run refreshes the rollup
+        stats = run_payroll(
+            shard.run.year, shard.run.month, employee_ids[start:start + HEARTBEAT_EVERY], refresh=False
+        )
+        rows += stats["rows"]
+        # Heartbeat: a shard still making progress is never taken as stalled
+        PayrollRunShard.objects.filter(pk=shard_id, status="RUNNING").update(updated_on=timezone.now())
+
+    now = timezone.now()
+    PayrollRunShard.objects.filter(pk=shard_id).update(
+        status="DONE", rows=rows, error="", finished_on=now, updated_on=now
+    )
+    return {"rows": rows}
+
+
+def fail_shard(shard_id, error):
+    now = timezone.now()
+    PayrollRunShard.objects.filter(pk=shard_id).update(
+        status="FAILED", error=error, finished_on=now, updated_on=now
+    )
+
+
+def finish_run(run_id):
+    """Close a run once its shards have reported: DONE, or FAILED if any shard failed."""
+    shards = PayrollRunShard.objects.filter(run_id=run_id)
+    if shards.filter(status__in=("PENDING", "RUNNING")).exists():
+        # A resume has queued them again; its own chord closes the run
+        return
+    unfinished = shards.exclude(status="DONE").exists()
+    PayrollRun.objects.filter(pk=run_id).update(
+        status="FAILED" if unfinished else "DONE", finished_on=timezone.now()
+    )
+    run = PayrollRun.objects.get(pk=run_id)
+    refresh_month(run.year, run.month)
+
+
+def run_progress(run):
+    counts = run.shards.aggregate(
+        total=Count("id"),
+        done=Count("id", filter=Q(status="DONE")),
+        failed=Count("id", filter=Q(status="FAILED")),
+        running=Count("id", filter=Q(status="RUNNING")),
+        rows=Sum("rows", filter=Q(status="DONE")),
+    )
+    total = counts["total"]
+    return {
+        "id": run.id,
+        "month": run.month,
+        "year": run.year,
+        "status": run.status,
+        "shard_size": run.shard_size,
+        "shards": {
+            "total": total,
+            "done": counts["done"],
+            "failed": counts["failed"],
+            "running": counts["running"],
+            "pending": total - counts["done"] - counts["failed"] - counts["running"],
+        },
+        "rows": counts["rows"] or 0,
+        "percent": round(counts["done"] * 100 / total, 1) if total else 0.0,
+        "errors": [
+            {"shard": number, "error": error}
+            for number, error in run.shards.filter(status="FAILED").order_by("number").values_list("number", "error")
+        ],
+        "created_on": run.created_on,
+        "finished_on": run.finished_on,
+    }
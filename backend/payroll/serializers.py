@@ -10,6 +10,7 @@ class PayrollSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payroll
         fields = "__all__"
+        read_only_fields = ["is_stale"]
 
     def get_month_name(self, obj):
         import calendar
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from employees.models import Employee
+from attendance.models import Attendance
+from attendance.signals import attendance_changed
+from leave.models import Leave
+from .models import Payroll
+from .engine import mark_stale
+from .pdf_cache import invalidate_payslips
+from .summary import refresh_month
+
+
+@receiver(post_save, sender=Payroll)
+@receiver(post_delete, sender=Payroll)
+def drop_cached_payslip(sender, instance, **kwargs):
+    invalidate_payslips([instance.pk])
+
+
+@receiver(post_save, sender=Payroll)
+@receiver(post_delete, sender=Payroll)
+def refresh_payroll_summary(sender, instance, **kwargs):
+    # After commit, so the cache never holds totals that were rolled back
+    transaction.on_commit(lambda: refresh_month(instance.year, instance.month))
+
+
+@receiver(post_save, sender=Employee)
+def drop_employee_payslips(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_payslips(list(instance.payrolls.values_list("id", flat=True)))
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def mark_payroll_stale(sender, instance, **kwargs):
+    mark_stale([(instance.employee_id, instance.date)])
+
+
+@receiver(attendance_changed)
+def mark_payroll_stale_bulk(sender, changes, **kwargs):
+    mark_stale(changes)
+
+
+@receiver(post_save, sender=Leave)
+@receiver(post_delete, sender=Leave)
+def mark_payroll_stale_for_leave(sender, instance, **kwargs):
+    # Only approved leave changes pay, whether before or after this save
+    if "APPROVED" not in (instance.status, instance.previous("status")):
+        return
+    # An edit frees the old dates (and employee) as well as taking the new ones
+    intervals = {
+        (instance.employee_id, instance.start_date, instance.end_date),
+        (instance.previous("employee_id"), instance.previous("start_date"), instance.previous("end_date")),
+    }
+    months = set()
+    for employee_id, start, end in intervals:
+        day = start.replace(day=1)
+        while day <= end:
+            months.add((employee_id, day))
+            day = (day + timedelta(days=32)).replace(day=1)
+    mark_stale(months)
@@ -0,0 +1,263 @@
+"""
+Pre-built payslip page templates.
+
+The header, company block, table grids, labels and footer of a payslip
+are identical for every employee. A PageTemplate draws them once per
+process onto a scratch canvas and keeps the resulting content stream;
+each slip then replays that stream verbatim and only typesets its
+variable fields, in a single text object, at positions recorded while
+the static tables were laid out.
+
+Kept free of Django imports, like payroll.utils: bulk payslip pool
+workers render through this module without django.setup().
+"""
+from functools import cache
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Flowable, Table, TableStyle
+
+# Registered on every canvas in this order so the font resource names
+# (/F1, /F2, ...) inside a recorded content stream stay valid on replay
+FONTS = ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique")
+
+BRAND_BLUE = colors.HexColor("#0052cc")
+
+
+class Slot(Flowable):
+    """Empty table cell that records where its value is to be typeset."""
+
+    def __init__(self, name, fontname, fontsize, leading=None, color=colors.black):
+        super().__init__()
+        self.name = name
+        self.fontname = fontname
+        self.fontsize = fontsize
+        self.leading = leading if leading is not None else fontsize * 1.2
+        self.color = color
+        self.position = None
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        # Table cells are bottom aligned: a one-line string's baseline
+        # sits ``leading - fontsize`` above the bottom padding
+        self.position = (x, y + self.leading - self.fontsize)
+
+
+class PageTemplate:
+    """Static page content drawn once per process and replayed per slip."""
+
+    def __init__(self, draw_static, pagesize=A4):
+        self.pagesize = pagesize
+        self.slots = {}
+
+        canvas = self.new_canvas(BytesIO())
+        start = len(canvas.getCurrentPageContent())
+        draw_static(canvas, self)
+        self.content = canvas.getCurrentPageContent()[start:]
+
+    def new_canvas(self, output):
+        # invariant: no creation timestamp or random document id, so a
+        # slip's bytes depend only on what is drawn
+        canvas = Canvas(output, pagesize=self.pagesize, invariant=1)
+        for fontname in FONTS:
+            canvas.setFont(fontname, 10)
+        return canvas
+
+    def add_slot(self, name, x, y, fontname, fontsize, color=colors.black, align="left"):
+        self.slots[name] = (x, y, fontname, fontsize, color, align)
+
+    def draw_table(self, canvas, rows, col_widths, style, x, y):
+        """Draw a static table, turning its Slot cells into page slots."""
+        table = Table(rows, colWidths=col_widths)
+        table.setStyle(style)
+        table.wrapOn(canvas, *self.pagesize)
+        table.drawOn(canvas, x, y)
+        for row in rows:
+            for cell in row:
+                if isinstance(cell, Slot):
+                    sx, sy = cell.position
+                    self.add_slot(cell.name, x + sx, y + sy, cell.fontname, cell.fontsize, cell.color)
+
+    def draw(self, canvas, values):
+        """Replay the static content and typeset ``values`` (slot -> text)."""
+        canvas.saveState()
+        canvas.addLiteral(self.content)
+        canvas.restoreState()
+
+        text = canvas.beginText()
+        style = None
+        for name, value in values.items():
+            x, y, fontname, fontsize, color, align = self.slots[name]
+            value = str(value)
+            if (fontname, fontsize, color) != style:
+                style = (fontname, fontsize, color)
+                text.setFont(fontname, fontsize)
+                text.setFillColor(color)
+            if align == "right":
+                x -= stringWidth(value, fontname, fontsize)
+            text.setTextOrigin(x, y)
+            text.textOut(value)
+        canvas.drawText(text)
+
+
+# ===============================
+# SALARY SLIP (payroll.utils)
+# ===============================
+SALARY_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), BRAND_BLUE),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+    ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+    ("FONTSIZE", (0, 0), (-1, -1), 10),
+    ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+])
+
+SALARY_ROWS = (
+    ("basic_salary", "Basic Salary"),
+    ("working_days", "Working Days"),
+    ("present_days", "Present Days"),
+    ("paid_leave_days", "Paid Leave Days"),
+    ("absent_days", "Absent Days"),
+    ("lop_days", "Loss of Pay Days"),
+    ("gross_salary", "Gross Salary"),
+    ("net_salary", "Net Salary"),
+)
+
+
+def _draw_salary_slip(c, template):
+    width, height = template.pagesize
+    margin = 20 * mm
+    cursor_y = height - margin
+
+    # HEADER
+    c.setFont("Helvetica-Bold", 18)
+    c.setFillColor(BRAND_BLUE)
+    c.drawString(margin, cursor_y, "CLOUD HRMS PAYROLL SYSTEM")
+
+    c.setFont("Helvetica", 10)
+    c.setFillColor(colors.black)
+    c.drawString(margin, cursor_y - 15, "Professional Salary Slip (Auto-Generated)")
+
+    cursor_y -= 40
+
+    # EMPLOYEE INFO
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(margin, cursor_y, "Employee Information")
+
+    cursor_y -= 10
+    template.add_slot("name", margin, cursor_y, "Helvetica", 10)
+    template.add_slot("employee_id", margin + 200, cursor_y, "Helvetica", 10)
+
+    cursor_y -= 12
+    template.add_slot("department", margin, cursor_y, "Helvetica", 10)
+    template.add_slot("period", margin + 200, cursor_y, "Helvetica", 10)
+
+    cursor_y -= 40
+
+    # SALARY TABLE
+    table_data = [["Description", "Value (₹)"]]
+    table_data += [[label, Slot(name, "Helvetica", 10, leading=12)] for name, label in SALARY_ROWS]
+    template.draw_table(c, table_data, [100 * mm, 60 * mm], SALARY_TABLE_STYLE, margin, cursor_y - 180)
+
+    # FOOTER
+    c.setFont("Helvetica-Oblique", 9)
+    c.drawString(margin, 30, "This is a computer-generated salary slip. No signature required.")
+    template.add_slot("generated_on", width - margin, 30, "Helvetica-Oblique", 9, align="right")
+
+
+@cache
+def salary_slip_template():
+    return PageTemplate(_draw_salary_slip)
+
+
+# ===============================
+# PAYSLIP (payroll.payslip)
+# ===============================
+EMPLOYEE_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('BOX', (0, 0), (-1, -1), 1, colors.black),
+    ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('FONT', (0, 0), (-1, -1), 'Helvetica', 11),
+])
+
+PAYSLIP_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.lightgreen),
+    ('TEXTCOLOR', (0, -1), (-1, -1), colors.darkgreen),
+    ('BOX', (0, 0), (-1, -1), 1, colors.black),
+    ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('FONT', (0, 0), (-1, -1), 'Helvetica', 11),
+])
+
+EMPLOYEE_ROWS = (
+    ("employee_name", "Employee Name"),
+    ("emp_code", "Employee Code"),
+    ("department", "Department"),
+    ("role", "Role"),
+    ("date_joined", "Date Joined"),
+)
+
+PAYSLIP_ROWS = (
+    ("basic_salary", "Basic Salary"),
+    ("working_days", "Working Days"),
+    ("present_days", "Present Days"),
+    ("paid_leave_days", "Paid Leave Days"),
+    ("absent_days", "Absent Days"),
+    ("lop_days", "Loss of Pay (LOP)"),
+    ("overtime_hours", "Overtime Hours"),
+    ("overtime_pay", "Overtime Pay"),
+    ("gross_salary", "Gross Salary"),
+    ("net_salary", "NET SALARY (Take Home)"),
+)
+
+
+def _draw_payslip(pdf, template):
+    width, height = template.pagesize
+
+    # COMPANY HEADER
+    pdf.setFont("Helvetica-Bold", 20)
+    pdf.drawString(40, height - 50, "XYZ Technologies Pvt. Ltd.")
+
+    pdf.setFont("Helvetica", 11)
+    pdf.drawString(40, height - 70, "Chennai, Tamil Nadu, India")
+    pdf.drawString(40, height - 85, "Email: hr@xyztech.com | Phone: +91-9876543210")
+
+    # Divider line
+    pdf.line(30, height - 95, width - 30, height - 95)
+
+    # PAYSLIP TITLE
+    pdf.setFont("Helvetica-Bold", 15)
+    pdf.drawString(210, height - 120, "PAYSLIP")
+    template.add_slot("period", 210, height - 140, "Helvetica", 12)
+
+    # EMPLOYEE DETAILS TABLE
+    employee_data = [[label, Slot(name, "Helvetica", 11)] for name, label in EMPLOYEE_ROWS]
+    template.draw_table(pdf, employee_data, [120, 300], EMPLOYEE_TABLE_STYLE, 30, height - 330)
+
+    # SALARY DETAILS TABLE
+    salary_data = [[label, Slot(name, "Helvetica", 11)] for name, label in PAYSLIP_ROWS[:-1]]
+    name, label = PAYSLIP_ROWS[-1]
+    salary_data.append([label, Slot(name, "Helvetica", 11, color=colors.darkgreen)])
+    template.draw_table(pdf, salary_data, [200, 150], PAYSLIP_TABLE_STYLE, 30, height - 610)
+
+    # SIGNATURE BOX
+    pdf.rect(400, 80, 150, 60)
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(410, 110, "Authorized Signature")
+    pdf.drawString(410, 90, "_____________________")
+
+    # FOOTER
+    pdf.setFont("Helvetica-Oblique", 9)
+    pdf.drawString(30, 50, "This is a computer-generated payslip and does not require a signature.")
+
+
+@cache
+def payslip_template():
+    return PageTemplate(_draw_payslip)
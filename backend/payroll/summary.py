@@ -0,0 +1,120 @@
+"""
+Monthly payroll rollup behind the dashboard.
+
+PayrollMonthlySummary holds, per (year, month), how many employees were
+paid and the gross/net totals. refresh_month recomputes one month with a
+single combined aggregate, then writes the rollup row and, with a
+shared cache, the cached dashboard figures. It runs after commit of every Payroll
+post_save/post_delete and of every engine run (bulk upserts send no
+signals); a sharded run refreshes once, when its last shard reports.
+
+With REDIS_URL set the cache is shared, so figures written by a Celery
+worker are the ones every web process serves, and the month summary is
+served from cache. Without it each process would keep its own LocMem
+copy that other processes' refreshes never reach, so the month summary
+reads the rollup row instead (one indexed query). The yearly chart and
+the multi-year comparison read at most 12 rollup rows per year, and
+none of them scan payroll rows.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .models import Payroll, PayrollMonthlySummary
+
+CACHE_TIMEOUT = 60 * 60 * 24
+# Only a cache every process shares can be trusted to be current
+SHARED_CACHE = bool(getattr(settings, "REDIS_URL", None))
+
+
+def _cache_key(year, month):
+    return f"payroll:summary:{year}:{month}"
+
+
+def _figures(year, month, employees, total_gross, total_net):
+    return {
+        "year": year,
+        "month": month,
+        "salary_generated_for": employees,
+        "total_gross_salary": total_gross or 0,
+        "total_net_salary": total_net or 0,
+    }
+
+
+def refresh_month(year, month):
+    """Recompute a month from Payroll in one query; update rollup and cache."""
+    totals = Payroll.objects.filter(year=year, month=month).aggregate(
+        employees=Count("id"),
+        total_gross=Sum("gross_salary"),
+        total_net=Sum("net_salary_value"),
+    )
+
+    if totals["employees"]:
+        PayrollMonthlySummary.objects.bulk_create(
+            [PayrollMonthlySummary(year=year, month=month, **totals)],
+            update_conflicts=True,
+            unique_fields=["year", "month"],
+            update_fields=["employees", "total_gross", "total_net", "updated_on"],
+        )
+    else:
+        PayrollMonthlySummary.objects.filter(year=year, month=month).delete()
+
+    figures = _figures(year, month, **totals)
+    if SHARED_CACHE:
+        cache.set(_cache_key(year, month), figures, CACHE_TIMEOUT)
+    return figures
+
+
+def month_summary(year, month):
+    if SHARED_CACHE:
+        figures = cache.get(_cache_key(year, month))
+    else:
+        row = (
+            PayrollMonthlySummary.objects.filter(year=year, month=month)
+            .values("employees", "total_gross", "total_net")
+            .first()
+        )
+        figures = row and _figures(year, month, **row)
+    if figures is None:
+        figures = refresh_month(year, month)
+    return figures
+
+
+def year_chart(year):
+    return list(
+        PayrollMonthlySummary.objects.filter(year=year)
+        .order_by("month")
+        .values("month", "employees", total_gross_salary=F("total_gross"), total_net_salary=F("total_net"))
+    )
+
+
+def compare_years(years):
+    """Monthly and yearly totals for several years, from the rollup only."""
+    result = {
+        year: {"year": year, "peak_employees": 0, "total_gross_salary": 0, "total_net_salary": 0, "months": []}
+        for year in years
+    }
+    rows = PayrollMonthlySummary.objects.filter(year__in=years).order_by("year", "month")
+    for row in rows:
+        entry = result[row.year]
+        entry["months"].append({
+            "month": row.month,
+            "employees": row.employees,
+            "total_gross_salary": row.total_gross,
+            "total_net_salary": row.total_net,
+        })
+        entry["peak_employees"] = max(entry["peak_employees"], row.employees)
+        entry["total_gross_salary"] += row.total_gross
+        entry["total_net_salary"] += row.total_net
+    return [result[year] for year in years]
+
+
+def rebuild():
+    """Recompute the rollup for every month that has payroll. Returns the month count."""
+    months = list(Payroll.objects.values_list("year", "month").distinct().order_by())
+    with transaction.atomic():
+        PayrollMonthlySummary.objects.all().delete()
+        for year, month in months:
+            refresh_month(year, month)
+    return len(months)
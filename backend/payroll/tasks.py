@@ -1,10 +1,23 @@
-from celery import shared_task
+from celery import chord, shared_task
+from celery.exceptions import MaxRetriesExceededError
 from datetime import date
-from calendar import monthrange
 
-from employees.models import Employee
-from attendance.models import Attendance
-from payroll.models import Payroll
+from django.conf import settings
+
+from payroll.models import Payroll, PayrollRun, PayslipMailing
+from payroll.engine import recompute_stale
+from payroll.mailing import record_progress, send_batch
+from payroll import runs
+
+# Payslips per batch task, i.e. per SMTP connection
+MAIL_BATCH_SIZE = getattr(settings, "PAYSLIP_MAIL_BATCH_SIZE", 50)
+# Celery rate limit for batch tasks, per worker
+MAIL_RATE_LIMIT = getattr(settings, "PAYSLIP_MAIL_RATE_LIMIT", "30/m")
+MAIL_RETRY_DELAY = 60
+
+# Employees per payroll run shard
+PAYROLL_SHARD_SIZE = getattr(settings, "PAYROLL_SHARD_SIZE", 500)
+SHARD_RETRY_DELAY = 30
 
 
 @shared_task
@@ -27,49 +40,76 @@ def generate_monthly_payroll(year=None, month=None):
             month = today.month - 1
             year = today.year
 
-    working_days = monthrange(year, month)[1]
-    employees = Employee.objects.all()
-
-    count = 0
-
-    for emp in employees:
-        attendance = Attendance.objects.filter(
-            employee=emp,
-            date__year=year,
-            date__month=month
-        )
-
-        present_days = attendance.count()
-        absent_days = working_days - present_days
-        lop_days = absent_days
-
-        basic_salary = emp.salary
-        per_day_salary = basic_salary / working_days
-        lop_amount = per_day_salary * lop_days
-
-        gross_salary = basic_salary
-        net_salary = gross_salary - lop_amount
-
-        # ---------------------
-        # Prevent duplicates
-        # ---------------------
-        existing = Payroll.objects.filter(employee=emp, year=year, month=month).first()
-        if existing:
-            continue  # Skip duplicate payroll
-
-        Payroll.objects.create(
-            employee=emp,
-            month=month,
-            year=year,
-            basic_salary=basic_salary,
-            working_days=working_days,
-            present_days=present_days,
-            absent_days=absent_days,
-            lop_days=lop_days,
-            gross_salary=gross_salary,
-            net_salary=net_salary,
-        )
-
-        count += 1
-
-    return f"Generated payroll for {count} employees for {month}/{year}"
+    # Sharded across workers; upserts keep re-runs free of duplicates
+    run = PayrollRun.objects.create(year=year, month=month, shard_size=PAYROLL_SHARD_SIZE)
+    start_payroll_run(run.id)
+
+    return f"Started payroll run {run.id} for {month}/{year}"
+
+
+@shared_task
+def start_payroll_run(run_id, shard_ids=None):
+    """Plan a run's shards (unless resuming the given ones) and fan them out as a chord."""
+    if shard_ids is None:
+        shard_ids = runs.plan_shards(run_id)
+    if not shard_ids:
+        runs.finish_run(run_id)
+        return
+    chord(run_payroll_shard.s(shard_id) for shard_id in shard_ids)(finish_payroll_run.si(run_id))
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True, reject_on_worker_lost=True)
+def run_payroll_shard(self, shard_id):
+    """
+    Generate one shard. A worker crash redelivers the task (acks_late);
+    errors are retried, then recorded on the shard so the chord can close
+    the run and the shard can be resumed later.
+    """
+    try:
+        return runs.run_shard(shard_id)["rows"]
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc, countdown=SHARD_RETRY_DELAY * 2 ** self.request.retries)
+        runs.fail_shard(shard_id, f"{type(exc).__name__}: {exc}")
+        return 0
+
+
+@shared_task
+def finish_payroll_run(run_id):
+    runs.finish_run(run_id)
+
+
+@shared_task
+def recompute_stale_payroll():
+    """Recompute only the payroll rows whose attendance changed since generation."""
+    return recompute_stale()
+
+
+@shared_task
+def mail_payslips(mailing_id):
+    """Split a PayslipMailing into batches and queue one task per batch."""
+    mailing = PayslipMailing.objects.get(pk=mailing_id)
+    payroll_ids = list(
+        Payroll.objects.filter(year=mailing.year, month=mailing.month)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    PayslipMailing.objects.filter(pk=mailing_id).update(status="RUNNING", total=len(payroll_ids))
+
+    if not payroll_ids:
+        record_progress(mailing_id)
+    for i in range(0, len(payroll_ids), MAIL_BATCH_SIZE):
+        send_payslip_batch.delay(mailing_id, payroll_ids[i:i + MAIL_BATCH_SIZE])
+
+
+@shared_task(bind=True, max_retries=5, rate_limit=MAIL_RATE_LIMIT)
+def send_payslip_batch(self, mailing_id, payroll_ids):
+    """Send one batch over one connection; retry what a connection failure left unsent."""
+    unsent, error = send_batch(mailing_id, payroll_ids)
+    if not unsent:
+        return
+
+    try:
+        raise self.retry(args=(mailing_id, unsent), countdown=MAIL_RETRY_DELAY * 2 ** self.request.retries)
+    except MaxRetriesExceededError:
+        record_progress(mailing_id, failed=len(unsent), error=error)
@@ -1,3 +1,610 @@
+import json
+import smtplib
+import zipfile
+from datetime import date, timedelta
+from io import BytesIO
+from decimal import Decimal
+
+from unittest import skipUnless
+from unittest.mock import Mock, patch
+
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends import locmem
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+
+from hrms.celery import app as celery_app
+from employees.models import Employee
+from attendance.models import Attendance
+from leave.models import Leave
+from .models import Payroll, PayrollMonthlySummary, PayrollRun, PayrollRunShard, PayslipMailing
+from .engine import run_payroll
+from .working_status import resolve_month
+from . import calculator, engine, mailing, pdf_cache, runs, summary, tasks
+from .utils import render_payroll_pdf
+
+
+def make_employee(n, salary="30000.00", department="Engineering"):
+    return Employee.objects.create(
+        emp_code=f"E{n:04d}",
+        name=f"Employee {n}",
+        email=f"employee{n}@example.com",
+        department=department,
+        role="Engineer",
+        salary=Decimal(salary),
+        date_joined=date(2024, 1, 1),
+    )
+
+
+def mark_present(employee, *days):
+    for day in days:
+        record = Attendance.objects.create(employee=employee)
+        Attendance.objects.filter(pk=record.pk).update(date=day)
+
+
+def run_celery_eagerly(test):
+    eager = celery_app.conf.task_always_eager
+    celery_app.conf.task_always_eager = True
+    test.addCleanup(setattr, celery_app.conf, "task_always_eager", eager)
+
+
+class PayrollEngineTests(TestCase):
+    def test_computes_lop_from_distinct_present_days(self):
+        emp = make_employee(1)
+        # Two punches on the same day count once
+        mark_present(emp, date(2025, 4, 1), date(2025, 4, 1), date(2025, 4, 2))
+
+        stats = run_payroll(2025, 4)
+
+        payroll = Payroll.objects.get(employee=emp, year=2025, month=4)
+        self.assertEqual(stats["rows"], 1)
+        self.assertEqual(payroll.working_days, 30)
+        self.assertEqual(payroll.present_days, 2)
+        self.assertEqual(payroll.lop_days, 28)
+        self.assertEqual(payroll.net_salary_value, Decimal("2000.00"))
+
+    def test_rerun_updates_in_place(self):
+        emp = make_employee(1)
+        run_payroll(2025, 4)
+        mark_present(emp, date(2025, 4, 3))
+
+        run_payroll(2025, 4)
+
+        self.assertEqual(Payroll.objects.filter(employee=emp).count(), 1)
+        self.assertEqual(Payroll.objects.get(employee=emp).present_days, 1)
+
+    def test_query_count_is_independent_of_headcount(self):
+        for n in range(3):
+            make_employee(n)
+        small = run_payroll(2025, 4)["queries"]
+
+        for n in range(3, 30):
+            make_employee(n)
+        large = run_payroll(2025, 4)["queries"]
+
+        self.assertEqual(small, large)
+
+
+class WorkingStatusTests(TestCase):
+    def leave(self, employee, start, end, leave_type="SICK", status="APPROVED"):
+        return Leave.objects.create(
+            employee=employee, leave_type=leave_type, start_date=start, end_date=end, reason="-", status=status
+        )
+
+    def test_month_is_resolved_in_one_query(self):
+        emp, other = make_employee(1), make_employee(2)
+        mark_present(emp, date(2025, 4, 1), date(2025, 4, 2), date(2025, 4, 25))
+        # Clipped to April; the 2nd was worked anyway
+        self.leave(emp, date(2025, 3, 30), date(2025, 4, 3))
+        self.leave(emp, date(2025, 4, 24), date(2025, 4, 26), leave_type="UNPAID")
+        self.leave(emp, date(2025, 4, 10), date(2025, 4, 10), status="PENDING")
+        self.leave(other, date(2025, 4, 7), date(2025, 4, 8), leave_type="EARNED", status="REJECTED")
+
+        with self.assertNumQueries(1):
+            statuses = resolve_month(2025, 4)
+
+        self.assertEqual(
+            [(s.present_days, s.paid_leave_days, s.unpaid_leave_days, s.lop_days) for s in statuses],
+            [(3, 1, 2, 26), (0, 0, 0, 30)],
+        )
+
+    def test_approved_paid_leave_is_paid_and_marks_payroll_stale(self):
+        emp = make_employee(1)
+        mark_present(emp, date(2025, 4, 1))
+        run_payroll(2025, 4)
+
+        leave = self.leave(emp, date(2025, 4, 2), date(2025, 4, 4), status="PENDING")
+        self.assertFalse(Payroll.objects.get().is_stale)
+        self.client.post(f"/api/leaves/{leave.pk}/approve/")
+        self.assertTrue(Payroll.objects.get().is_stale)
+
+        engine.recompute_stale()
+        payroll = Payroll.objects.get()
+        self.assertEqual(
+            (payroll.present_days, payroll.paid_leave_days, payroll.absent_days, payroll.lop_days),
+            (1, 3, 29, 26),
+        )
+        self.assertEqual(payroll.net_salary_value, Decimal("4000.00"))
+
+    def test_moving_approved_leave_marks_both_months_stale(self):
+        emp = make_employee(1)
+        run_payroll(2025, 4)
+        run_payroll(2025, 5)
+        leave = self.leave(emp, date(2025, 4, 2), date(2025, 4, 4))
+        engine.recompute_stale()
+
+        self.client.patch(f"/api/leaves/{leave.pk}/", {"start_date": "2025-05-02", "end_date": "2025-05-04"},
+                          content_type="application/json")
+
+        self.assertEqual(sorted(Payroll.objects.filter(is_stale=True).values_list("month", flat=True)), [4, 5])
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are checked on Postgres")
+class PayrollIndexPlanTests(TestCase):
+    def test_month_filter_uses_year_month_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = Payroll.objects.filter(year=2025, month=3).explain()
+        self.assertIn("payroll_year_month_idx", plan)
+
+
+class PayrollListTests(TestCase):
+    def test_list_is_cursor_paginated_without_n_plus_one(self):
+        for n in range(5):
+            make_employee(n)
+        run_payroll(2025, 4)
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/payroll/", {"page_size": 3})
+
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertEqual(response.data["results"][0]["employee_code"], "E0004")
+        self.assertIn("cursor=", response.data["next"])
+
+        second = self.client.get(response.data["next"])
+        self.assertEqual(len(second.data["results"]), 2)
+        self.assertIsNone(second.data["next"])
+
+
+class PayslipZipTests(TestCase):
+    def test_zip_contains_one_pdf_per_employee_and_manifest(self):
+        for n in range(3):
+            make_employee(n)
+        run_payroll(2025, 4)
+
+        response = self.client.get("/api/payroll/payslips/zip/", {"year": 2025, "month": 4})
+
+        archive = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+        names = archive.namelist()
+        self.assertEqual(names[-1], "manifest.json")
+        self.assertEqual(sorted(names[:-1]), [f"payslip_E000{n}_2025_04.pdf" for n in range(3)])
+        self.assertTrue(archive.read(names[0]).startswith(b"%PDF"))
+        self.assertEqual(json.loads(archive.read("manifest.json"))["slips"], 3)
+
+
+class PayslipCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employee = make_employee(1)
+        run_payroll(2025, 4)
+        self.payroll = Payroll.objects.get()
+        self.url = f"/api/payroll/download/{self.payroll.id}/"
+
+    def test_repeat_download_is_cached_and_revalidates_with_304(self):
+        with patch.dict(pdf_cache.RENDERERS, salary_slip=Mock(wraps=pdf_cache.RENDERERS["salary_slip"])) as renderers:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+            revalidated = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+            self.assertEqual(renderers["salary_slip"].call_count, 1)
+
+        self.assertEqual(first.content, second.content)
+        self.assertTrue(first.content.startswith(b"%PDF"))
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated["ETag"], first["ETag"])
+
+    def test_employee_change_produces_a_new_etag(self):
+        first = self.client.get(self.url)
+
+        self.employee.name = "Renamed"
+        self.employee.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+    def test_same_row_renders_the_same_bytes(self):
+        first = render_payroll_pdf(self.payroll)
+        self.assertEqual(render_payroll_pdf(self.payroll), first)
+
+        # The printed date is the row's, not the day of the download
+        self.payroll.generated_on -= timedelta(days=1)
+        self.assertNotEqual(render_payroll_pdf(self.payroll), first)
+
+
+class InMemoryPdfTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employee = make_employee(1)
+        run_payroll(2025, 4)
+        self.payroll = Payroll.objects.get()
+
+    def test_email_attaches_pdf_from_memory(self):
+        response = self.client.post(f"/api/payroll/email/{self.payroll.id}/")
+
+        self.assertEqual(response.status_code, 200)
+        name, content, mimetype = mail.outbox[0].attachments[0]
+        self.assertEqual(mimetype, "application/pdf")
+        self.assertTrue(content.startswith(b"%PDF"))
+
+    def test_bulk_report_is_rendered_in_memory_and_capped(self):
+        response = self.client.get("/api/payroll/bulk_download/", {"year": 2025, "month": 4})
+        self.assertTrue(response.content.startswith(b"%PDF"))
+
+        with self.settings(PAYROLL_BULK_PDF_MAX_BYTES=1024):
+            response = self.client.get("/api/payroll/bulk_download/", {"year": 2025, "month": 4})
+        self.assertEqual(response.status_code, 413)
+
+        rendering = patch("payroll.utils.generate_bulk_payroll_pdf")
+        with self.settings(PAYROLL_BULK_PDF_MAX_ROWS=0), rendering as generate:
+            response = self.client.get("/api/payroll/bulk_download/", {"year": 2025, "month": 4})
+        self.assertEqual(response.status_code, 413)
+        generate.assert_not_called()
+
+
+class SlipTemplateTests(TestCase):
+    def setUp(self):
+        make_employee(1)
+        run_payroll(2025, 4)
+        self.payroll = Payroll.objects.select_related("employee").get()
+
+    def test_static_parts_are_built_once_and_values_land_in_their_cells(self):
+        from reportlab import rl_config
+        from .slip_templates import salary_slip_template
+        from .utils import render_payroll_pdf
+
+        with patch.object(rl_config, "pageCompression", 0):
+            first = render_payroll_pdf(self.payroll)
+            second = render_payroll_pdf(self.payroll)
+
+        self.assertIs(salary_slip_template(), salary_slip_template())
+        self.assertEqual(first.count(b"CLOUD HRMS PAYROLL SYSTEM"), 1)
+        self.assertIn(b"(Name: Employee 1) Tj", first)
+        self.assertIn(f"({self.payroll.net_salary:.2f}) Tj".encode(), second)
+
+
+class FlakyBackend(locmem.EmailBackend):
+    """locmem backend whose connection drops once, on the Nth message."""
+    calls = 0
+    fail_at = None
+
+    def send_messages(self, messages):
+        FlakyBackend.calls += 1
+        if FlakyBackend.calls == FlakyBackend.fail_at:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        return super().send_messages(messages)
+
+
+@patch.object(tasks, "MAIL_BATCH_SIZE", 2)
+class PayslipMailingTests(TestCase):
+    def setUp(self):
+        run_celery_eagerly(self)
+        cache.clear()
+        for n in range(5):
+            make_employee(n)
+        run_payroll(2025, 4)
+
+    def start(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/payroll/payslips/mail/", {"year": 2025, "month": 4})
+        self.assertEqual(response.status_code, 202)
+        return self.client.get(f"/api/payroll/payslips/mail/{response.json()['id']}/").json()
+
+    def test_mails_every_payslip_with_one_connection_per_batch(self):
+        with patch("payroll.mailing.get_connection", wraps=get_connection) as connections:
+            progress = self.start()
+
+        self.assertEqual(connections.call_count, 3)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].attachments[0][2], "application/pdf")
+        self.assertEqual(
+            (progress["status"], progress["total"], progress["sent"], progress["failed"], progress["percent"]),
+            ("DONE", 5, 5, 0, 100.0),
+        )
+
+    @patch.object(FlakyBackend, "fail_at", 2)
+    def test_dropped_connection_retries_only_unsent_messages(self):
+        FlakyBackend.calls = 0
+        with self.settings(EMAIL_BACKEND="payroll.tests.FlakyBackend"):
+            progress = self.start()
+
+        recipients = sorted(m.to[0] for m in mail.outbox)
+        self.assertEqual(recipients, sorted(Employee.objects.values_list("email", flat=True)))
+        self.assertEqual((progress["status"], progress["sent"]), ("DONE", 5))
+        self.assertIn("SMTPServerDisconnected", PayslipMailing.objects.get().last_error)
+
+    def test_unrenderable_and_deleted_payslips_count_as_failed(self):
+        ids = list(Payroll.objects.order_by("id").values_list("id", flat=True))
+        mailing_row = PayslipMailing.objects.create(year=2025, month=4, status="RUNNING", total=len(ids))
+        Payroll.objects.filter(id=ids[1]).delete()
+        real_message = mailing.payslip_message
+
+        def render(payroll, connection=None):
+            if payroll.id == ids[0]:
+                raise ValueError("bad template")
+            return real_message(payroll, connection)
+
+        with patch("payroll.mailing.payslip_message", side_effect=render):
+            unsent, _ = mailing.send_batch(mailing_row.id, ids)
+
+        mailing_row.refresh_from_db()
+        self.assertEqual(unsent, [])
+        self.assertEqual((mailing_row.status, mailing_row.sent, mailing_row.failed), ("DONE", 3, 2))
+
+
+    def test_rejected_message_fails_alone_and_the_batch_goes_on(self):
+        ids = list(Payroll.objects.order_by("id").values_list("id", flat=True))
+        mailing_row = PayslipMailing.objects.create(year=2025, month=4, status="RUNNING", total=len(ids))
+        real_send = locmem.EmailBackend.send_messages
+        rejections = iter([
+            smtplib.SMTPDataError(552, b"Message size exceeds fixed limit"),
+            smtplib.SMTPSenderRefused(550, b"Sender rejected", "hr@example.com"),
+        ])
+
+        def send(backend, messages):
+            if messages[0].to[0] in {"employee0@example.com", "employee3@example.com"}:
+                raise next(rejections)
+            return real_send(backend, messages)
+
+        with patch.object(locmem.EmailBackend, "send_messages", send):
+            unsent, error = mailing.send_batch(mailing_row.id, ids)
+
+        mailing_row.refresh_from_db()
+        self.assertEqual(unsent, [])
+        self.assertEqual((mailing_row.status, mailing_row.sent, mailing_row.failed), ("DONE", 3, 2))
+        self.assertIn("SMTPSenderRefused", error)
+
+
+class BulkSummaryPdfTests(TestCase):
+    def test_rows_are_streamed_with_department_subtotals(self):
+        for n in range(3):
+            make_employee(n, department="Engineering")
+        for n in range(3, 5):
+            make_employee(n, salary="20000.00", department="Finance")
+        run_payroll(2025, 4)
+
+        from reportlab import rl_config
+        with patch.object(rl_config, "pageCompression", 0), self.assertNumQueries(2):
+            response = self.client.get("/api/payroll/bulk_download/", {"year": 2025, "month": 4})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"(Engineering subtotal \\(3\\)) Tj", response.content)
+        self.assertIn(b"(Finance subtotal \\(2\\)) Tj", response.content)
+        self.assertIn(b"(Total \\(5 employees\\)) Tj", response.content)
+
+
+class StalePayrollTests(TestCase):
+    def setUp(self):
+        self.first = make_employee(1, salary="30000.00")
+        self.second = make_employee(2, salary="30000.00")
+        run_payroll(2025, 4)
+
+    def stale(self):
+        return set(Payroll.objects.filter(is_stale=True).values_list("employee_id", flat=True))
+
+    def test_attendance_changes_flag_only_the_affected_month(self):
+        record = Attendance.objects.create(employee=self.first, date=date(2025, 4, 3))
+        Attendance.objects.create(employee=self.second, date=date(2025, 5, 3))
+        self.assertEqual(self.stale(), {self.first.id})
+
+        Payroll.objects.update(is_stale=False)
+        record.delete()
+        self.assertEqual(self.stale(), {self.first.id})
+
+    def test_recompute_touches_only_stale_rows(self):
+        Attendance.objects.create(employee=self.first, date=date(2025, 4, 3))
+
+        stats = engine.recompute_stale()
+
+        self.assertEqual((stats["rows"], stats["months"]), (1, 1))
+        payroll = Payroll.objects.get(employee=self.first)
+        self.assertEqual((payroll.present_days, payroll.is_stale), (1, False))
+        self.assertEqual(self.stale(), set())
+
+    def test_ingested_punches_flag_payroll(self):
+        from attendance.ingest import ingest
+
+        ingest([{"device_id": "D1", "employee_id": self.second.id, "timestamp": "2025-04-10T09:00:00+05:30"}])
+
+        self.assertEqual(self.stale(), {self.second.id})
+
+    def test_scheduled_generators_do_not_duplicate_rows(self):
+        from scheduler.tasks import generate_monthly_payroll as scheduler_run
+
+        run_celery_eagerly(self)
+        tasks.generate_monthly_payroll(2025, 4)
+        tasks.generate_monthly_payroll(2025, 4)
+        scheduler_run()
+        scheduler_run()
+
+        self.assertEqual(Payroll.objects.filter(year=2025, month=4).count(), 2)
+        today = date.today()
+        self.assertEqual(Payroll.objects.filter(year=today.year, month=today.month).count(), 2)
+
+
+class PayrollCalculatorTests(TestCase):
+    def test_batch_rounds_half_up_to_the_paisa_without_floats(self):
+        rows = calculator.calculate_batch(
+            [Decimal("100.01"), Decimal("0.03"), Decimal("30000.00")], [1, 1, 40], [3, 2, 30]
+        )
+
+        self.assertEqual([r["net_salary_value"] for r in rows], [Decimal("33.34"), Decimal("0.02"), Decimal("30000.00")])
+        # Present days are capped at the working days
+        self.assertEqual((rows[2]["present_days"], rows[2]["lop_days"]), (30, 0))
+        self.assertEqual(rows[0], calculator.calculate(Decimal("100.01"), 1, 3))
+
+        # Paid leave is paid, but only on days not already present
+        leave = calculator.calculate(Decimal("30000.00"), 20, 30, paid_leave_days=15)
+        self.assertEqual((leave["paid_leave_days"], leave["lop_days"]), (10, 0))
+        self.assertEqual(leave["net_salary_value"], Decimal("30000.00"))
+
+    def test_save_and_single_generation_use_the_calculator(self):
+        employee = make_employee(1, salary="31000.00")
+        mark_present(employee, date(2025, 5, 1), date(2025, 5, 2))
+
+        response = self.client.post(
+            "/api/payroll/generate_salary/", {"employee_id": employee.id, "month": 5, "year": 2025}
+        )
+        self.client.post("/api/payroll/generate_salary/", {"employee_id": employee.id, "month": 5, "year": 2025})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["net_salary"], 2000.0)
+        self.assertEqual(Payroll.objects.count(), 1)
+
+        payroll = Payroll.objects.get()
+        payroll.present_days = 31
+        payroll.save()
+        self.assertEqual((payroll.net_salary_value, payroll.lop_days), (Decimal("31000.00"), 0))
+
+
+class PayrollRunTests(TestCase):
+    def setUp(self):
+        run_celery_eagerly(self)
+        self.employees = [make_employee(n) for n in range(5)]
+
+    def start(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/payroll/runs/", {"year": 2025, "month": 4, "shard_size": 2})
+        self.assertEqual(response.status_code, 202)
+        return response.json()["id"]
+
+    def progress(self, run_id):
+        return self.client.get(f"/api/payroll/runs/{run_id}/").json()
+
+    def test_month_is_generated_in_id_range_shards(self):
+        with patch("payroll.runs.refresh_month", wraps=runs.refresh_month) as refresh, \
+                patch("payroll.engine.refresh_month") as shard_refresh:
+            progress = self.progress(self.start())
+
+        refresh.assert_called_once_with(2025, 4)
+        shard_refresh.assert_not_called()
+        self.assertEqual(PayrollMonthlySummary.objects.get(year=2025, month=4).employees, 5)
+
+        self.assertEqual(progress["status"], "DONE")
+        self.assertEqual(progress["shards"], {"total": 3, "done": 3, "failed": 0, "running": 0, "pending": 0})
+        self.assertEqual((progress["rows"], progress["percent"]), (5, 100.0))
+        self.assertEqual(Payroll.objects.filter(year=2025, month=4).count(), 5)
+
+    def test_resume_reruns_only_unfinished_shards(self):
+        real_run_payroll = engine.run_payroll
+
+        def crash_on_last_shard(year, month, employee_ids, **kwargs):
+            if self.employees[-1].id in employee_ids:
+                raise RuntimeError("worker lost")
+            return real_run_payroll(year, month, employee_ids, **kwargs)
+
+        with patch("payroll.runs.run_payroll", side_effect=crash_on_last_shard):
+            run_id = self.start()
+
+        progress = self.progress(run_id)
+        self.assertEqual((progress["status"], progress["shards"]["failed"]), ("FAILED", 1))
+        self.assertEqual(progress["errors"], [{"shard": 3, "error": "RuntimeError: worker lost"}])
+        self.assertEqual(Payroll.objects.count(), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/payroll/runs/{run_id}/resume/")
+        self.assertEqual(response.status_code, 202)
+
+        progress = self.progress(run_id)
+        self.assertEqual((progress["status"], progress["rows"]), ("DONE", 5))
+        attempts = dict(PayrollRunShard.objects.values_list("number", "attempts"))
+        self.assertEqual(attempts, {1: 1, 2: 1, 3: 5})
+
+    def test_only_failed_or_stalled_runs_are_resumed(self):
+        run_id = self.start()
+        PayrollRun.objects.filter(pk=run_id).update(status="RUNNING")
+        PayrollRunShard.objects.filter(run_id=run_id, number=3).update(status="RUNNING")
+
+        response = self.client.post(f"/api/payroll/runs/{run_id}/resume/")
+        self.assertEqual(response.status_code, 400)
+
+        PayrollRunShard.objects.filter(run_id=run_id).update(updated_on=timezone.now() - timedelta(hours=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/payroll/runs/{run_id}/resume/")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.progress(run_id)["status"], "DONE")
+        self.assertEqual(self.client.post(f"/api/payroll/runs/{run_id}/resume/").status_code, 400)
+
+
+    @patch.object(runs, "HEARTBEAT_EVERY", 2)
+    def test_a_long_shard_heartbeats_and_is_not_reclaimed(self):
+        run = PayrollRun.objects.create(year=2025, month=4, shard_size=5)
+        [shard_id] = runs.plan_shards(run.id)
+        real_run_payroll = engine.run_payroll
+        claims = []
+
+        def slow_slice(year, month, employee_ids, **kwargs):
+            claims.append(runs.claim_resume(run.id))
+            stats = real_run_payroll(year, month, employee_ids, **kwargs)
+            # The slice took 20 minutes: three of them outlast RUN_STALLED_AFTER
+            shard = PayrollRunShard.objects.get(pk=shard_id)
+            PayrollRunShard.objects.filter(pk=shard_id).update(updated_on=shard.updated_on - timedelta(minutes=20))
+            return stats
+
+        with patch("payroll.runs.run_payroll", side_effect=slow_slice) as engine_runs:
+            stats = runs.run_shard(shard_id)
+
+        self.assertEqual(engine_runs.call_count, 3)
+        self.assertEqual(claims, [None, None, None])
+        self.assertEqual(stats["rows"], 5)
+        self.assertEqual(PayrollRunShard.objects.get(pk=shard_id).attempts, 1)
+
+class PayrollDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employee = make_employee(1, salary="30000.00")
+        make_employee(2, salary="20000.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            run_payroll(2024, 4)
+            run_payroll(2025, 4)
+
+    @patch.object(summary, "SHARED_CACHE", True)
+    def test_summary_is_one_cached_aggregate_refreshed_on_save(self):
+        cache.clear()
+        with self.assertNumQueries(2):  # aggregate + rollup upsert
+            first = self.client.get("/api/payroll/summary/", {"year": 2025, "month": 4}).json()
+        with self.assertNumQueries(0):
+            self.client.get("/api/payroll/summary/", {"year": 2025, "month": 4})
+
+        self.assertEqual(first["salary_generated_for"], 2)
+        self.assertEqual(first["total_gross_salary"], 50000.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Payroll.objects.get(employee=self.employee, year=2025).delete()
+        after = self.client.get("/api/payroll/summary/", {"year": 2025, "month": 4}).json()
+        self.assertEqual((after["salary_generated_for"], after["total_net_salary"]), (1, 0.0))
+
+    def test_without_a_shared_cache_the_summary_reads_the_rollup_row(self):
+        cache.clear()
+        with self.assertNumQueries(1):
+            first = self.client.get("/api/payroll/summary/", {"year": 2025, "month": 4}).json()
+        self.assertEqual(first["salary_generated_for"], 2)
+
+        # Refreshed by another process: nothing per-process can go stale
+        Payroll.objects.filter(employee=self.employee, year=2025).delete()
+        summary.refresh_month(2025, 4)
+        after = self.client.get("/api/payroll/summary/", {"year": 2025, "month": 4}).json()
+        self.assertEqual(after["salary_generated_for"], 1)
+
+    def test_chart_and_comparison_read_the_monthly_rollup(self):
+        with self.assertNumQueries(1):
+            chart = self.client.get("/api/payroll/stats/", {"year": 2025}).json()
+        self.assertEqual(chart, [{"month": 4, "employees": 2, "total_gross_salary": 50000.0, "total_net_salary": 0.0}])
 
-# Create your tests here.
+        with self.assertNumQueries(1):
+            years = self.client.get("/api/payroll/compare/", {"years": "2024,2025,2026"}).json()
+        self.assertEqual([(y["year"], y["peak_employees"], y["total_gross_salary"]) for y in years],
+                         [(2024, 2, 50000.0), (2025, 2, 50000.0), (2026, 0, 0)])
@@ -5,12 +5,19 @@ from . import views
 urlpatterns = [
     path("summary/", views.payroll_summary),
     path("stats/", views.payroll_chart),
+    path("compare/", views.payroll_compare),
 
     path("download/<int:payroll_id>/", download_payslip),
     path("bulk_download/", views.download_bulk_payroll_pdf),
+    path("payslips/zip/", views.download_payslips_zip),
 
     path("employee/<int:employee_id>/", views.employee_payslips),
     path("email/<int:pk>/", views.email_payslip),
+    path("payslips/mail/", views.mail_all_payslips),
+    path("payslips/mail/<int:pk>/", views.payslip_mailing_progress),
 
     path("generate-all/", views.generate_all_payroll),   # POST-only
+    path("runs/", views.start_payroll_run),
+    path("runs/<int:pk>/", views.payroll_run_progress),
+    path("runs/<int:pk>/resume/", views.resume_payroll_run),
 ]
@@ -1,106 +1,194 @@
 from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-import datetime
+from reportlab.platypus import Table, TableStyle
+from io import BytesIO
+from itertools import islice
+
+from .slip_templates import salary_slip_template
+
+# Kept free of Django imports: bulk payslip pool workers import this module
+# without django.setup().
+
+# Default upper bound for an in-memory bulk payroll report
+BULK_PDF_MAX_BYTES = 50 * 1024 * 1024
+
+# Default upper bound on the employees in one bulk report. The canvas
+# holds every finished page until save(), about 300-450 bytes per row,
+# so this is what bounds memory while drawing (~20MB at the default).
+BULK_PDF_MAX_ROWS = 50_000
+
+
+class PdfTooLarge(Exception):
+    pass
+
+
+class CappedBuffer(BytesIO):
+    """In-memory PDF target that refuses to grow past ``max_bytes``."""
 
-def generate_payroll_pdf(payroll, file_path):
-    c = canvas.Canvas(file_path, pagesize=A4)
-    
+    def __init__(self, max_bytes):
+        super().__init__()
+        self.max_bytes = max_bytes
+
+    def write(self, data):
+        if self.tell() + len(data) > self.max_bytes:
+            raise PdfTooLarge(f"PDF exceeds {self.max_bytes} bytes")
+        return super().write(data)
+
+
+def generate_payroll_pdf(payroll, output):
+    """Draw a salary slip into ``output`` (a path or a writable file object)."""
+    template = salary_slip_template()
+    c = template.new_canvas(output)
+
+    template.draw(c, {
+        "name": f"Name: {payroll.employee.name}",
+        "employee_id": f"Employee ID: {payroll.employee.id}",
+        "department": f"Department: {getattr(payroll.employee, 'department', 'N/A')}",
+        "period": f"Month-Year: {payroll.month}/{payroll.year}",
+        "basic_salary": f"{payroll.basic_salary:.2f}",
+        "working_days": f"{payroll.working_days}",
+        "present_days": f"{payroll.present_days}",
+        "paid_leave_days": f"{payroll.paid_leave_days}",
+        "absent_days": f"{payroll.absent_days}",
+        "lop_days": f"{payroll.lop_days}",
+        "gross_salary": f"{payroll.gross_salary:.2f}",
+        "net_salary": f"{payroll.net_salary:.2f}",
+        # The row's own date, so the same row always renders the same bytes
+        "generated_on": f"Generated on: {payroll.generated_on:%Y-%m-%d}",
+    })
+
+    c.save()
+
+def render_payroll_pdf(payroll):
+    """Salary slip as PDF bytes, without touching the filesystem."""
+    buffer = BytesIO()
+    generate_payroll_pdf(payroll, buffer)
+    return buffer.getvalue()
+
+
+SUMMARY_HEADER = ["Emp ID", "Name", "Gross (₹)", "Net (₹)"]
+SUMMARY_COL_WIDTHS = [25 * mm, 60 * mm, 40 * mm, 40 * mm]
+SUMMARY_ROW_HEIGHT = 16
+
+SUMMARY_TABLE_STYLE = [
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0052cc")),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("ALIGN", (2, 1), (-1, -1), "RIGHT"),
+    ("FONTSIZE", (0, 0), (-1, -1), 9),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+]
+
+# Row kinds yielded by _summary_rows
+ROW, DEPARTMENT, SUBTOTAL, TOTAL = "row", "department", "subtotal", "total"
+
+
+def _summary_rows(payrolls):
+    """Yield (kind, cells): employee rows framed by department headers and subtotals."""
+    department = None
+    count = total_count = 0
+    gross = net = total_gross = total_net = 0
+
+    def subtotal():
+        return SUBTOTAL, ["", f"{department} subtotal ({count})", f"{gross:.2f}", f"{net:.2f}"]
+
+    for p in payrolls:
+        if p.employee.department != department:
+            if department is not None:
+                yield subtotal()
+            department = p.employee.department
+            count, gross, net = 0, 0, 0
+            yield DEPARTMENT, [department, "", "", ""]
+
+        yield ROW, [p.employee.id, p.employee.name, f"{p.gross_salary:.2f}", f"{p.net_salary_value:.2f}"]
+        count += 1
+        gross += p.gross_salary
+        net += p.net_salary_value
+        total_count += 1
+        total_gross += p.gross_salary
+        total_net += p.net_salary_value
+
+    if department is not None:
+        yield subtotal()
+    yield TOTAL, ["", f"Total ({total_count} employees)", f"{total_gross:.2f}", f"{total_net:.2f}"]
+
+
+def _summary_page_style(rows):
+    style = list(SUMMARY_TABLE_STYLE)
+    for i, (kind, _) in enumerate(rows, start=1):
+        if kind == DEPARTMENT:
+            style += [
+                ("SPAN", (0, i), (-1, i)),
+                ("BACKGROUND", (0, i), (-1, i), colors.HexColor("#e6eefa")),
+                ("FONTNAME", (0, i), (-1, i), "Helvetica-Bold"),
+            ]
+        elif kind in (SUBTOTAL, TOTAL):
+            style.append(("FONTNAME", (0, i), (-1, i), "Helvetica-Bold"))
+            if kind == TOTAL:
+                style.append(("BACKGROUND", (0, i), (-1, i), colors.lightgrey))
+    return TableStyle(style)
+
+
+def generate_bulk_payroll_pdf(payrolls, output, year, month):
+    """
+    Draw the payroll summary of a month into ``output``, one page at a time.
+
+    ``payrolls`` is any iterable of payroll rows with their employee,
+    ordered by department (the view passes a chunked select_related
+    iterator). Only one page-sized table is laid out at a time, but the
+    canvas keeps the content of every finished page until save(), so
+    memory still grows with the headcount (a few hundred bytes a row).
+    Callers bound it with render_bulk_payroll_pdf's row limit.
+    """
+    c = canvas.Canvas(output, pagesize=A4)
     width, height = A4
     margin = 20 * mm
-    cursor_y = height - margin
-
-    # HEADER
-    c.setFont("Helvetica-Bold", 18)
-    c.setFillColor(colors.HexColor("#0052cc"))
-    c.drawString(margin, cursor_y, "CLOUD HRMS PAYROLL SYSTEM")
-
-    c.setFont("Helvetica", 10)
-    c.setFillColor(colors.black)
-    c.drawString(margin, cursor_y - 15, "Professional Salary Slip (Auto-Generated)")
-    
-    cursor_y -= 40
-
-    # EMPLOYEE INFO
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(margin, cursor_y, "Employee Information")
-
-    cursor_y -= 10
-    c.setFont("Helvetica", 10)
-    c.drawString(margin, cursor_y, f"Name: {payroll.employee.name}")
-    c.drawString(margin + 200, cursor_y, f"Employee ID: {payroll.employee.id}")
-
-    cursor_y -= 12
-    dept = getattr(payroll.employee, "department", "N/A")
-    c.drawString(margin, cursor_y, f"Department: {dept}")
-    c.drawString(margin + 200, cursor_y, f"Month-Year: {payroll.month}/{payroll.year}")
-
-    cursor_y -= 20
-
-    # SALARY TABLE
-    table_data = [
-        ["Description", "Value (₹)"],
-        ["Basic Salary", f"{payroll.basic_salary:.2f}"],
-        ["Working Days", f"{payroll.working_days}"],
-        ["Present Days", f"{payroll.present_days}"],
-        ["Absent Days", f"{payroll.absent_days}"],
-        ["Loss of Pay Days", f"{payroll.lop_days}"],
-        ["Gross Salary", f"{payroll.gross_salary:.2f}"],
-        ["Net Salary", f"{payroll.net_salary:.2f}"],
-    ]
-
-    table = Table(table_data, colWidths=[100 * mm, 60 * mm])
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0052cc")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-        ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
-        ("FONTSIZE", (0, 0), (-1, -1), 10),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-
-    cursor_y -= 20
-    table.wrapOn(c, margin, cursor_y)
-    table.drawOn(c, margin, cursor_y - 180)
-
-    # FOOTER
-    c.setFont("Helvetica-Oblique", 9)
-    c.drawString(margin, 30, "This is a computer-generated salary slip. No signature required.")
-    c.drawRightString(width - margin, 30, f"Generated on: {datetime.date.today()}")
-
+    table_x = (width - sum(SUMMARY_COL_WIDTHS)) / 2
+
+    rows = _summary_rows(payrolls)
+    page = 1
+    while True:
+        top = height - margin
+        if page == 1:
+            c.setFont("Helvetica-Bold", 18)
+            c.drawCentredString(width / 2, top - 18, f"Payroll Summary - {month}/{year}")
+            top -= 40
+
+        capacity = int((top - margin) // SUMMARY_ROW_HEIGHT) - 1
+        chunk = list(islice(rows, capacity))
+        if not chunk and page > 1:
+            break
+        if page > 1:
+            c.showPage()
+
+        data = [SUMMARY_HEADER] + [cells for _, cells in chunk]
+        table = Table(data, colWidths=SUMMARY_COL_WIDTHS, rowHeights=SUMMARY_ROW_HEIGHT)
+        table.setStyle(_summary_page_style(chunk))
+        table.wrapOn(c, width, height)
+        table.drawOn(c, table_x, top - SUMMARY_ROW_HEIGHT * len(data))
+
+        c.setFont("Helvetica", 8)
+        c.drawRightString(width - margin, margin / 2, f"Page {page}")
+        page += 1
+
+    c.showPage()
     c.save()
 
-def generate_bulk_payroll_pdf(payroll_qs, file_path, year, month):
-    doc = SimpleDocTemplate(file_path, pagesize=A4, leftMargin=20*mm, rightMargin=20*mm)
-    elements = []
-    styles = getSampleStyleSheet()
-
-    title = Paragraph(f"Payroll Summary - {month}/{year}", styles["Title"])
-    elements.append(title)
-    elements.append(Spacer(1, 12))
-
-    data = [["Emp ID", "Name", "Gross (₹)", "Net (₹)"]]
-    for p in payroll_qs:
-        data.append([
-            p.employee.id,
-            p.employee.name,
-            f"{p.gross_salary:.2f}",
-            f"{p.net_salary:.2f}",
-        ])
-
-    table = Table(data, colWidths=[25*mm, 60*mm, 40*mm, 40*mm])
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0052cc")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("ALIGN", (2, 1), (-1, -1), "RIGHT"),
-        ("FONTSIZE", (0, 0), (-1, -1), 9),
-    ]))
-
-    elements.append(table)
-    doc.build(elements)    
+
+def render_bulk_payroll_pdf(payroll_qs, year, month, max_bytes=BULK_PDF_MAX_BYTES,
+                            row_count=None, max_rows=BULK_PDF_MAX_ROWS):
+    """
+    Bulk payroll report as PDF bytes.
+
+    Raises PdfTooLarge before drawing anything when ``row_count`` (the
+    number of payroll rows, if known) is over ``max_rows``, and while
+    saving once the file passes ``max_bytes``.
+    """
+    if row_count is not None and row_count > max_rows:
+        raise PdfTooLarge(f"{row_count} payroll rows exceed the {max_rows}-row limit of one report")
+    buffer = CappedBuffer(max_bytes)
+    generate_bulk_payroll_pdf(payroll_qs, buffer, year, month)
+    return buffer.getvalue()
@@ -1,31 +1,39 @@
-import os
-import tempfile
-from calendar import monthrange
-from django.http import HttpResponse, FileResponse
-from django.core.mail import EmailMessage
+from django.http import HttpResponse, StreamingHttpResponse
+from django.conf import settings
 from django.utils import timezone
-from django.db.models import Sum
+from django.db import transaction
+from django.shortcuts import get_object_or_404
 
 from rest_framework import viewsets
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 
-from .models import Payroll
+from .models import Payroll, PayrollRun, PayslipMailing
 from .serializers import PayrollSerializer
 from employees.models import Employee
-from attendance.models import Attendance
+from hrms.pagination import IdCursorPagination
 
 # PDF generators
-from .utils import generate_payroll_pdf, generate_bulk_payroll_pdf
-from .payslip import generate_payslip_pdf
+from .utils import BULK_PDF_MAX_BYTES, BULK_PDF_MAX_ROWS, PdfTooLarge, render_bulk_payroll_pdf
+from .engine import run_payroll
+from .bulk_payslips import stream_payslip_zip
+from .pdf_cache import payslip_response
+from .mailing import mailing_progress, payslip_message
+from .runs import claim_resume, run_progress
+from .summary import compare_years, month_summary, year_chart
+from . import tasks
 
 
 # =====================================================================
 #                           PAYROLL VIEWSET
 # =====================================================================
 class PayrollViewSet(viewsets.ModelViewSet):
-    queryset = Payroll.objects.all().order_by("-id")  # FIXED: generated_on removed
+    queryset = Payroll.objects.select_related("employee").order_by("-id")
     serializer_class = PayrollSerializer
+    pagination_class = IdCursorPagination
+    # Numeric ids only, so /api/payroll/summary/ etc. reach payroll.urls
+    # instead of being swallowed by the detail route.
+    lookup_value_regex = r"\d+"
 
     # ---------------------------------------------------------
     # Generate payroll for a single employee
@@ -39,36 +47,9 @@ class PayrollViewSet(viewsets.ModelViewSet):
         if not employee_id:
             return Response({"error": "employee_id required"}, status=400)
 
-        employee = Employee.objects.get(id=employee_id)
-        working_days = monthrange(year, month)[1]
-
-        attendance = Attendance.objects.filter(
-            employee=employee,
-            date__year=year,
-            date__month=month
-        )
-
-        present_days = attendance.count()
-        absent_days = working_days - present_days
-
-        per_day_salary = float(employee.salary) / working_days
-        lop_amount = per_day_salary * absent_days
-
-        gross_salary = float(employee.salary)
-        net_salary = gross_salary - lop_amount
-
-        payroll = Payroll.objects.create(
-            employee=employee,
-            month=month,
-            year=year,
-            basic_salary=employee.salary,
-            working_days=working_days,
-            present_days=present_days,
-            absent_days=absent_days,
-            lop_days=absent_days,
-            gross_salary=gross_salary,
-            net_salary=round(net_salary, 2),
-        )
+        employee = get_object_or_404(Employee, id=employee_id)
+        run_payroll(year, month, [employee.id])
+        payroll = Payroll.objects.select_related("employee").get(employee=employee, year=year, month=month)
 
         return Response(PayrollSerializer(payroll).data, status=201)
 
@@ -78,7 +59,8 @@ class PayrollViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"])
     def payslip(self, request, pk=None):
         payroll = self.get_object()
-        return generate_payslip_pdf(payroll)
+        filename = f"Payslip_{payroll.employee.name}_{payroll.month}_{payroll.year}.pdf"
+        return payslip_response(request, payroll, "payslip", filename)
 
 
 # =====================================================================
@@ -89,49 +71,53 @@ def generate_all_payroll(request):
     month = int(request.data.get("month", timezone.localdate().month))
     year = int(request.data.get("year", timezone.localdate().year))
 
-    employees = Employee.objects.all()
-    working_days = monthrange(year, month)[1]
-
-    count = 0
-    for emp in employees:
-        attendance = Attendance.objects.filter(
-            employee=emp,
-            date__year=year,
-            date__month=month
-        )
-
-        present_days = attendance.count()
-        absent_days = working_days - present_days
-
-        per_day_salary = float(emp.salary) / working_days
-        lop_amount = per_day_salary * absent_days
-
-        gross_salary = float(emp.salary)
-        net_salary = gross_salary - lop_amount
-
-        Payroll.objects.update_or_create(
-            employee=emp,
-            month=month,
-            year=year,
-            defaults={
-                "basic_salary": emp.salary,
-                "working_days": working_days,
-                "present_days": present_days,
-                "absent_days": absent_days,
-                "lop_days": absent_days,
-                "gross_salary": gross_salary,
-                "net_salary": round(net_salary, 2),
-            }
-        )
-        count += 1
+    stats = run_payroll(year, month)
 
     return Response({
-        "message": f"Payroll generated for {count} employees",
+        "message": f"Payroll generated for {stats['rows']} employees",
         "month": month,
-        "year": year
+        "year": year,
+        "stats": stats,
     }, status=200)
 
 
+# =====================================================================
+#          SHARDED PAYROLL RUN (Celery chord + progress/resume)
+# =====================================================================
+@api_view(["POST"])
+def start_payroll_run(request):
+    month = int(request.data.get("month", timezone.localdate().month))
+    year = int(request.data.get("year", timezone.localdate().year))
+    shard_size = int(request.data.get("shard_size", tasks.PAYROLL_SHARD_SIZE))
+
+    if shard_size < 1:
+        return Response({"error": "shard_size must be positive"}, status=400)
+
+    run = PayrollRun.objects.create(year=year, month=month, shard_size=shard_size)
+    transaction.on_commit(lambda: tasks.start_payroll_run.delay(run.id))
+    return Response(run_progress(run), status=202)
+
+
+@api_view(["GET"])
+def payroll_run_progress(request, pk):
+    run = get_object_or_404(PayrollRun, pk=pk)
+    return Response(run_progress(run))
+
+
+@api_view(["POST"])
+def resume_payroll_run(request, pk):
+    run = get_object_or_404(PayrollRun, pk=pk)
+
+    # Only FAILED runs, or RUNNING ones whose workers have gone quiet
+    shard_ids = claim_resume(run.id)
+    if shard_ids is None:
+        return Response({"error": f"Run is {run.status.lower()} and not stalled, nothing to resume"}, status=400)
+
+    transaction.on_commit(lambda: tasks.start_payroll_run.delay(run.id, shard_ids))
+    run.refresh_from_db()
+    return Response(run_progress(run), status=202)
+
+
 # =====================================================================
 #                       DASHBOARD SUMMARY API
 # =====================================================================
@@ -140,15 +126,7 @@ def payroll_summary(request):
     year = int(request.GET.get("year", timezone.localdate().year))
     month = int(request.GET.get("month", timezone.localdate().month))
 
-    payroll = Payroll.objects.filter(year=year, month=month)
-
-    return Response({
-        "year": year,
-        "month": month,
-        "salary_generated_for": payroll.count(),
-        "total_gross_salary": payroll.aggregate(Sum("gross_salary"))["gross_salary__sum"] or 0,
-        "total_net_salary": payroll.aggregate(Sum("net_salary"))["net_salary__sum"] or 0,
-    })
+    return Response(month_summary(year, month))
 
 
 # =====================================================================
@@ -158,12 +136,21 @@ def payroll_summary(request):
 def payroll_chart(request):
     year = int(request.GET.get("year", timezone.localdate().year))
 
-    data = Payroll.objects.filter(year=year).values("month").annotate(
-        total_gross_salary=Sum("gross_salary"),
-        total_net_salary=Sum("net_salary")
-    ).order_by("month")
+    return Response(year_chart(year))
+
 
-    return Response(list(data))
+# =====================================================================
+#                 MULTI-YEAR COMPARISON (monthly rollup)
+# =====================================================================
+@api_view(["GET"])
+def payroll_compare(request):
+    this_year = timezone.localdate().year
+    try:
+        years = [int(y) for y in request.GET.get("years", "").split(",") if y.strip()]
+    except ValueError:
+        return Response({"error": "years must be a comma-separated list of years"}, status=400)
+
+    return Response(compare_years(years or [this_year - 2, this_year - 1, this_year]))
 
 
 # =====================================================================
@@ -171,12 +158,8 @@ def payroll_chart(request):
 # =====================================================================
 @api_view(["GET"])
 def download_payroll_pdf(request, pk):
-    payroll = Payroll.objects.get(id=pk)
-    file_path = f"salary_slip_{pk}.pdf"
-
-    generate_payroll_pdf(payroll, file_path)
-
-    return FileResponse(open(file_path, "rb"), as_attachment=True)
+    payroll = Payroll.objects.select_related("employee").get(id=pk)
+    return payslip_response(request, payroll, "salary_slip", f"salary_slip_{pk}.pdf")
 
 
 # =====================================================================
@@ -204,13 +187,43 @@ def download_bulk_payroll_pdf(request):
 
     payrolls = Payroll.objects.filter(year=year, month=month)
 
-    if not payrolls.exists():
+    # Counted up front so an oversized report is refused before drawing
+    row_count = payrolls.count()
+    if not row_count:
         return Response({"error": "No payroll found"}, status=404)
 
-    file_path = f"payroll_bulk_{year}_{month}.pdf"
-    generate_bulk_payroll_pdf(payrolls, file_path, year, month)
+    rows = (
+        payrolls.select_related("employee")
+        .only("gross_salary", "net_salary_value", "employee__id", "employee__name", "employee__department")
+        .order_by("employee__department", "employee__emp_code")
+        .iterator(chunk_size=2000)
+    )
+    try:
+        max_bytes = getattr(settings, "PAYROLL_BULK_PDF_MAX_BYTES", BULK_PDF_MAX_BYTES)
+        max_rows = getattr(settings, "PAYROLL_BULK_PDF_MAX_ROWS", BULK_PDF_MAX_ROWS)
+        pdf = render_bulk_payroll_pdf(rows, year, month, max_bytes, row_count, max_rows)
+    except PdfTooLarge as exc:
+        return Response({"error": str(exc)}, status=413)
+
+    response = HttpResponse(pdf, content_type="application/pdf")
+    response["Content-Disposition"] = f'attachment; filename="payroll_bulk_{year}_{month}.pdf"'
+    return response
+
+
+# =====================================================================
+#              BULK PAYSLIPS (one PDF per employee) AS ZIP
+# =====================================================================
+@api_view(["GET"])
+def download_payslips_zip(request):
+    year = int(request.GET.get("year", timezone.localdate().year))
+    month = int(request.GET.get("month", timezone.localdate().month))
+
+    if not Payroll.objects.filter(year=year, month=month).exists():
+        return Response({"error": "No payroll found"}, status=404)
 
-    return FileResponse(open(file_path, "rb"), as_attachment=True)
+    response = StreamingHttpResponse(stream_payslip_zip(year, month), content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="payslips_{year}_{month:02d}.zip"'
+    return response
 
 
 # =====================================================================
@@ -218,20 +231,32 @@ def download_bulk_payroll_pdf(request):
 # =====================================================================
 @api_view(["POST"])
 def email_payslip(request, pk):
-    payroll = Payroll.objects.get(id=pk)
+    payroll = Payroll.objects.select_related("employee").get(id=pk)
+    payslip_message(payroll).send()
 
-    tmp = f"salary_slip_{pk}.pdf"
-    generate_payroll_pdf(payroll, tmp)
+    return Response({"message": "Payslip sent successfully"})
 
-    email = EmailMessage(
-        subject=f"Salary Slip {payroll.month}/{payroll.year}",
-        body=f"Dear {payroll.employee.name}, your payslip is attached.",
-        to=[payroll.employee.email],
-    )
-    email.attach_file(tmp)
-    email.send()
 
-    return Response({"message": "Payslip sent successfully"})
+# =====================================================================
+#              BULK PAYSLIP EMAIL (Celery job + progress)
+# =====================================================================
+@api_view(["POST"])
+def mail_all_payslips(request):
+    year = int(request.data.get("year", timezone.localdate().year))
+    month = int(request.data.get("month", timezone.localdate().month))
+
+    if not Payroll.objects.filter(year=year, month=month).exists():
+        return Response({"error": "No payroll found"}, status=404)
+
+    mailing = PayslipMailing.objects.create(year=year, month=month)
+    transaction.on_commit(lambda: tasks.mail_payslips.delay(mailing.id))
+    return Response(mailing_progress(mailing), status=202)
+
+
+@api_view(["GET"])
+def payslip_mailing_progress(request, pk):
+    mailing = get_object_or_404(PayslipMailing, pk=pk)
+    return Response(mailing_progress(mailing))
 
 
 # =====================================================================
@@ -239,21 +264,8 @@ def email_payslip(request, pk):
 # =====================================================================
 def download_payslip(request, payroll_id):
     try:
-        payroll = Payroll.objects.get(id=payroll_id)
+        payroll = Payroll.objects.select_related("employee").get(id=payroll_id)
     except Payroll.DoesNotExist:
         return HttpResponse("Payroll not found", status=404)
 
-    temp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    file_path = temp.name
-
-    generate_payroll_pdf(payroll, file_path)
-
-    with open(file_path, "rb") as f:
-        pdf_data = f.read()
-
-    os.remove(file_path)
-
-    response = HttpResponse(pdf_data, content_type="application/pdf")
-    response["Content-Disposition"] = f"attachment; filename=payslip_{payroll_id}.pdf"
-
-    return response
+    return payslip_response(request, payroll, "salary_slip", f"payslip_{payroll_id}.pdf")
@@ -1,16 +1,9 @@
-from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from .models import Payroll
-from .utils import generate_payroll_pdf
-import tempfile
+from .pdf_cache import payslip_response
 
-def download_payslip(request, pk):
-    payroll = get_object_or_404(Payroll, id=pk)
+def download_payslip(request, payroll_id):
+    payroll = get_object_or_404(Payroll.objects.select_related("employee"), id=payroll_id)
 
-    temp = tempfile.NamedTemporaryFile(delete=True, suffix=".pdf")
-    generate_payroll_pdf(payroll, temp.name)
-
-    temp.seek(0)
-    response = HttpResponse(temp.read(), content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="Payslip_{payroll.employee.name}_{payroll.month}_{payroll.year}.pdf"'
-    return response
+    filename = f"Payslip_{payroll.employee.name}_{payroll.month}_{payroll.year}.pdf"
+    return payslip_response(request, payroll, "salary_slip", filename)
@@ -0,0 +1,113 @@
+"""
+Working status of every employee for a month, resolved in one query.
+
+Each day of the month falls into one of four buckets for an employee:
+
+- present: at least one attendance record that day. Attendance wins over
+  leave.
+- paid leave: covered by an approved leave of a paid type, and not
+  present.
+- unpaid leave: covered by an approved UNPAID leave, and not present.
+- loss of pay: every other day, i.e. working days - present - paid leave.
+
+resolve_month annotates Employee with correlated subqueries over the
+month's Attendance and over the approved Leave intervals that overlap
+it. The leaves are found through leave.intervals.overlapping, so each
+lookup is a range scan on the (employee, start_date, end_date) index.
+
+Leave days are each interval clipped to the month with Greatest/Least,
+then summed in the database. A nested EXISTS against the same intervals
+counts the leave days on which the employee attended anyway, and those
+are subtracted. An employee's approved leaves never overlap, because
+LeaveSerializer rejects overlaps on every write, so the sums do not
+double count.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db.models import (
+    Count, DurationField, Exists, ExpressionWrapper, IntegerField, OuterRef, Subquery, Sum, Value,
+)
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from employees.models import Employee
+from attendance.models import Attendance
+from attendance.utils import month_bounds
+from leave.intervals import overlapping
+from leave.models import Leave
+from .calculator import working_days
+
+UNPAID_TYPES = ("UNPAID",)
+
+WorkingStatus = namedtuple(
+    "WorkingStatus",
+    "employee_id salary present_days paid_leave_days unpaid_leave_days lop_days",
+)
+
+
+def _count(queryset, expression):
+    """Correlated scalar subquery: one aggregate per outer employee row."""
+    return Subquery(
+        queryset.order_by().values("employee").annotate(result=expression).values("result")
+    )
+
+
+def _approved_leaves(employee, start, last, paid):
+    leaves = Leave.objects.filter(employee=employee, status="APPROVED")
+    leaves = leaves.exclude(leave_type__in=UNPAID_TYPES) if paid else leaves.filter(leave_type__in=UNPAID_TYPES)
+    return overlapping(leaves, start, last)
+
+
+def _leave_days(start, last, paid):
+    """Days of approved leave inside [start, last], as a duration."""
+    clipped = ExpressionWrapper(
+        Least("end_date", Value(last)) - Greatest("start_date", Value(start)) + Value(timedelta(days=1)),
+        output_field=DurationField(),
+    )
+    return _count(_approved_leaves(OuterRef("pk"), start, last, paid), Sum(clipped))
+
+
+def _attended_on_leave(attendance, start, last, paid):
+    on_leave = _approved_leaves(OuterRef("employee"), start, last, paid).filter(
+        start_date__lte=OuterRef("date"), end_date__gte=OuterRef("date")
+    )
+    return Coalesce(
+        _count(attendance.filter(Exists(on_leave)), Count("date", distinct=True)),
+        0,
+        output_field=IntegerField(),
+    )
+
+
+def resolve_month(year, month, employee_ids=None):
+    """[WorkingStatus] for the employees (default: all), ordered by id, from one query."""
+    start, end = month_bounds(year, month)
+    last = end - timedelta(days=1)
+    working = working_days(year, month)
+
+    attendance = Attendance.objects.filter(employee=OuterRef("pk"), date__gte=start, date__lt=end)
+
+    employees = Employee.objects.all()
+    if employee_ids is not None:
+        employees = employees.filter(id__in=employee_ids)
+
+    rows = employees.order_by("id").annotate(
+        present=Coalesce(_count(attendance, Count("date", distinct=True)), 0, output_field=IntegerField()),
+        paid_span=_leave_days(start, last, paid=True),
+        unpaid_span=_leave_days(start, last, paid=False),
+        paid_attended=_attended_on_leave(attendance, start, last, paid=True),
+        unpaid_attended=_attended_on_leave(attendance, start, last, paid=False),
+    ).values_list("id", "salary", "present", "paid_span", "unpaid_span", "paid_attended", "unpaid_attended")
+
+    statuses = []
+    for emp_id, salary, present, paid_span, unpaid_span, paid_attended, unpaid_attended in rows:
+        paid = (paid_span.days if paid_span else 0) - paid_attended
+        unpaid = (unpaid_span.days if unpaid_span else 0) - unpaid_attended
+        statuses.append(WorkingStatus(
+            employee_id=emp_id,
+            salary=salary,
+            present_days=present,
+            paid_leave_days=paid,
+            unpaid_leave_days=unpaid,
+            lop_days=max(working - present - paid, 0),
+        ))
+    return statuses